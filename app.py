@@ -6,6 +6,7 @@ import logging
 import sys
 
 from flask import Flask
+from werkzeug.serving import is_running_from_reloader
 
 from config import Config
 from services.database import init_db
@@ -47,6 +48,13 @@ def create_app(config_class: type[Config] = Config) -> Flask:
     app.register_blueprint(admin_bp)
     app.register_blueprint(api_bp)
 
+    # Start printing queued jobs. Under the debug reloader the parent process only
+    # watches files, so only the child that serves requests may own the plotter.
+    if not app.debug or is_running_from_reloader():
+        from services.queue import get_print_dispatcher
+
+        get_print_dispatcher(app.config).start()
+
     return app
 
 
@@ -0,0 +1,90 @@
+"""Benchmark the ``services.geometry`` kernels against the per-point loops they replaced.
+
+Usage::
+
+    python -m benchmarks.bench_geometry [IMAGE ...] [--repeat 3]
+
+Without arguments every ``*_generated.png`` in ``storage/processed`` is traced
+into contours (as the vectorizer does) and each stage of the G-code pipeline
+is timed with both implementations.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence
+
+import numpy as np
+from PIL import Image
+from skimage import measure
+
+from benchmarks import legacy
+from config import Config
+from services import geometry
+
+
+def _contours(image_path: Path, threshold: int = 240) -> List[np.ndarray]:
+    mask = np.array(Image.open(image_path).convert("L")) < threshold
+    return [c[:, ::-1].copy() for c in measure.find_contours(mask.astype(float), 0.5) if len(c) >= 24]
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("images", nargs="*", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    images = args.images or sorted(Config.GENERATED_DIR.glob("*_generated.png"))
+    if not images:
+        parser.error(f"no images given and none found in {Config.GENERATED_DIR}")
+
+    print(f"{'image':<40}{'stage':<12}{'legacy ms':>11}{'numpy ms':>10}{'speedup':>9}")
+    for image in images:
+        contours = _contours(image)
+        as_tuples = [geometry.to_tuples(c) for c in contours]
+        # later stages see simplified paths scaled to millimetres, as in vector_data_to_gcode
+        mm_contours = [geometry.simplify_rdp(c, 2.0) * 0.0625 for c in contours]
+        mm_tuples = [geometry.to_tuples(c) for c in mm_contours]
+        stages = [
+            (
+                "rdp",
+                lambda: [legacy.vectorizer_rdp(c, 2.0) for c in as_tuples],
+                lambda: [geometry.simplify_rdp(c, 2.0) for c in contours],
+            ),
+            (
+                "chaikin",
+                lambda: [legacy.smooth_path_chaikin(c, 2) for c in mm_tuples],
+                lambda: [geometry.smooth_chaikin(c, 2) for c in mm_contours],
+            ),
+            (
+                "min-move",
+                lambda: [legacy.filter_min_move(c, 0.1) for c in mm_tuples],
+                lambda: [geometry.filter_min_move(c, 0.1) for c in mm_contours],
+            ),
+            (
+                "length",
+                lambda: [legacy.path_length(c) for c in mm_tuples],
+                lambda: [geometry.path_length(c) for c in mm_contours],
+            ),
+        ]
+        label = f"{image.name[:28]} ({sum(map(len, contours))} pts)"
+        for name, old, new in stages:
+            old_s = _best_of(old, args.repeat)
+            new_s = _best_of(new, args.repeat)
+            print(f"{label:<40}{name:<12}{old_s * 1e3:>11.2f}{new_s * 1e3:>10.2f}{old_s / max(new_s, 1e-9):>8.1f}x")
+            label = ""
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Benchmark G-code streaming modes against the ``grblsim://`` emulator.
+
+Usage::
+
+    python -m benchmarks.bench_streaming [--gcode FILE] [--speed 20] [--latency 0.004]
+
+Without ``--gcode`` a synthetic drawing of short segments is streamed. Each
+configuration reports wall time, achieved lines per second, bytes put on the
+wire and how much of the run the emulated planner spent executing motion.
+Every stream mode runs once with the file as written and once through the
+wire optimizer (``+wire``). A final run cancels a char-count stream part way
+(``--cancel-after``) and reports how long the real-time feed hold took to stop
+motion.
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import threading
+import time
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+from services.gcode_wire import optimize_lines
+from services.plotter import PlotterController, PlotterError
+
+
+def synthetic_program(paths: int = 20, segments: int = 60, segment_mm: float = 0.5) -> List[str]:
+    """Return a drawing made of many short segments, like a traced caricature."""
+    lines: List[str] = []
+    for p in range(paths):
+        cx, cy = 10.0 + (p % 5) * 20.0, 10.0 + (p // 5) * 20.0
+        radius = segments * segment_mm / (2 * math.pi)
+        points = [
+            (cx + radius * math.cos(2 * math.pi * i / segments), cy + radius * math.sin(2 * math.pi * i / segments))
+            for i in range(segments + 1)
+        ]
+        lines.append(f"G0 X{points[0][0]:.2f} Y{points[0][1]:.2f} ; move to start")
+        lines.append("F5000 ; set feed rate")
+        lines.append("M3 S90 ; pen down")
+        lines.append("G4 P0.05 ; dwell")
+        lines.extend(f"G1 X{x:.2f} Y{y:.2f}" for x, y in points)
+        lines.append("M5 ; pen up")
+        lines.append("G4 P0.05 ; dwell")
+    lines.append("G0 X0.00 Y0.00 ; return to origin")
+    return lines
+
+
+def run_once(
+    lines: Sequence[str],
+    *,
+    mode: str,
+    line_delay: float,
+    url: str,
+) -> Tuple[float, dict]:
+    controller = PlotterController(
+        url,
+        115200,
+        timeout=30.0,
+        startup_delay=0.0,
+        line_delay=line_delay,
+        stream_mode=mode,
+    )
+    controller.connect()
+    try:
+        started = time.monotonic()
+        controller.send_gcode_lines(lines)
+        elapsed = time.monotonic() - started
+        stats = controller._serial.simulator.stats.as_dict()  # noqa: SLF001 - benchmark introspection
+        stats.update(controller.last_stream_stats.to_dict())
+    finally:
+        controller.disconnect()
+    return elapsed, stats
+
+
+def run_cancel(lines: Sequence[str], *, url: str, after: float) -> Tuple[float | None, float | None]:
+    """Cancel a char-count stream after *after* wall seconds; return (controller, emulator) stop latency."""
+    controller = PlotterController(url, 115200, timeout=30.0, startup_delay=0.0, stream_mode="char-count")
+    controller.connect()
+    try:
+        timer = threading.Timer(after, controller.request_cancel)
+        timer.start()
+        try:
+            controller.send_gcode_lines(lines)
+        except PlotterError:
+            pass
+        timer.cancel()
+        hold = controller._serial.simulator.stats.hold_latency_seconds  # noqa: SLF001 - benchmark introspection
+    finally:
+        controller.disconnect()
+    return controller.last_cancel_latency, hold
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gcode", type=Path, help="G-code file to stream (default: synthetic drawing)")
+    parser.add_argument("--speed", type=float, default=20.0, help="emulator time scale")
+    parser.add_argument("--latency", type=float, default=0.004, help="simulated response latency (s)")
+    parser.add_argument("--line-delays", default="0,0.1", help="comma separated ping-pong line delays")
+    parser.add_argument("--cancel-after", type=float, default=1.0, help="wall seconds before the cancel run cancels (0 skips)")
+    args = parser.parse_args(argv)
+
+    if args.gcode:
+        lines = args.gcode.read_text(encoding="utf-8").splitlines()
+    else:
+        lines = synthetic_program()
+    url = f"grblsim://?speed={args.speed}&latency={args.latency}"
+
+    wire_lines, wire_stats = optimize_lines(lines)
+    wire_lines = list(wire_lines)
+    programs = {False: list(lines), True: wire_lines}
+    wire_bytes = {False: wire_stats.source_bytes, True: wire_stats.wire_bytes}
+
+    configs = [("char-count", 0.0)] + [
+        ("ping-pong", float(delay)) for delay in args.line_delays.split(",") if delay.strip()
+    ] + [("numbered", 0.0)]
+    print(f"{len(lines)} lines, emulator {url}")
+    print(f"wire optimizer: {wire_stats.source_bytes} -> {wire_stats.wire_bytes} bytes ({wire_stats.saved_percent:.1f}% saved)")
+    print(
+        f"{'mode':<17}{'delay':>7}{'wall s':>9}{'sim s':>9}{'lines/s':>10}"
+        f"{'bytes':>9}{'busy %':>8}{'overflow':>9}{'writes':>8}{'sys/s':>8}"
+    )
+    for mode, delay in configs:
+        for wire in (False, True):
+            # line_delay is wall-clock time; scale it so it matches emulated time
+            # the numbered transport needs an emulator that checks line numbers
+            mode_url = f"{url}&numbered=1" if mode == "numbered" else url
+            elapsed, stats = run_once(programs[wire], mode=mode, line_delay=delay / args.speed, url=mode_url)
+            simulated = elapsed * args.speed
+            busy = 100.0 * stats["motion_seconds"] / simulated if simulated else 0.0
+            label = f"{mode}+wire" if wire else mode
+            print(
+                f"{label:<17}{delay:>7.3f}{elapsed:>9.2f}{simulated:>9.1f}"
+                f"{len(lines) / simulated:>10.1f}{wire_bytes[wire]:>9}{busy:>8.1f}{stats['rx_overflows']:>9}"
+                f"{stats['writes']:>8}{stats['syscalls_per_second']:>8.0f}"
+            )
+
+    if args.cancel_after > 0:
+        stopped, hold = run_cancel(programs[True], url=url, after=args.cancel_after)
+        if stopped is None:
+            print(f"cancel after {args.cancel_after:.2f} s: motion did not report stopped")
+        else:
+            emulated = f", emulator hold {hold * 1000:.1f} ms" if hold is not None else ""
+            print(
+                f"cancel after {args.cancel_after:.2f} s: stopped {stopped * 1000:.1f} ms wall "
+                f"({stopped * args.speed * 1000:.0f} ms machine time){emulated}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark vectorized Zhang-Suen thinning against the pure-Python original.
+
+Usage::
+
+    python -m benchmarks.bench_thinning [--image FILE] [--size 400] [--skip-legacy]
+
+Without ``--image`` a synthetic drawing of thick strokes is thinned. The
+legacy implementation takes minutes at full 1600px resolution, so the default
+size is smaller; pass ``--skip-legacy`` to time only the new code.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from benchmarks.legacy import zhang_suen_thinning as legacy_thinning
+from services.skeleton import zhang_suen_thinning
+
+
+def synthetic_mask(size: int) -> np.ndarray:
+    """Return a boolean mask of thick ellipses and strokes."""
+    image = Image.new("L", (size, size), 255)
+    draw = ImageDraw.Draw(image)
+    width = max(2, size // 80)
+    for i in range(6):
+        inset = size * (0.05 + 0.06 * i)
+        draw.ellipse((inset, inset * 1.2, size - inset, size - inset * 0.8), outline=0, width=width)
+    draw.line((0, size, size, 0), fill=0, width=width * 2)
+    draw.line((size * 0.2, size * 0.5, size * 0.8, size * 0.55), fill=0, width=width)
+    return np.array(image) < 200
+
+
+def _load_mask(path: Path, size: int) -> np.ndarray:
+    image = Image.open(path).convert("L").resize((size, size))
+    return np.array(image) < 200
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image", type=Path, help="image to threshold and thin (default: synthetic)")
+    parser.add_argument("--size", type=int, default=400, help="square resolution in px")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--skip-legacy", action="store_true", help="only time the vectorized version")
+    args = parser.parse_args(argv)
+
+    mask = _load_mask(args.image, args.size) if args.image else synthetic_mask(args.size)
+    print(f"{args.size}x{args.size} mask, {int(mask.sum())} foreground px")
+
+    start = time.perf_counter()
+    fast = zhang_suen_thinning(mask, iterations=args.iterations)
+    fast_elapsed = time.perf_counter() - start
+    print(f"{'vectorized':<12}{fast_elapsed:>10.3f} s")
+
+    if args.skip_legacy:
+        return
+    start = time.perf_counter()
+    slow = legacy_thinning(mask, iterations=args.iterations)
+    slow_elapsed = time.perf_counter() - start
+    print(f"{'legacy':<12}{slow_elapsed:>10.3f} s")
+    print(f"speedup {slow_elapsed / max(fast_elapsed, 1e-9):.1f}x, identical: {np.array_equal(fast, slow)}")
+
+
+if __name__ == "__main__":
+    main()
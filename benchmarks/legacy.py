@@ -0,0 +1,192 @@
+"""Reference implementations kept to validate and benchmark their optimized replacements."""
+
+from __future__ import annotations
+
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+Point = Tuple[float, float]
+
+
+def zhang_suen_thinning(mask: np.ndarray, iterations: int = 20) -> np.ndarray:
+    """Pure-Python Zhang-Suen thinning, as originally shipped in ``services.gcode``."""
+    binary = mask.astype(np.uint8)
+    rows, cols = binary.shape
+
+    def _neighborhood(y: int, x: int) -> Tuple[int, ...]:
+        return (
+            binary[y - 1, x],
+            binary[y - 1, x + 1],
+            binary[y, x + 1],
+            binary[y + 1, x + 1],
+            binary[y + 1, x],
+            binary[y + 1, x - 1],
+            binary[y, x - 1],
+            binary[y - 1, x - 1],
+        )
+
+    changed = True
+    iter_count = 0
+    while changed and (iterations is None or iter_count < iterations):
+        changed = False
+        iter_count += 1
+        for step in (0, 1):
+            to_remove = []
+            for y in range(1, rows - 1):
+                for x in range(1, cols - 1):
+                    if binary[y, x] == 0:
+                        continue
+                    neighbors = _neighborhood(y, x)
+                    transitions = sum(
+                        neighbors[i] == 0 and neighbors[(i + 1) % 8] == 1 for i in range(8)
+                    )
+                    total = sum(neighbors)
+                    if not (2 <= total <= 6 and transitions == 1):
+                        continue
+                    if step == 0:
+                        if neighbors[0] * neighbors[2] * neighbors[4] != 0:
+                            continue
+                        if neighbors[2] * neighbors[4] * neighbors[6] != 0:
+                            continue
+                    else:
+                        if neighbors[0] * neighbors[2] * neighbors[6] != 0:
+                            continue
+                        if neighbors[0] * neighbors[4] * neighbors[6] != 0:
+                            continue
+                    to_remove.append((y, x))
+            if to_remove:
+                changed = True
+                for y, x in to_remove:
+                    binary[y, x] = 0
+
+    return binary.astype(bool)
+
+
+def vectorizer_rdp(points: Sequence[Point], epsilon: float) -> List[Point]:
+    """Recursive RDP formerly in ``services.vectorizer``."""
+    if len(points) < 3 or epsilon <= 0:
+        return list(points)
+
+    start, end = np.array(points[0]), np.array(points[-1])
+    line = end - start
+    if np.allclose(line, 0):
+        distances = np.linalg.norm(np.array(points) - start, axis=1)
+    else:
+        line_norm = np.linalg.norm(line)
+        offsets = np.array(points) - start
+        distances = np.abs(line[0] * offsets[:, 1] - line[1] * offsets[:, 0]) / line_norm
+
+    idx = int(np.argmax(distances))
+    max_distance = distances[idx]
+    if max_distance <= epsilon:
+        return [points[0], points[-1]]
+
+    first_half = vectorizer_rdp(points[: idx + 1], epsilon)
+    second_half = vectorizer_rdp(points[idx:], epsilon)
+    return first_half[:-1] + second_half
+
+
+def simplify_path_rdp(points: List[Tuple[float, float]], epsilon: float) -> List[Tuple[float, float]]:
+    """Simplify path using Ramer-Douglas-Peucker algorithm."""
+    if len(points) < 3:
+        return points
+
+    # Find the point with the maximum distance
+    dmax = 0.0
+    index = 0
+    end = len(points) - 1
+    
+    # Line defined by points[0] and points[end]
+    x1, y1 = points[0]
+    x2, y2 = points[end]
+    
+    # Precompute line vector
+    dx = x2 - x1
+    dy = y2 - y1
+    
+    # Normalize if length > 0
+    line_len_sq = dx*dx + dy*dy
+    
+    if line_len_sq == 0:
+        # Start and end are same, dist is dist to point
+        for i in range(1, end):
+            px, py = points[i]
+            d = np.sqrt((px - x1)**2 + (py - y1)**2)
+            if d > dmax:
+                index = i
+                dmax = d
+    else:
+        # Perpendicular distance formula
+        for i in range(1, end):
+            px, py = points[i]
+            # Distance from point to line segment
+            # |(y2-y1)x0 - (x2-x1)y0 + x2y1 - y2x1| / sqrt((y2-y1)^2 + (x2-x1)^2)
+            num = abs(dy*px - dx*py + x2*y1 - y2*x1)
+            d = num / np.sqrt(line_len_sq)
+            if d > dmax:
+                index = i
+                dmax = d
+
+    # If max distance is greater than epsilon, recursively simplify
+    if dmax > epsilon:
+        rec_results1 = simplify_path_rdp(points[:index+1], epsilon)
+        rec_results2 = simplify_path_rdp(points[index:], epsilon)
+        return rec_results1[:-1] + rec_results2
+    else:
+        return [points[0], points[end]]
+
+
+def smooth_path_chaikin(points: List[Tuple[float, float]], iterations: int = 1) -> List[Tuple[float, float]]:
+    """Smooth path using Chaikin's algorithm (corner cutting)."""
+    if len(points) < 3 or iterations < 1:
+        return points
+
+    current_points = points
+    for _ in range(iterations):
+        new_points = [current_points[0]]
+        for i in range(len(current_points) - 1):
+            p0 = current_points[i]
+            p1 = current_points[i+1]
+            
+            # Cut at 25% and 75%
+            q = (0.75 * p0[0] + 0.25 * p1[0], 0.75 * p0[1] + 0.25 * p1[1])
+            r = (0.25 * p0[0] + 0.75 * p1[0], 0.25 * p0[1] + 0.75 * p1[1])
+            
+            new_points.append(q)
+            new_points.append(r)
+        
+        new_points.append(current_points[-1])
+        current_points = new_points
+        
+    return current_points
+
+
+def distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
+    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+
+
+def path_length(points: List[Tuple[float, float]]) -> float:
+    if len(points) < 2:
+        return 0.0
+    return sum(distance(points[i], points[i + 1]) for i in range(len(points) - 1))
+
+
+def filter_min_move(points: List[Tuple[float, float]], min_dist: float) -> List[Tuple[float, float]]:
+    if not points or min_dist <= 0:
+        return points
+
+    filtered = [points[0]]
+    last_x, last_y = points[0]
+    for x, y in points[1:]:
+        dx = x - last_x
+        dy = y - last_y
+        if dx * dx + dy * dy < min_dist * min_dist:
+            continue
+        filtered.append((x, y))
+        last_x, last_y = x, y
+    if filtered[-1] != points[-1]:
+        filtered.append(points[-1])
+    return filtered
+
@@ -10,10 +10,12 @@ from flask import (
     request,
     send_file,
     session,
+    stream_with_context,
 )
 
 import tempfile
 from pathlib import Path
+from typing import Optional
 
 from services.chess import (
     ChessMoveData,
@@ -26,19 +28,27 @@ from services.chess import (
     _validate_square,
 )
 from services.gcode import vector_data_to_gcode, GCodeSettings, GCodeError
-from services.gemini_client import GeminiClient, GeminiClientError
+from services.gcode_file import GCodeProgram, remove_program
+from services.events import get_event_bus, sse_stream
+from services.gemini_client import GeminiClient
 from services.plotter import PlotterController, PlotterError
+from services.plotter_service import PlotterService, get_plotter_service
+from services.print_time import machine_profile_from_config
 from services.queue import (
     QueueError,
+    QueueFullError,
     approve_job,
     cancel_job,
     confirm_job,
     create_job_from_manual_upload,
-    create_job_from_upload,
+    enqueue_print_job,
     get_generated_image_path,
     get_job,
+    get_print_progress,
     list_jobs,
-    start_print_job,
+    resume_print_job,
+    submit_job_from_upload,
+    wire_program,
 )
 from services.style_presets import DEFAULT_STYLE_KEY, get_style
 
@@ -63,6 +73,11 @@ def _gemini_client() -> GeminiClient:
     )
 
 
+def _plotter_service() -> PlotterService:
+    """Return the shared service that owns the plotter serial port."""
+    return get_plotter_service(current_app.config)
+
+
 @api_bp.get("/health")
 def health_check() -> Response:
     """Return application health status."""
@@ -83,7 +98,7 @@ def health_check() -> Response:
 
 @api_bp.post("/jobs")
 def submit_job() -> Response:
-    """Create a new job from an uploaded image."""
+    """Create a new job from an uploaded image; generation continues in the background."""
     image = request.files.get("image")
     custom_prompt = (request.form.get("prompt") or "").strip() or None
     style_key = (request.form.get("style") or DEFAULT_STYLE_KEY).strip().lower()
@@ -92,7 +107,7 @@ def submit_job() -> Response:
 
     style = get_style(style_key)
     try:
-        job = create_job_from_upload(
+        job = submit_job_from_upload(
             image,
             prompt=custom_prompt,
             requester=requester,
@@ -102,15 +117,17 @@ def submit_job() -> Response:
             config=current_app.config,
             gemini_client=_gemini_client(),
         )
+    except QueueFullError as exc:
+        return jsonify({"error": str(exc)}), 503, {"Retry-After": "30"}
     except QueueError as exc:
         return jsonify({"error": str(exc)}), 400
-    except GeminiClientError as exc:
-        return jsonify({"error": str(exc)}), 502
     except Exception as exc:  # noqa: BLE001
         current_app.logger.exception("Unhandled error during job submission: %s", exc)
         return jsonify({"error": "Unexpected server error."}), 500
 
-    return jsonify({"job_id": job["id"], "status": job["status"]})
+    response = jsonify({"job_id": job["id"], "status": job["status"]})
+    response.headers["Location"] = f"/api/jobs/{job['id']}"
+    return response, 202
 
 
 @api_bp.get("/jobs")
@@ -130,6 +147,43 @@ def get_public_job(job_id: int) -> Response:
     return jsonify(job)
 
 
+def _last_event_id() -> Optional[int]:
+    raw = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    try:
+        return int(raw) if raw else None
+    except ValueError:
+        return None
+
+
+def _event_stream_response(stream) -> Response:
+    response = Response(stream_with_context(stream), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_bp.get("/events")
+def public_events() -> Response:
+    """Stream job status and print progress as Server-Sent Events.
+
+    ``?job_id=`` limits the stream to one job. Clients resume with the
+    ``Last-Event-ID`` header; ``GET /api/jobs/<id>`` remains the polling fallback.
+    """
+    job_id = request.args.get("job_id", type=int)
+    accept = None if job_id is None else (lambda event: event.data.get("id") == job_id)
+    return _event_stream_response(sse_stream(get_event_bus(), last_id=_last_event_id(), accept=accept))
+
+
+@api_bp.get("/jobs/<int:job_id>/progress")
+def job_progress(job_id: int) -> Response:
+    """Return print progress (lines, bytes, rate, ETA) from memory while a job prints."""
+    try:
+        progress = get_print_progress(job_id)
+    except QueueError as exc:
+        return jsonify({"error": str(exc)}), 404
+    return jsonify({"id": job_id, "print_progress": progress})
+
+
 @api_bp.get("/jobs/<int:job_id>/preview")
 def job_preview(job_id: int):
     """Return the generated image preview."""
@@ -144,7 +198,7 @@ def job_preview(job_id: int):
 def job_confirm(job_id: int) -> Response:
     """Confirm a job for the queue."""
     try:
-        job = confirm_job(job_id)
+        job = confirm_job(job_id, current_app.config)
     except QueueError as exc:
         return jsonify({"error": str(exc)}), 400
     return jsonify(job)
@@ -167,6 +221,12 @@ def admin_jobs() -> Response:
     return jsonify(jobs)
 
 
+@api_bp.get("/admin/events")
+def admin_events() -> Response:
+    """Stream job and progress events, including error details, for the admin dashboard."""
+    return _event_stream_response(sse_stream(get_event_bus(), last_id=_last_event_id(), admin=True))
+
+
 @api_bp.post("/admin/jobs/<int:job_id>/approve")
 def admin_approve(job_id: int) -> Response:
     """Approve job for plotting."""
@@ -179,16 +239,26 @@ def admin_approve(job_id: int) -> Response:
 
 @api_bp.post("/admin/jobs/<int:job_id>/start")
 def admin_start(job_id: int) -> Response:
-    """Queue job for printing."""
+    """Queue job for the print dispatcher; the print itself runs in the background."""
     try:
         allow_reprint = request.args.get("reprint") in {"1", "true", "yes", "on"}
-        job = start_print_job(job_id, current_app.config, allow_reprint=allow_reprint)
+        job = enqueue_print_job(job_id, current_app.config, allow_reprint=allow_reprint)
     except QueueError as exc:
         return jsonify({"error": str(exc)}), 400
     except Exception as exc:  # noqa: BLE001
         current_app.logger.exception("Unexpected error during print start: %s", exc)
         return jsonify({"error": "Failed to start print job."}), 500
-    return jsonify(job)
+    return jsonify(job), 202
+
+
+@api_bp.post("/admin/jobs/<int:job_id>/resume")
+def admin_resume(job_id: int) -> Response:
+    """Queue an interrupted print to continue from its last checkpoint."""
+    try:
+        job = resume_print_job(job_id, current_app.config)
+    except QueueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    return jsonify(job), 202
 
 
 @api_bp.post("/admin/jobs/<int:job_id>/cancel")
@@ -260,6 +330,10 @@ def chess_print() -> Response:
             pixel_size_mm=pixel_size_mm,
             feed_rate=config.get("PLOTTER_FEED_RATE", 5000),
             pen_dwell_seconds=0.05,
+            machine=machine_profile_from_config(config),
+            # only ends that effectively touch are joined; a wider tolerance would
+            # connect neighbouring hatch strokes with lines that are not in the art
+            join_tolerance_mm=float(config.get("PLOTTER_JOIN_TOLERANCE_MM", 0.2)),
         )
 
         # Generate G-code to temp file
@@ -276,39 +350,32 @@ def chess_print() -> Response:
             dry_run = dry_run.lower() in {"1", "true", "yes", "on"}
 
         if dry_run:
-            gcode_path.unlink(missing_ok=True)
+            remove_program(gcode_path)
             return jsonify({
                 "success": True,
                 "dry_run": True,
                 "stats": {
                     "path_count": stats.path_count,
                     "estimated_seconds": round(stats.estimated_seconds, 1),
+                    "pen_lifts_removed": stats.pen_lifts_removed,
                 },
             })
 
         # Send to plotter
-        controller = PlotterController(
-            port=config["SERIAL_PORT"],
-            baudrate=config["SERIAL_BAUDRATE"],
-            timeout=config.get("SERIAL_TIMEOUT", 10.0),
-            line_delay=config.get("PLOTTER_LINE_DELAY", 0.1),
-        )
-
         try:
-            controller.connect()
-            with gcode_path.open("r", encoding="utf-8") as f:
-                gcode_lines = f.readlines()
-            controller.send_gcode_lines(gcode_lines)
+            with GCodeProgram(gcode_path) as gcode_lines:
+                wire_lines, _ = wire_program(gcode_lines, config)
+                _plotter_service().run(lambda controller: controller.send_gcode_lines(wire_lines))
             return jsonify({
                 "success": True,
                 "stats": {
                     "path_count": stats.path_count,
                     "estimated_seconds": round(stats.estimated_seconds, 1),
+                    "pen_lifts_removed": stats.pen_lifts_removed,
                 },
             })
         finally:
-            controller.disconnect()
-            gcode_path.unlink(missing_ok=True)
+            remove_program(gcode_path)
 
     except GCodeError as exc:
         return jsonify({"error": str(exc)}), 500
@@ -347,6 +414,7 @@ def chess_demo_run() -> Response:
         tap_dwell_s=config.get("CHESS_TAP_DWELL_S", 0.3),
         magnet_on_cmd=config.get("CHESS_MAGNET_ON_GCODE", "M3 S255"),
         magnet_off_cmd=config.get("CHESS_MAGNET_OFF_GCODE", "M3 S0\nM5"),
+        machine=machine_profile_from_config(config),
     )
 
     dry_run = config.get("PLOTTER_DRY_RUN", False)
@@ -361,17 +429,7 @@ def chess_demo_run() -> Response:
         })
 
     try:
-        controller = PlotterController(
-            port=config["SERIAL_PORT"],
-            baudrate=config["SERIAL_BAUDRATE"],
-            timeout=config.get("SERIAL_TIMEOUT", 10.0),
-            line_delay=config.get("PLOTTER_LINE_DELAY", 0.1),
-        )
-        controller.connect()
-        try:
-            controller.send_gcode_lines(gcode_lines)
-        finally:
-            controller.disconnect()
+        _plotter_service().run(lambda controller: controller.send_gcode_lines(gcode_lines))
 
         return jsonify({
             "success": True,
@@ -414,6 +472,7 @@ def chess_pick_place_demo() -> Response:
         magnet_on_cmd=config.get("CHESS_MAGNET_ON_GCODE", "M3 S255"),
         engage_dwell=config.get("CHESS_MAGNET_ENGAGE_DWELL_S", 0.3),
         move_feed_rate=config.get("CHESS_MOVE_FEED_RATE", 3000),
+        machine=machine_profile_from_config(config),
     )
 
     all_lines = carry_lines + ["; --- RESET (magnet off) ---"] + return_lines
@@ -431,22 +490,15 @@ def chess_pick_place_demo() -> Response:
         })
 
     try:
-        controller = PlotterController(
-            port=config["SERIAL_PORT"],
-            baudrate=config["SERIAL_BAUDRATE"],
-            timeout=config.get("SERIAL_TIMEOUT", 10.0),
-            line_delay=config.get("PLOTTER_LINE_DELAY", 0.1),
-        )
-        controller.connect()
-        try:
+        def _run_demo(controller: PlotterController) -> None:
             # Phase 1: pick up and carry with magnet on
             controller.send_gcode_lines(carry_lines)
             # Reset Arduino to kill magnet (DTR toggle)
             controller.reset()
             # Phase 2: return home
             controller.send_gcode_lines(return_lines)
-        finally:
-            controller.disconnect()
+
+        _plotter_service().run(_run_demo)
 
         return jsonify({
             "success": True,
@@ -535,6 +587,7 @@ def chess_move() -> Response:
             capture_x=config.get("CHESS_CAPTURE_X_MM", -30.0),
             capture_y=config.get("CHESS_CAPTURE_Y_MM", 0.0),
             capture_spacing=config.get("CHESS_CAPTURE_SPACING_MM", 15.0),
+            machine=machine_profile_from_config(config),
         )
         current_app.logger.info("G-code generated: %d phases, stats=%s", len(phases), stats)
     except (ValueError, IndexError) as exc:
@@ -567,24 +620,18 @@ def chess_move() -> Response:
         })
 
     try:
-        current_app.logger.info("Connecting to plotter on port: %s", config["SERIAL_PORT"])
-        controller = PlotterController(
-            port=config["SERIAL_PORT"],
-            baudrate=config["SERIAL_BAUDRATE"],
-            timeout=config.get("SERIAL_TIMEOUT", 10.0),
-            line_delay=config.get("PLOTTER_LINE_DELAY", 0.1),
-        )
-        controller.connect()
-        try:
+        current_app.logger.info("Submitting move to plotter service on port: %s", config["SERIAL_PORT"])
+        logger = current_app.logger
+
+        def _run_phases(controller: PlotterController) -> None:
             for i, phase in enumerate(phases):
-                current_app.logger.info("Executing phase %d/%d...", i + 1, len(phases))
+                logger.info("Executing phase %d/%d...", i + 1, len(phases))
                 controller.send_gcode_lines(phase)
                 # Reset to kill magnet after each phase
                 controller.reset()
-            current_app.logger.info("All phases executed successfully")
-        finally:
-            controller.disconnect()
-            current_app.logger.info("Plotter disconnected")
+
+        _plotter_service().run(_run_phases)
+        current_app.logger.info("All phases executed successfully")
 
         current_app.logger.info("CHESS MOVE COMPLETED SUCCESSFULLY")
         return jsonify({
@@ -6,6 +6,8 @@ import logging
 import os
 from pathlib import Path
 
+from services.stream_modes import DEFAULT_STREAM_MODE
+
 
 class Config:
     """Base configuration for the AI plotter application."""
@@ -35,13 +37,35 @@ class Config:
     PLOTTER_DRY_RUN = os.environ.get("PLOTTER_DRY_RUN", "false").strip().lower() in {"1", "true", "yes", "on"}
     PLOTTER_INVERT_Z = os.environ.get("PLOTTER_INVERT_Z", "false").strip().lower() in {"1", "true", "yes", "on"}
     PLOTTER_LINE_DELAY = float(os.environ.get("PLOTTER_LINE_DELAY", "0.1"))
+    # "char-count" keeps GRBL's RX buffer full; "ping-pong" waits for every ack
+    PLOTTER_STREAM_MODE = os.environ.get("PLOTTER_STREAM_MODE", DEFAULT_STREAM_MODE).strip().lower()
+    PLOTTER_RX_BUFFER_SIZE = int(os.environ.get("PLOTTER_RX_BUFFER_SIZE", "127"))
+    # Cancel with GRBL's real-time feed hold + soft reset instead of between lines
+    PLOTTER_REALTIME_CANCEL = os.environ.get("PLOTTER_REALTIME_CANCEL", "true").strip().lower() in {"1", "true", "yes", "on"}
+    PLOTTER_CANCEL_HOLD_TIMEOUT = float(os.environ.get("PLOTTER_CANCEL_HOLD_TIMEOUT", "1.0"))
+    # Per-line ack deadline: minimum + factor * predicted execution wait (minimum <= 0 uses SERIAL_TIMEOUT)
+    PLOTTER_ACK_TIMEOUT_MIN = float(os.environ.get("PLOTTER_ACK_TIMEOUT_MIN", "2.0"))
+    PLOTTER_ACK_TIMEOUT_FACTOR = float(os.environ.get("PLOTTER_ACK_TIMEOUT_FACTOR", "1.5"))
+    # Strip comments and redundant words from G-code on its way to the controller
+    WIRE_OPTIMIZE = os.environ.get("PLOTTER_WIRE_OPTIMIZE", "true").strip().lower() in {"1", "true", "yes", "on"}
+    WIRE_DECIMALS = int(os.environ.get("PLOTTER_WIRE_DECIMALS", "3"))
 
     # Queue
     MAX_RETRY = int(os.environ.get("PLOTTER_MAX_RETRY", "3"))
+    # Background caricature generation: worker threads and how many jobs may wait for one
+    GENERATION_WORKERS = int(os.environ.get("PLOTTER_GENERATION_WORKERS", "2"))
+    GENERATION_QUEUE_SIZE = int(os.environ.get("PLOTTER_GENERATION_QUEUE_SIZE", "16"))
+    # Let the print dispatcher start the next approved job without an admin click
+    PRINT_AUTO_ADVANCE = os.environ.get("PLOTTER_PRINT_AUTO_ADVANCE", "false").strip().lower() in {"1", "true", "yes", "on"}
+    # A PRINTING job whose progress heartbeat is older than this is treated as interrupted
+    PRINT_LEASE_SECONDS = float(os.environ.get("PLOTTER_PRINT_LEASE_SECONDS", "60"))
 
     # Vectorization / image conversion
     VECTOR_RESOLUTION = int(os.environ.get("PLOTTER_VECTOR_RESOLUTION", "1600"))
     VECTORIZE_THRESHOLD = int(os.environ.get("PLOTTER_VECTORIZE_THRESHOLD", "240"))
+    # "contour" traces both edges of each stroke; "centerline" traces its medial axis once
+    VECTORIZE_MODE = os.environ.get("PLOTTER_VECTORIZE_MODE", "contour").strip().lower()
+    VECTORIZE_STROKE_WIDTHS = os.environ.get("PLOTTER_VECTORIZE_STROKE_WIDTHS", "false").strip().lower() in {"1", "true", "yes", "on"}
     VECTORIZE_SIMPLIFY_PX = float(os.environ.get("PLOTTER_VECTORIZE_SIMPLIFY_PX", "2.0"))
     VECTORIZE_MIN_POINTS = int(os.environ.get("PLOTTER_VECTORIZE_MIN_POINTS", "24"))
     VECTORIZE_DOWNSAMPLE_STEP = int(os.environ.get("PLOTTER_VECTORIZE_DOWNSAMPLE_STEP", "1"))
@@ -50,6 +74,17 @@ class Config:
 
     # Plotting behavior
     PLOTTER_FEED_RATE = int(os.environ.get("PLOTTER_FEED_RATE", "5000"))
+    PLOTTER_OPTIMIZE_PATH_ORDER = os.environ.get("PLOTTER_OPTIMIZE_PATH_ORDER", "true").strip().lower() in {"1", "true", "yes", "on"}
+    PLOTTER_JOIN_TOLERANCE_MM = float(os.environ.get("PLOTTER_JOIN_TOLERANCE_MM", "0.2"))
+    PLOTTER_PATH_ORDER_BUDGET_S = float(os.environ.get("PLOTTER_PATH_ORDER_BUDGET_S", "2.0"))
+    # Compile G-code in the background as soon as a job is generated
+    GCODE_PRECOMPILE = os.environ.get("PLOTTER_GCODE_PRECOMPILE", "true").strip().lower() in {"1", "true", "yes", "on"}
+    # Store G-code as a compiled .gcbin program; the text file is rendered on demand
+    GCODE_COMPILED = os.environ.get("PLOTTER_GCODE_COMPILED", "false").strip().lower() in {"1", "true", "yes", "on"}
+    # Kinematics used for print-time estimates (GRBL $110, $120 and $11)
+    PLOTTER_MAX_RATE = float(os.environ.get("PLOTTER_MAX_RATE", "5000"))
+    PLOTTER_ACCELERATION = float(os.environ.get("PLOTTER_ACCELERATION", "500"))
+    PLOTTER_JUNCTION_DEVIATION = float(os.environ.get("PLOTTER_JUNCTION_DEVIATION", "0.01"))
 
     # Chess robot
     CHESS_BOARD_SIZE_MM = float(os.environ.get("CHESS_BOARD_SIZE_MM", "215.9"))
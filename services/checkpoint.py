@@ -0,0 +1,153 @@
+"""Print checkpoints: modal G-code state at an acknowledged line and resume programs."""
+
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+_WORD_PATTERN = re.compile(r"([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT_PATTERN = re.compile(r"\([^)]*\)|;.*$")
+
+
+@dataclass
+class ModalState:
+    """Controller state that a resumed stream has to re-establish.
+
+    The pen is modelled as the spindle (``M3``/``M5``), as emitted by
+    :mod:`services.gcode`; ``pen_command`` is the line that last lowered it
+    and ``pen_dwell`` the ``G4`` that followed, so both can be replayed.
+    """
+
+    x: float = 0.0
+    y: float = 0.0
+    feed: Optional[float] = None
+    motion_mode: int = 0
+    absolute: bool = True
+    pen_down: bool = False
+    pen_command: Optional[str] = None
+    pen_dwell: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def advance(self, lines: Iterable[str]) -> None:
+        """Apply *lines* in order."""
+        after_pen_down = False
+        for raw in lines:
+            line = _COMMENT_PATTERN.sub("", raw).strip().upper()
+            if not line:
+                continue
+            target_x: Optional[float] = None
+            target_y: Optional[float] = None
+            dwell = False
+            for letter, value in _WORD_PATTERN.findall(line):
+                number = float(value)
+                if letter == "G":
+                    code = int(round(number))
+                    if code in (0, 1):
+                        self.motion_mode = code
+                    elif code == 4:
+                        dwell = True
+                    elif code == 90:
+                        self.absolute = True
+                    elif code == 91:
+                        self.absolute = False
+                elif letter == "M":
+                    code = int(round(number))
+                    if code in (3, 4):
+                        self.pen_down = True
+                        self.pen_command = line
+                        self.pen_dwell = None
+                    elif code == 5:
+                        self.pen_down = False
+                elif letter == "F":
+                    self.feed = number
+                elif letter == "X":
+                    target_x = number
+                elif letter == "Y":
+                    target_y = number
+            if dwell and after_pen_down:
+                self.pen_dwell = line
+            after_pen_down = self.pen_down and self.pen_command == line
+            if self.absolute:
+                self.x = self.x if target_x is None else target_x
+                self.y = self.y if target_y is None else target_y
+            else:
+                self.x += target_x or 0.0
+                self.y += target_y or 0.0
+
+
+def modal_state(lines: Iterable[str]) -> ModalState:
+    """Return the modal state after executing *lines* from power-on defaults."""
+    state = ModalState()
+    state.advance(lines)
+    return state
+
+
+class CheckpointTracker:
+    """Follow a program as lines are acknowledged and describe checkpoints cheaply.
+
+    The modal state is advanced incrementally, so successive checkpoints of
+    one print scan every line once in total.
+    """
+
+    def __init__(self, lines: Sequence[str]):
+        self._lines = lines
+        self._state = ModalState()
+        self._line = 0
+        self._lock = threading.Lock()
+
+    def checkpoint(self, line: int) -> Dict[str, Any]:
+        """Return the checkpoint for *line* acknowledged lines (never moves backwards)."""
+        with self._lock:
+            line = max(self._line, min(int(line), len(self._lines)))
+            self._state.advance(self._lines[self._line : line])
+            self._line = line
+            return {
+                "line": line,
+                "total_lines": len(self._lines),
+                "state": self._state.to_dict(),
+                "updated_at": datetime.utcnow().isoformat(),
+            }
+
+
+def resume_preamble(
+    lines: Sequence[str],
+    acknowledged: int,
+    *,
+    backoff: int = 0,
+    pen_lift_dwell: float = 0.5,
+) -> Tuple[List[str], int, ModalState]:
+    """Build the lines that prepare the machine to continue *lines* after *acknowledged* lines.
+
+    GRBL acknowledges a line when it enters the planner, not when it has been
+    drawn, so the restart point backs off by *backoff* lines; redrawing a few
+    segments is harmless, skipping them is not. The preamble lifts the pen,
+    travels to where the restart line begins, restores feed, pen and
+    distance mode; the caller then streams source lines ``start`` onwards
+    unchanged, without copying them.
+
+    Returns ``(preamble, start, state)``.
+    """
+    start = max(0, min(int(acknowledged), len(lines)) - max(0, int(backoff)))
+    state = modal_state(lines[:start])
+
+    preamble = [
+        "G90 ; resume: absolute positioning",
+        "M5 ; resume: pen up",
+        f"G4 P{pen_lift_dwell:.2f} ; resume: let the pen lift",
+        f"G0 X{state.x:.2f} Y{state.y:.2f} ; resume: travel to checkpoint",
+    ]
+    if state.feed is not None:
+        mode = "G1 " if state.motion_mode == 1 else ""
+        preamble.append(f"{mode}F{state.feed:g} ; resume: feed rate")
+    if state.pen_down:
+        preamble.append(f"{state.pen_command} ; resume: pen down")
+        if state.pen_dwell:
+            preamble.append(state.pen_dwell)
+    if not state.absolute:
+        preamble.append("G91 ; resume: relative positioning")
+    return preamble, start, state
@@ -7,6 +7,7 @@ import re
 from dataclasses import dataclass
 from typing import List, Optional, Tuple
 
+from services.print_time import MachineProfile, simulate_gcode
 from services.vectorizer import VectorData
 
 Point = Tuple[float, float]
@@ -301,6 +302,7 @@ def generate_move_gcode(
     capture_x: float = -30.0,
     capture_y: float = 0.0,
     capture_spacing: float = 15.0,
+    machine: Optional[MachineProfile] = None,
 ) -> tuple[list[list[str]], dict]:
     """Generate G-code phases for a single chess move.
 
@@ -367,6 +369,8 @@ def generate_move_gcode(
         phases.append(phase)
 
     total_lines = sum(len(p) for p in phases)
+    # each phase starts from rest after the reset; reset time itself is not modelled
+    phase_seconds = [simulate_gcode(p, machine).total_seconds for p in phases]
     stats = {
         "from": move.from_sq,
         "to": move.to_sq,
@@ -375,6 +379,7 @@ def generate_move_gcode(
         "captured": move.captured,
         "phases": len(phases),
         "gcode_lines": total_lines,
+        "estimated_seconds": round(sum(phase_seconds), 1),
     }
 
     return phases, stats
@@ -396,6 +401,7 @@ def generate_pick_place_demo_gcode(
     magnet_on_cmd: str = "M3 S255",
     engage_dwell: float = 0.3,
     move_feed_rate: int = 3000,
+    machine: Optional[MachineProfile] = None,
 ) -> tuple[list[str], list[str], dict]:
     """Generate a simple pick-and-place demo in two phases.
 
@@ -432,6 +438,9 @@ def generate_pick_place_demo_gcode(
         "from_mm": [round(from_xy[0], 2), round(from_xy[1], 2)],
         "to_mm": [round(to_xy[0], 2), round(to_xy[1], 2)],
         "gcode_lines": len(carry) + len(ret),
+        "estimated_seconds": round(
+            simulate_gcode(carry, machine).total_seconds + simulate_gcode(ret, machine).total_seconds, 1
+        ),
     }
 
     return carry, ret, stats
@@ -446,6 +455,7 @@ def generate_chess_demo_gcode(
     tap_dwell_s: float = 0.3,
     magnet_on_cmd: str = "M3 S255",
     magnet_off_cmd: str = "M3 S0\nM5",
+    machine: Optional[MachineProfile] = None,
 ) -> tuple[list[str], dict]:
     """Generate G-code that moves to every square center and taps.
 
@@ -485,26 +495,13 @@ def generate_chess_demo_gcode(
         if part:
             lines.append(f"{part} ; final magnet off")
 
-    # Estimate time: rapid moves ~100mm/s, plus dwell per square
-    total_travel_mm = 0.0
-    prev_x, prev_y = 0.0, 0.0
-    for row in range(square_count):
-        for col in range(square_count):
-            x, y = _square_center_mm(row, col, square_size, gap_mm, origin_x, origin_y)
-            total_travel_mm += math.sqrt((x - prev_x) ** 2 + (y - prev_y) ** 2)
-            prev_x, prev_y = x, y
-    # Return home
-    total_travel_mm += math.sqrt(prev_x ** 2 + prev_y ** 2)
-
-    travel_time_s = total_travel_mm / 100.0
-    dwell_time_s = total_squares * (tap_dwell_s + 0.05) + 2.0
-    estimated_time_s = travel_time_s + dwell_time_s
+    estimate = simulate_gcode(lines, machine)
 
     stats = {
         "total_squares": total_squares,
         "square_size_mm": round(square_size, 2),
         "gap_mm": gap_mm,
-        "estimated_seconds": round(estimated_time_s, 1),
+        "estimated_seconds": round(estimate.total_seconds, 1),
         "gcode_lines": len(lines),
     }
 
@@ -0,0 +1,147 @@
+"""In-process event bus for job status and print-progress updates."""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Event:
+    """One published update.
+
+    ``data`` is safe for the public UI; ``admin_data`` is merged in for the
+    admin stream only.
+    """
+
+    id: int
+    type: str
+    data: Dict[str, Any]
+    admin_data: Dict[str, Any] = field(default_factory=dict)
+
+    def payload(self, *, admin: bool) -> Dict[str, Any]:
+        if admin and self.admin_data:
+            return {**self.data, **self.admin_data}
+        return self.data
+
+
+class EventBus:
+    """Fan out events to any number of readers through a bounded ring buffer.
+
+    Publishers never block on readers: every event gets a monotonically
+    increasing ID and readers ask for everything after the last ID they saw.
+    IDs start at the current time in milliseconds, so IDs handed out before a
+    restart are older than anything still buffered and resuming from one is
+    reported as a gap rather than silently skipping events.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self._events: Deque[Event] = deque(maxlen=max(1, capacity))
+        self._condition = threading.Condition()
+        self._next_id = int(time.time() * 1000)
+
+    @property
+    def last_id(self) -> int:
+        """Return the ID of the newest event, or one before the first ID to be issued."""
+        with self._condition:
+            return self._next_id - 1
+
+    def publish(self, type: str, data: Dict[str, Any], admin_data: Optional[Dict[str, Any]] = None) -> Event:
+        with self._condition:
+            event = Event(id=self._next_id, type=type, data=data, admin_data=admin_data or {})
+            self._next_id += 1
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def since(self, last_id: Optional[int]) -> Tuple[List[Event], bool]:
+        """Return events newer than *last_id* and whether some were already dropped.
+
+        ``None`` means "from now on" and returns nothing.
+        """
+        with self._condition:
+            return self._since_locked(last_id)
+
+    def wait(self, last_id: Optional[int], timeout: float) -> Tuple[List[Event], bool]:
+        """Like :meth:`since`, but block up to *timeout* seconds for a new event."""
+        with self._condition:
+            events, gap = self._since_locked(last_id)
+            if events or gap:
+                return events, gap
+            self._condition.wait(timeout)
+            return self._since_locked(last_id)
+
+    def _since_locked(self, last_id: Optional[int]) -> Tuple[List[Event], bool]:
+        if last_id is None or last_id >= self._next_id - 1:
+            return [], last_id is not None and last_id > self._next_id - 1
+        oldest = self._events[0].id if self._events else self._next_id
+        gap = last_id < oldest - 1
+        return [event for event in self._events if event.id > last_id], gap
+
+
+def format_sse(event_type: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Encode one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+def sse_stream(
+    bus: EventBus,
+    *,
+    last_id: Optional[int],
+    admin: bool = False,
+    accept: Optional[Callable[[Event], bool]] = None,
+    keepalive: float = 15.0,
+    max_duration: float = 300.0,
+    retry_ms: int = 3000,
+) -> Iterator[str]:
+    """Yield SSE messages for events after *last_id* until *max_duration* elapses.
+
+    When events between *last_id* and the buffer were lost (or the ID comes
+    from before a restart) a ``reset`` event tells the client to refetch its
+    state. Comment lines keep idle connections open; closing after
+    *max_duration* frees the worker and the browser reconnects with
+    ``Last-Event-ID``.
+    """
+    yield f"retry: {retry_ms}\n\n"
+    if last_id is None:
+        last_id = bus.last_id
+        yield format_sse("hello", {"last_event_id": last_id}, last_id)
+    deadline = time.monotonic() + max_duration
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, gap = bus.wait(last_id, timeout=min(keepalive, remaining))
+        if gap:
+            last_id = events[-1].id if events else bus.last_id
+            yield format_sse("reset", {"last_event_id": last_id}, last_id)
+            continue
+        if not events:
+            yield ": keepalive\n\n"
+            continue
+        for event in events:
+            last_id = event.id
+            if accept is None or accept(event):
+                yield format_sse(event.type, event.payload(admin=admin), event.id)
+
+
+_bus = EventBus()
+
+
+def get_event_bus() -> EventBus:
+    """Return the process-wide event bus."""
+    return _bus
+
+
+def publish(type: str, data: Dict[str, Any], admin_data: Optional[Dict[str, Any]] = None) -> Event:
+    """Publish an event on the process-wide bus."""
+    return _bus.publish(type, data, admin_data)
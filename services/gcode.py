@@ -2,14 +2,18 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-import math
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Sequence, Tuple
+from typing import List, Optional, Sequence, Tuple
 
 import numpy as np
 from PIL import Image, ImageFilter
 
+from services import geometry, path_planning
+from services.gcode_compiled import write_compiled
+from services.gcode_file import remove_program, write_program
+from services.print_time import MachineProfile, rapid_seconds, simulate_gcode
+from services.skeleton import extract_paths, zhang_suen_thinning
 from services.vectorizer import VectorData
 
 
@@ -34,6 +38,14 @@ class GCodeSettings:
     simplification_error: float = 0.1
     smoothing_iterations: int = 2
     pen_dwell_seconds: float = 0.0
+    machine: Optional[MachineProfile] = None
+    optimize_order: bool = False
+    join_tolerance_mm: float = 0.0
+    order_time_budget: float = 1.0
+    # write a compiled .gcbin program instead of text (see services.gcode_compiled)
+    compiled: bool = False
+    # decimals kept on the wire for compiled programs; None sends lines as written
+    wire_decimals: Optional[int] = 3
 
 
 @dataclass
@@ -45,6 +57,19 @@ class GCodeStats:
     estimated_seconds: float
     path_count: int
     line_count: int
+    path_seconds: List[float] = field(default_factory=list)
+    unordered_travel_mm: float = 0.0
+    unordered_estimated_seconds: float = 0.0
+    pen_lifts_removed: int = 0
+
+
+def _write_commands(output_path: Path, commands: List[str], settings: GCodeSettings) -> None:
+    if settings.compiled:
+        # the text form is rendered from the compiled program on demand
+        remove_program(output_path)
+        write_compiled(output_path, commands, wire_decimals=settings.wire_decimals)
+    else:
+        write_program(output_path, commands)
 
 
 def _validate_feed_rate(settings: GCodeSettings) -> None:
@@ -71,7 +96,7 @@ def image_to_gcode(image_path: Path, output_path: Path, settings: GCodeSettings
     if not mask.any():
         raise GCodeError("Thresholding removed all pixels; cannot produce outline.")
 
-    skeleton = _zhang_suen_thinning(mask, iterations=settings.thinning_iterations)
+    skeleton = zhang_suen_thinning(mask, iterations=settings.thinning_iterations)
 
     if not skeleton.any():
         raise GCodeError("Unable to derive skeleton from outline.")
@@ -80,7 +105,7 @@ def image_to_gcode(image_path: Path, output_path: Path, settings: GCodeSettings
     height, width = skeleton.shape
     pixel = settings.pixel_size_mm
 
-    paths = _extract_paths(skeleton, settings.point_skip)
+    paths = extract_paths(skeleton, settings.point_skip)
 
     if not paths:
         raise GCodeError("No drawable paths detected in skeleton.")
@@ -92,14 +117,14 @@ def image_to_gcode(image_path: Path, output_path: Path, settings: GCodeSettings
         
         # 1. Simplify jagged pixel path into vectors (RDP)
         if settings.simplification_error > 0:
-            mm_points = _simplify_path_rdp(mm_points, settings.simplification_error)
+            mm_points = geometry.simplify_rdp(mm_points, settings.simplification_error)
             
         # 2. Smooth the sharp corners (Chaikin)
         if settings.smoothing_iterations > 0:
-            mm_points = _smooth_path_chaikin(mm_points, settings.smoothing_iterations)
+            mm_points = geometry.smooth_chaikin(mm_points, settings.smoothing_iterations)
             
         # 3. Filter tiny leftover segments
-        mm_points = _filter_min_move(mm_points, settings.min_move_mm)
+        mm_points = geometry.filter_min_move(mm_points, settings.min_move_mm)
         
         if len(mm_points) < 2:
             continue
@@ -112,7 +137,7 @@ def image_to_gcode(image_path: Path, output_path: Path, settings: GCodeSettings
         if settings.pen_dwell_seconds > 0:
             commands.append(f"G4 P{settings.pen_dwell_seconds:.2f} ; dwell")
 
-        for x, y in mm_points:
+        for x, y in mm_points.tolist():
             commands.append(f"G1 X{x:.2f} Y{y:.2f}")
 
         commands.append("M5 ; pen up")
@@ -128,7 +153,7 @@ def image_to_gcode(image_path: Path, output_path: Path, settings: GCodeSettings
     )
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(commands), encoding="utf-8")
+    _write_commands(output_path, commands, settings)
     return output_path
 
 
@@ -140,7 +165,7 @@ def vector_data_to_gcode(
         settings = GCodeSettings()
     _validate_feed_rate(settings)
 
-    if not vector_data.paths:
+    if vector_data.path_count == 0:
         raise GCodeError("Vector data did not contain any drawable paths.")
 
     if vector_data.width <= 0 or vector_data.height <= 0:
@@ -150,29 +175,37 @@ def vector_data_to_gcode(
     pixel = settings.pixel_size_mm
     height = vector_data.height
     total_draw_mm = 0.0
-    total_travel_mm = 0.0
-    path_count = 0
-    prev_endpoint: Tuple[float, float] | None = None
 
-    for path in vector_data.paths:
-        if len(path) < 2:
-            continue
+    # convert every vertex to machine millimetres (Y up) in one pass
+    all_mm = vector_data.points * pixel
+    all_mm[:, 1] = (height - 1) * pixel - all_mm[:, 1]
+    bounds = vector_data.offsets.tolist()
 
-        mm_points = [
-            (x * pixel, (height - y - 1) * pixel)
-            for x, y in path
-        ]
-        mm_points = _filter_min_move(mm_points, settings.min_move_mm)
-        if len(mm_points) < 2:
+    drawable: List[np.ndarray] = []
+    for start, stop in zip(bounds, bounds[1:]):
+        if stop - start < 2:
             continue
+        mm_points = geometry.filter_min_move(all_mm[start:stop], settings.min_move_mm)
+        if len(mm_points) >= 2:
+            drawable.append(mm_points)
+
+    pen_lifts_removed = 0
+    if settings.join_tolerance_mm > 0:
+        drawable, pen_lifts_removed = path_planning.join_paths(drawable, settings.join_tolerance_mm)
+
+    initial_jumps = path_planning.travel_jumps(drawable)
+    jumps = initial_jumps
+    if settings.optimize_order and len(drawable) > 1:
+        plan = path_planning.plan_path_order(
+            np.array([path[0] for path in drawable]),
+            np.array([path[-1] for path in drawable]),
+            time_budget=settings.order_time_budget,
+        )
+        drawable = path_planning.apply_path_order(drawable, plan)
+        jumps = path_planning.travel_jumps(drawable)
 
-        travel_start = prev_endpoint if prev_endpoint is not None else (0.0, 0.0)
-        total_travel_mm += _distance(travel_start, mm_points[0])
-
-        path_length = _path_length(mm_points)
-        total_draw_mm += path_length
-        prev_endpoint = mm_points[-1]
-        path_count += 1
+    for mm_points in drawable:
+        total_draw_mm += geometry.path_length(mm_points)
 
         x0, y0 = mm_points[0]
         commands.append(f"G0 X{x0:.2f} Y{y0:.2f} ; move to start")
@@ -181,7 +214,7 @@ def vector_data_to_gcode(
         if settings.pen_dwell_seconds > 0:
             commands.append(f"G4 P{settings.pen_dwell_seconds:.2f} ; dwell")
 
-        for x, y in mm_points:
+        for x, y in mm_points.tolist():
             commands.append(f"G1 X{x:.2f} Y{y:.2f}")
 
         commands.append("M5 ; pen up")
@@ -191,9 +224,6 @@ def vector_data_to_gcode(
     if not commands:
         raise GCodeError("Vector data did not produce drawable paths.")
 
-    if prev_endpoint is not None:
-        total_travel_mm += _distance(prev_endpoint, (0.0, 0.0))
-
     commands.extend(
         [
             "G0 X0.00 Y0.00 ; return to origin",
@@ -203,266 +233,30 @@ def vector_data_to_gcode(
     )
 
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text("\n".join(commands), encoding="utf-8")
+    _write_commands(output_path, commands, settings)
 
-    feed_rate_mm_per_min = max(settings.feed_rate, 1)
-    draw_minutes = total_draw_mm / feed_rate_mm_per_min
-    travel_minutes = total_travel_mm / feed_rate_mm_per_min
-    dwell_seconds = path_count * settings.pen_dwell_seconds * 2
-    estimated_seconds = max(draw_minutes + travel_minutes, 0.0) * 60.0 + dwell_seconds + 5.0
+    estimate = simulate_gcode(commands, settings.machine)
+    # pen-up jumps are bracketed by M5/M3, so each one is a rest-to-rest rapid
+    travel_saved_seconds = rapid_seconds(initial_jumps, settings.machine) - rapid_seconds(jumps, settings.machine)
 
     total_gcode_lines = len(commands)
 
     return GCodeStats(
         total_draw_mm=total_draw_mm,
-        total_travel_mm=total_travel_mm,
-        estimated_seconds=estimated_seconds,
-        path_count=path_count,
+        total_travel_mm=float(jumps.sum()),
+        estimated_seconds=estimate.total_seconds,
+        path_count=len(drawable),
         line_count=total_gcode_lines,
+        path_seconds=estimate.path_seconds,
+        unordered_travel_mm=float(initial_jumps.sum()),
+        unordered_estimated_seconds=estimate.total_seconds + travel_saved_seconds,
+        pen_lifts_removed=pen_lifts_removed,
     )
 
 
-def _zhang_suen_thinning(mask: np.ndarray, iterations: int = 20) -> np.ndarray:
-    """Perform Zhang-Suen thinning to produce a 1px-wide skeleton."""
-    binary = mask.astype(np.uint8)
-    rows, cols = binary.shape
-
-    def _neighborhood(y: int, x: int) -> Tuple[int, ...]:
-        return (
-            binary[y - 1, x],
-            binary[y - 1, x + 1],
-            binary[y, x + 1],
-            binary[y + 1, x + 1],
-            binary[y + 1, x],
-            binary[y + 1, x - 1],
-            binary[y, x - 1],
-            binary[y - 1, x - 1],
-        )
-
-    changed = True
-    iter_count = 0
-    while changed and (iterations is None or iter_count < iterations):
-        changed = False
-        iter_count += 1
-        for step in (0, 1):
-            to_remove = []
-            for y in range(1, rows - 1):
-                for x in range(1, cols - 1):
-                    if binary[y, x] == 0:
-                        continue
-                    neighbors = _neighborhood(y, x)
-                    transitions = sum(
-                        neighbors[i] == 0 and neighbors[(i + 1) % 8] == 1 for i in range(8)
-                    )
-                    total = sum(neighbors)
-                    if not (2 <= total <= 6 and transitions == 1):
-                        continue
-                    if step == 0:
-                        if neighbors[0] * neighbors[2] * neighbors[4] != 0:
-                            continue
-                        if neighbors[2] * neighbors[4] * neighbors[6] != 0:
-                            continue
-                    else:
-                        if neighbors[0] * neighbors[2] * neighbors[6] != 0:
-                            continue
-                        if neighbors[0] * neighbors[4] * neighbors[6] != 0:
-                            continue
-                    to_remove.append((y, x))
-            if to_remove:
-                changed = True
-                for y, x in to_remove:
-                    binary[y, x] = 0
-
-    return binary.astype(bool)
-
-
-NEIGHBOR_OFFSETS = [
-    (-1, 0),
-    (-1, 1),
-    (0, 1),
-    (1, 1),
-    (1, 0),
-    (1, -1),
-    (0, -1),
-    (-1, -1),
-]
-
-
-def _extract_paths(mask: np.ndarray, point_skip: int) -> List[List[Tuple[int, int]]]:
-    """Extract continuous paths from a skeleton mask."""
-    working = mask.copy()
-    paths: List[List[Tuple[int, int]]] = []
-
-    while True:
-        coords = np.argwhere(working)
-        if coords.size == 0:
-            break
-        start = _choose_start(working, coords)
-        path = _trace_path(working, start)
-        if point_skip > 1:
-            path = path[::point_skip]
-        if len(path) >= 2:
-            paths.append(path)
-
-    return paths
-
-
-def _choose_start(mask: np.ndarray, coords: np.ndarray) -> Tuple[int, int]:
-    for y, x in coords:
-        if _neighbor_count(mask, (y, x)) <= 1:
-            return int(y), int(x)
-    y, x = coords[0]
-    return int(y), int(x)
-
-
-def _neighbor_count(mask: np.ndarray, point: Tuple[int, int]) -> int:
-    return sum(
-        1
-        for dy, dx in NEIGHBOR_OFFSETS
-        if 0 <= point[0] + dy < mask.shape[0]
-        and 0 <= point[1] + dx < mask.shape[1]
-        and mask[point[0] + dy, point[1] + dx]
-    )
-
-
-def _trace_path(mask: np.ndarray, start: Tuple[int, int]) -> List[Tuple[int, int]]:
-    path: List[Tuple[int, int]] = []
-    current = start
-    prev = None
-
-    while True:
-        path.append(current)
-        y, x = current
-        mask[y, x] = False
-        neighbors = [
-            (y + dy, x + dx)
-            for dy, dx in NEIGHBOR_OFFSETS
-            if 0 <= y + dy < mask.shape[0]
-            and 0 <= x + dx < mask.shape[1]
-            and mask[y + dy, x + dx]
-        ]
-
-        if not neighbors:
-            break
-
-        if prev and prev in neighbors and len(neighbors) > 1:
-            neighbors.remove(prev)
-
-        next_point = neighbors[0]
-        prev = current
-        current = next_point
-
-    return path
-
-
-def _simplify_path_rdp(points: List[Tuple[float, float]], epsilon: float) -> List[Tuple[float, float]]:
-    """Simplify path using Ramer-Douglas-Peucker algorithm."""
-    if len(points) < 3:
-        return points
-
-    # Find the point with the maximum distance
-    dmax = 0.0
-    index = 0
-    end = len(points) - 1
-    
-    # Line defined by points[0] and points[end]
-    x1, y1 = points[0]
-    x2, y2 = points[end]
-    
-    # Precompute line vector
-    dx = x2 - x1
-    dy = y2 - y1
-    
-    # Normalize if length > 0
-    line_len_sq = dx*dx + dy*dy
-    
-    if line_len_sq == 0:
-        # Start and end are same, dist is dist to point
-        for i in range(1, end):
-            px, py = points[i]
-            d = np.sqrt((px - x1)**2 + (py - y1)**2)
-            if d > dmax:
-                index = i
-                dmax = d
-    else:
-        # Perpendicular distance formula
-        for i in range(1, end):
-            px, py = points[i]
-            # Distance from point to line segment
-            # |(y2-y1)x0 - (x2-x1)y0 + x2y1 - y2x1| / sqrt((y2-y1)^2 + (x2-x1)^2)
-            num = abs(dy*px - dx*py + x2*y1 - y2*x1)
-            d = num / np.sqrt(line_len_sq)
-            if d > dmax:
-                index = i
-                dmax = d
-
-    # If max distance is greater than epsilon, recursively simplify
-    if dmax > epsilon:
-        rec_results1 = _simplify_path_rdp(points[:index+1], epsilon)
-        rec_results2 = _simplify_path_rdp(points[index:], epsilon)
-        return rec_results1[:-1] + rec_results2
-    else:
-        return [points[0], points[end]]
-
-
-def _smooth_path_chaikin(points: List[Tuple[float, float]], iterations: int = 1) -> List[Tuple[float, float]]:
-    """Smooth path using Chaikin's algorithm (corner cutting)."""
-    if len(points) < 3 or iterations < 1:
-        return points
-
-    current_points = points
-    for _ in range(iterations):
-        new_points = [current_points[0]]
-        for i in range(len(current_points) - 1):
-            p0 = current_points[i]
-            p1 = current_points[i+1]
-            
-            # Cut at 25% and 75%
-            q = (0.75 * p0[0] + 0.25 * p1[0], 0.75 * p0[1] + 0.25 * p1[1])
-            r = (0.25 * p0[0] + 0.75 * p1[0], 0.25 * p0[1] + 0.75 * p1[1])
-            
-            new_points.append(q)
-            new_points.append(r)
-        
-        new_points.append(current_points[-1])
-        current_points = new_points
-        
-    return current_points
-
-
-def _distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
-
-
-def _path_length(points: List[Tuple[float, float]]) -> float:
-    if len(points) < 2:
-        return 0.0
-    return sum(_distance(points[i], points[i + 1]) for i in range(len(points) - 1))
-
-
-def _pixels_to_mm(path: List[Tuple[int, int]], height: int, pixel_size: float) -> List[Tuple[float, float]]:
-    points: List[Tuple[float, float]] = []
-    for row, col in path:
-        x_mm = col * pixel_size
-        y_mm = (height - row - 1) * pixel_size
-        points.append((x_mm, y_mm))
+def _pixels_to_mm(path: List[Tuple[int, int]], height: int, pixel_size: float) -> np.ndarray:
+    rows_cols = np.asarray(path, dtype=float).reshape(-1, 2)
+    points = np.empty_like(rows_cols)
+    points[:, 0] = rows_cols[:, 1] * pixel_size
+    points[:, 1] = (height - rows_cols[:, 0] - 1) * pixel_size
     return points
-
-
-def _filter_min_move(points: List[Tuple[float, float]], min_dist: float) -> List[Tuple[float, float]]:
-    if not points or min_dist <= 0:
-        return points
-
-    filtered = [points[0]]
-    last_x, last_y = points[0]
-    for x, y in points[1:]:
-        dx = x - last_x
-        dy = y - last_y
-        if dx * dx + dy * dy < min_dist * min_dist:
-            continue
-        filtered.append((x, y))
-        last_x, last_y = x, y
-    if filtered[-1] != points[-1]:
-        filtered.append(points[-1])
-    return filtered
-
@@ -0,0 +1,233 @@
+"""Compiled G-code programs (``.gcbin``).
+
+A compiled program stores what the streamer needs and nothing else: one
+opcode per line with its coordinates quantized to micrometres, a small
+table of the remaining (highly repetitive) text lines, and every line
+pre-encoded in its wire form in one byte blob with an end offset per line.
+Streaming writes slices of that blob directly; the human-readable text is
+rendered from the columns only when something asks for it (dry runs,
+checkpoints, downloads).
+
+Layout (little endian)::
+
+    header   magic, line count, blob size, metadata size
+    metadata JSON: text table, wire stats, decimals (padded to 8 bytes)
+    x, y     int32[count]   micrometres, for G0/G1 lines
+    arg      int32[count]   text-table index (line text or G0/G1 comment), -1 for none
+    ends     uint32[count]  end offset of each line's wire bytes in the blob
+    opcode   uint8[count]
+    blob     wire lines, each with its newline (empty lines take no bytes)
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from services.gcode_file import COMPILED_SUFFIX, GCodeProgram, LineRange, write_program
+from services.gcode_wire import WireOptimizer, WireStats
+
+OP_TEXT = 0
+OP_RAPID = 1
+OP_LINEAR = 2
+
+_MAGIC = b"GCBIN\x00\x00\x01"
+_HEADER = struct.Struct("<8sQQQ")  # magic, line count, blob size, metadata size
+_WIRE_CHUNK = 4096
+_MOVE_PATTERN = re.compile(r"^G([01]) X(-?\d+\.\d\d) Y(-?\d+\.\d\d)(?: ; (.*))?$")
+
+
+def compiled_path(gcode_path: Path) -> Path:
+    """Return where the compiled form of *gcode_path* lives."""
+    return gcode_path.with_suffix(COMPILED_SUFFIX)
+
+
+def _micrometres(text: str) -> int:
+    return int(round(float(text) * 1000))
+
+
+def write_compiled(gcode_path: Path, lines: Sequence[str], *, wire_decimals: Optional[int] = 3) -> Path:
+    """Compile *lines* into ``compiled_path(gcode_path)``.
+
+    *wire_decimals* controls the wire form (see :class:`~services.gcode_wire.WireOptimizer`);
+    ``None`` sends every line as written.
+    """
+    count = len(lines)
+    opcodes = np.zeros(count, dtype=np.uint8)
+    xs = np.zeros(count, dtype="<i4")
+    ys = np.zeros(count, dtype="<i4")
+    args = np.full(count, -1, dtype="<i4")
+    table: Dict[str, int] = {}
+    optimizer = WireOptimizer(wire_decimals) if wire_decimals is not None else None
+    stats = WireStats()
+    wire: List[bytes] = []
+
+    for index, line in enumerate(lines):
+        match = _MOVE_PATTERN.match(line)
+        if match:
+            opcodes[index] = OP_LINEAR if match.group(1) == "1" else OP_RAPID
+            xs[index] = _micrometres(match.group(2))
+            ys[index] = _micrometres(match.group(3))
+            if match.group(4) is not None:
+                args[index] = table.setdefault(match.group(4), len(table))
+        else:
+            args[index] = table.setdefault(line, len(table))
+
+        if optimizer is not None:
+            text = optimizer.optimize(line)
+        else:
+            text = line.strip()
+            if text:
+                stats.lines += 1
+                stats.source_bytes += len(text.encode("utf-8")) + 1
+                stats.wire_bytes += len(text.encode("utf-8")) + 1
+        wire.append((text + "\n").encode("utf-8") if text else b"")
+    if optimizer is not None:
+        stats = optimizer.stats
+
+    ends = np.cumsum([len(chunk) for chunk in wire], dtype=np.int64) if count else np.zeros(0, dtype=np.int64)
+    if count and ends[-1] >= 2**32:
+        raise ValueError("Compiled G-code wire blob exceeds 4 GiB.")
+    metadata = json.dumps(
+        {"text": sorted(table, key=table.get), "wire_stats": stats.to_dict(), "wire_decimals": wire_decimals},
+        separators=(",", ":"),
+    ).encode("utf-8")
+    metadata += b" " * (-len(metadata) % 8)
+    blob = b"".join(wire)
+
+    target = compiled_path(gcode_path)
+    tmp = target.with_name(target.name + ".tmp")
+    with tmp.open("wb") as fp:
+        fp.write(_HEADER.pack(_MAGIC, count, len(blob), len(metadata)))
+        fp.write(metadata)
+        for column in (xs, ys, args, ends.astype("<u4"), opcodes):
+            fp.write(column.tobytes())
+        fp.write(blob)
+    os.replace(tmp, target)
+    return target
+
+
+class CompiledProgram(Sequence[str]):
+    """Memory-mapped compiled program.
+
+    As a sequence it yields the rendered text lines (with newlines, like
+    :class:`~services.gcode_file.GCodeProgram`), so checkpoints and resume
+    work unchanged; :meth:`iter_wire` yields the pre-encoded wire bytes.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = self.path.open("rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, blob_size, meta_size = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"'{self.path}' is not a compiled G-code program.")
+        metadata = json.loads(self._map[_HEADER.size : _HEADER.size + meta_size])
+        self._text: List[str] = metadata["text"]
+        self.wire_stats = WireStats(
+            **{key: metadata["wire_stats"][key] for key in ("lines", "lines_dropped", "source_bytes", "wire_bytes")}
+        )
+        self._count = count
+        offset = _HEADER.size + meta_size
+        columns = {}
+        for name, dtype in (("x", "<i4"), ("y", "<i4"), ("arg", "<i4"), ("ends", "<u4"), ("opcode", "u1")):
+            columns[name] = np.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+            offset += columns[name].nbytes
+        self._x, self._y, self._args, self._ends, self._opcodes = (
+            columns["x"], columns["y"], columns["arg"], columns["ends"], columns["opcode"]
+        )
+        self._blob_offset = offset
+        self.total_bytes = int(blob_size)
+
+    def __enter__(self) -> "CompiledProgram":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        # numpy views pin the mapping; drop them before closing it
+        self._x = self._y = self._args = self._ends = self._opcodes = None
+        try:
+            self._map.close()
+        except BufferError:
+            pass  # a caller still holds a column view; the mapping goes when it does
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def line_ends(self) -> np.ndarray:
+        """Wire bytes sent through each line."""
+        return self._ends
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return LineRange(self, range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._render(index)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_lines()
+
+    def iter_lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yield rendered text lines ``start`` to ``stop``."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(max(0, start), stop):
+            yield self._render(index)
+
+    def iter_wire(self, start: int = 0) -> Iterator[bytes]:
+        """Yield the encoded wire form of every line from *start*; dropped lines are ``b""``."""
+        start = max(0, start)
+        begin = self._blob_offset + (int(self._ends[start - 1]) if start > 0 else 0)
+        for chunk in range(start, len(self), _WIRE_CHUNK):
+            for end in self._ends[chunk : chunk + _WIRE_CHUNK].tolist():
+                end += self._blob_offset
+                yield self._map[begin:end]
+                begin = end
+
+    def _render(self, index: int) -> str:
+        opcode = int(self._opcodes[index])
+        arg = int(self._args[index])
+        if opcode == OP_TEXT:
+            text = self._text[arg]
+        else:
+            text = f"G{opcode - 1} X{self._x[index] / 1000:.2f} Y{self._y[index] / 1000:.2f}"
+            if arg >= 0:
+                text += f" ; {self._text[arg]}"
+        return text if index == len(self) - 1 else text + "\n"
+
+
+def render_gcode(gcode_path: Path) -> Path:
+    """Write the text form of a compiled program to *gcode_path* unless it is already current."""
+    source = compiled_path(gcode_path)
+    if not source.exists() or (gcode_path.exists() and gcode_path.stat().st_mtime_ns >= source.stat().st_mtime_ns):
+        return gcode_path
+    with CompiledProgram(source) as program:
+        write_program(gcode_path, [line.rstrip("\n") for line in program])
+    return gcode_path
+
+
+def program_exists(gcode_path: Path) -> bool:
+    """Return whether *gcode_path* exists as text or in compiled form."""
+    return gcode_path.exists() or compiled_path(gcode_path).exists()
+
+
+def open_program(gcode_path: Path) -> Union[GCodeProgram, CompiledProgram]:
+    """Open *gcode_path* in compiled form if it has one, else as text."""
+    source = compiled_path(gcode_path)
+    if source.exists():
+        return CompiledProgram(source)
+    return GCodeProgram(gcode_path)
@@ -0,0 +1,191 @@
+"""G-code program files with a sidecar line index for random access.
+
+Next to every ``program.gcode`` a ``program.gcode.idx`` file stores the byte
+offset at which each line starts. :class:`GCodeProgram` memory-maps both, so
+line counts and sizes come straight from the index, any line can be reached
+without reading the ones before it, and streaming a program keeps only the
+current line in memory.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union, overload
+
+import numpy as np
+
+INDEX_SUFFIX = ".idx"
+COMPILED_SUFFIX = ".gcbin"
+_MAGIC = b"GCIDX\x00\x00\x01"
+_HEADER = struct.Struct("<8sQQ")  # magic, G-code size in bytes, line count
+_SCAN_CHUNK = 1 << 20
+
+
+def index_path(gcode_path: Path) -> Path:
+    """Return the sidecar index path for *gcode_path*."""
+    return gcode_path.with_name(gcode_path.name + INDEX_SUFFIX)
+
+
+def _write_index(gcode_path: Path, starts: np.ndarray, size: int) -> Path:
+    target = index_path(gcode_path)
+    tmp = target.with_name(target.name + ".tmp")
+    with tmp.open("wb") as fp:
+        fp.write(_HEADER.pack(_MAGIC, size, len(starts)))
+        fp.write(np.append(starts, size).astype("<u8").tobytes())
+    os.replace(tmp, target)
+    return target
+
+
+def write_program(path: Path, lines: Sequence[str]) -> Path:
+    """Write *lines* joined by newlines to *path*, together with its line index."""
+    encoded = [line.encode("utf-8") for line in lines]
+    path.write_bytes(b"\n".join(encoded))
+    lengths = np.fromiter((len(line) + 1 for line in encoded), dtype=np.int64, count=len(encoded))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(encoded) else np.zeros(0, dtype=np.int64)
+    size = int(lengths.sum()) - 1 if len(encoded) else 0
+    _write_index(path, starts, size)
+    return path
+
+
+def write_line_index(gcode_path: Path) -> Path:
+    """Scan an existing G-code file in fixed-size chunks and write its line index."""
+    size = gcode_path.stat().st_size
+    newline_ends = []
+    with gcode_path.open("rb") as fp:
+        position = 0
+        while True:
+            chunk = fp.read(_SCAN_CHUNK)
+            if not chunk:
+                break
+            newline_ends.append(np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == 0x0A) + position + 1)
+            position += len(chunk)
+    ends = np.concatenate(newline_ends) if newline_ends else np.zeros(0, dtype=np.int64)
+    starts = np.concatenate(([0], ends))
+    # like readlines(): a final newline does not open another (empty) line
+    if size == 0 or starts[-1] == size:
+        starts = starts[:-1]
+    return _write_index(gcode_path, starts.astype(np.int64), size)
+
+
+def load_line_index(gcode_path: Path) -> Optional[np.ndarray]:
+    """Return the memory-mapped line offsets (``count + 1`` values), or ``None`` if missing or stale."""
+    target = index_path(gcode_path)
+    try:
+        gcode_stat = gcode_path.stat()
+        index_stat = target.stat()
+    except FileNotFoundError:
+        return None
+    if index_stat.st_mtime_ns < gcode_stat.st_mtime_ns or index_stat.st_size < _HEADER.size:
+        return None
+    with target.open("rb") as fp:
+        magic, size, count = _HEADER.unpack(fp.read(_HEADER.size))
+    if magic != _MAGIC or size != gcode_stat.st_size or index_stat.st_size != _HEADER.size + 8 * (count + 1):
+        return None
+    return np.memmap(target, dtype="<u8", mode="r", offset=_HEADER.size, shape=(count + 1,))
+
+
+def remove_program(gcode_path: Path) -> None:
+    """Delete a G-code file with its index and compiled form."""
+    gcode_path.unlink(missing_ok=True)
+    index_path(gcode_path).unlink(missing_ok=True)
+    gcode_path.with_suffix(COMPILED_SUFFIX).unlink(missing_ok=True)
+
+
+class GCodeProgram(Sequence[str]):
+    """Read-only, memory-mapped view of a G-code file as a sequence of lines.
+
+    Lines keep their trailing newline, as ``readlines()`` would return them.
+    A missing or stale index is rebuilt on open. Use as a context manager, or
+    call :meth:`close`, to release the mapping.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        offsets = load_line_index(self.path)
+        if offsets is None:
+            write_line_index(self.path)
+            offsets = load_line_index(self.path)
+            if offsets is None:
+                raise OSError(f"Could not index G-code file '{self.path}'.")
+        self._offsets = offsets
+        self._file = self.path.open("rb")
+        size = int(offsets[-1])
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __enter__(self) -> "GCodeProgram":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+        mapped = getattr(self._offsets, "_mmap", None)
+        if mapped is not None:
+            mapped.close()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @property
+    def total_bytes(self) -> int:
+        return int(self._offsets[-1])
+
+    @property
+    def line_ends(self) -> np.ndarray:
+        """Byte offset just past each line, i.e. the bytes consumed through that line."""
+        return self._offsets[1:]
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "LineRange": ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, "LineRange"]:
+        if isinstance(index, slice):
+            return LineRange(self, range(len(self))[index])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self._line(index)
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_lines()
+
+    def iter_lines(self, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+        """Yield lines ``start`` to ``stop`` one at a time, straight from the mapping."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for index in range(max(0, start), stop):
+            yield self._line(index)
+
+    def _line(self, index: int) -> str:
+        begin, end = int(self._offsets[index]), int(self._offsets[index + 1])
+        return self._map[begin:end].decode("utf-8")
+
+
+class LineRange(Sequence[str]):
+    """A lazy slice of a :class:`GCodeProgram` (or any program with ``iter_lines``)."""
+
+    def __init__(self, program: Sequence[str], indices: range):
+        self._program = program
+        self._indices = indices
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return LineRange(self._program, self._indices[index])
+        return self._program[self._indices[index]]
+
+    def __iter__(self) -> Iterator[str]:
+        if self._indices.step == 1:
+            return self._program.iter_lines(self._indices.start, self._indices.stop)
+        return (self._program[i] for i in self._indices)
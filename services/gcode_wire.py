@@ -0,0 +1,179 @@
+"""Shrink G-code lines before they go over the serial link.
+
+The archived ``.gcode`` files stay human readable; :class:`WireOptimizer`
+rewrites each line on the way to the controller. It strips comments and
+spaces, drops modal words (``G0``/``G1``/``G2``/``G3``, ``F``) whose value is
+already in effect, drops axis words that would not move that axis and
+writes numbers without trailing zeros. Every input line yields exactly one
+output line (possibly empty, which the streamer skips), so line numbers,
+progress and checkpoints still refer to the source file.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+_WORD_PATTERN = re.compile(r"([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT_PATTERN = re.compile(r"\([^)]*\)|;.*$")
+_MOTION_CODES = {0, 1, 2, 3}
+_AXES = ("X", "Y", "Z")
+# non-modal codes whose axis words are not a move in the current frame
+_AXIS_CONSUMING_CODES = {4, 10, 28, 30, 53, 92}
+
+
+@dataclass
+class WireStats:
+    """Bytes before and after optimisation, counting one newline per sent line."""
+
+    lines: int = 0
+    lines_dropped: int = 0
+    source_bytes: int = 0
+    wire_bytes: int = 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.source_bytes - self.wire_bytes
+
+    @property
+    def saved_percent(self) -> float:
+        return 100.0 * self.saved_bytes / self.source_bytes if self.source_bytes else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "lines": self.lines,
+            "lines_dropped": self.lines_dropped,
+            "source_bytes": self.source_bytes,
+            "wire_bytes": self.wire_bytes,
+            "saved_bytes": self.saved_bytes,
+            "saved_percent": round(self.saved_percent, 1),
+        }
+
+
+def format_number(value: float, decimals: int = 3) -> str:
+    """Format *value* rounded to *decimals* places without trailing zeros."""
+    text = f"{value:.{decimals}f}".rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+class WireOptimizer:
+    """Rewrite G-code lines to their shortest equivalent, tracking modal state.
+
+    The state starts unknown, so nothing is elided until a line has set it;
+    create a new optimizer (or call :meth:`reset`) for every stream. Lines
+    the optimizer does not understand (``$`` commands, line-numbered or
+    checksummed lines, unparseable text) pass through with only comments
+    removed, and invalidate any state they might change.
+    """
+
+    def __init__(self, decimals: int = 3):
+        self.decimals = decimals
+        self.stats = WireStats()
+        self.reset()
+
+    def reset(self) -> None:
+        self._motion: Optional[int] = None
+        self._feed: Optional[str] = None
+        self._absolute: Optional[bool] = None
+        self._position: Dict[str, str] = {}
+
+    def optimize(self, raw_line: str) -> str:
+        """Return the wire form of *raw_line* (without newline); ``""`` if nothing needs sending."""
+        source = raw_line.rstrip("\r\n")
+        wire = self._rewrite(source)
+        if source.strip():
+            self.stats.lines += 1
+            self.stats.source_bytes += len(source.encode("utf-8")) + 1
+            if wire:
+                self.stats.wire_bytes += len(wire.encode("utf-8")) + 1
+            else:
+                self.stats.lines_dropped += 1
+        return wire
+
+    def iter_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Yield the optimized form of every line in *lines*, one for one."""
+        for line in lines:
+            yield self.optimize(line)
+
+    def _rewrite(self, source: str) -> str:
+        text = _COMMENT_PATTERN.sub("", source).strip()
+        if not text:
+            return ""
+        words = self._parse(text)
+        if words is None:
+            self.reset()
+            return text
+
+        g_codes = [int(value) for letter, value in words if letter == "G" and float(value).is_integer()]
+        if len(g_codes) != sum(1 for letter, _ in words if letter == "G"):
+            self.reset()
+            return text
+        consumes_axes = any(code in _AXIS_CONSUMING_CODES for code in g_codes)
+        motion = next((code for code in g_codes if code in _MOTION_CODES), self._motion)
+        # arcs need their end point even when it equals the start (full circles)
+        keep_axes = consumes_axes or motion in (2, 3)
+        for code in g_codes:
+            if code in (90, 91):
+                self._absolute = code == 90
+
+        out: List[str] = []
+        motion_word = False
+        for letter, value in words:
+            if letter == "G":
+                code = int(value)
+                if code in _MOTION_CODES:
+                    motion_word = True
+                    if code == self._motion and not consumes_axes:
+                        continue
+                    self._motion = code
+                out.append(f"G{code}")
+            elif letter == "F":
+                feed = format_number(float(value), self.decimals)
+                if feed == self._feed:
+                    continue
+                self._feed = feed
+                out.append(f"F{feed}")
+            elif letter in _AXES:
+                number = format_number(float(value), self.decimals)
+                if consumes_axes:
+                    out.append(f"{letter}{number}")
+                    continue
+                if not keep_axes and self._absolute and self._position.get(letter) == number:
+                    continue
+                if self._absolute:
+                    self._position[letter] = number
+                else:
+                    self._position.pop(letter, None)
+                out.append(f"{letter}{number}")
+            elif letter == "M" and float(value).is_integer():
+                out.append(f"M{int(float(value))}")
+            else:
+                out.append(f"{letter}{format_number(float(value), self.decimals)}")
+
+        if consumes_axes:
+            # homing, G92 and G10 redefine where the axes are
+            if any(code in (10, 28, 30, 92) for code in g_codes):
+                self._position.clear()
+        elif self._motion is None and any(letter in _AXES for letter, _ in words) and not motion_word:
+            self.reset()
+            return text
+        return "".join(out)
+
+    @staticmethod
+    def _parse(text: str) -> Optional[List[Tuple[str, str]]]:
+        if text[0] in "$%[!~?" or "*" in text:
+            return None
+        words = [(letter.upper(), value) for letter, value in _WORD_PATTERN.findall(text)]
+        if not words or words[0][0] == "N":
+            return None
+        # anything left besides words and whitespace means we do not understand the line
+        if _WORD_PATTERN.sub("", text).strip():
+            return None
+        return words
+
+
+def optimize_lines(lines: Iterable[str], *, decimals: int = 3) -> Tuple[Iterator[str], WireStats]:
+    """Return a lazy one-for-one optimized view of *lines* and the stats it fills in."""
+    optimizer = WireOptimizer(decimals)
+    return optimizer.iter_lines(lines), optimizer.stats
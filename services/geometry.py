@@ -0,0 +1,145 @@
+"""Polyline geometry kernels operating on ``(N, 2)`` float arrays."""
+
+from __future__ import annotations
+
+import bisect
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+
+Point = Tuple[float, float]
+PointsLike = Union[np.ndarray, Sequence[Point]]
+
+
+def as_points(points: PointsLike) -> np.ndarray:
+    """Return *points* as a float ``(N, 2)`` array (no copy when already one)."""
+    array = np.asarray(points, dtype=float)
+    if array.size == 0:
+        return np.empty((0, 2), dtype=float)
+    return array.reshape(-1, 2)
+
+
+def to_tuples(points: np.ndarray) -> List[Point]:
+    """Convert an ``(N, 2)`` array back into a list of ``(x, y)`` tuples."""
+    return list(map(tuple, np.asarray(points).tolist()))
+
+
+def point_line_distance(points: PointsLike, start: PointsLike, end: PointsLike) -> np.ndarray:
+    """Distance from each point to the infinite line through *start* and *end*.
+
+    Falls back to the distance from *start* when the line is degenerate.
+    """
+    pts = as_points(points)
+    a = np.asarray(start, dtype=float)
+    b = np.asarray(end, dtype=float)
+    dx, dy = b - a
+    rel = pts - a
+    norm = np.hypot(dx, dy)
+    if norm == 0:
+        return np.hypot(rel[:, 0], rel[:, 1])
+    return np.abs(dx * rel[:, 1] - dy * rel[:, 0]) / norm
+
+
+def rdp_keep_mask(points: PointsLike, epsilon: float) -> np.ndarray:
+    """Boolean mask of the vertices Ramer-Douglas-Peucker keeps, using an explicit stack.
+
+    Produces the same vertices as the classic recursive formulation without
+    copying sub-lists or hitting the recursion limit on long contours.
+    """
+    pts = as_points(points)
+    n = len(pts)
+    keep = np.ones(n, dtype=bool)
+    if n < 3 or epsilon <= 0:
+        return keep
+
+    keep[1:-1] = False
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = point_line_distance(pts[first + 1 : last], pts[first], pts[last])
+        idx = int(np.argmax(distances))
+        if distances[idx] > epsilon:
+            split = first + 1 + idx
+            keep[split] = True
+            stack.append((split, last))
+            stack.append((first, split))
+    return keep
+
+
+def simplify_rdp(points: PointsLike, epsilon: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker simplification; see :func:`rdp_keep_mask`."""
+    pts = as_points(points)
+    return pts[rdp_keep_mask(pts, epsilon)]
+
+
+def smooth_chaikin(points: PointsLike, iterations: int = 1) -> np.ndarray:
+    """Chaikin corner cutting that keeps both endpoints fixed."""
+    pts = as_points(points)
+    if len(pts) < 3 or iterations < 1:
+        return pts.copy()
+    for _ in range(iterations):
+        p0, p1 = pts[:-1], pts[1:]
+        out = np.empty((2 * len(p0) + 2, 2), dtype=float)
+        out[0] = pts[0]
+        out[1:-1:2] = 0.75 * p0 + 0.25 * p1
+        out[2:-1:2] = 0.25 * p0 + 0.75 * p1
+        out[-1] = pts[-1]
+        pts = out
+    return pts
+
+
+def filter_min_move(points: PointsLike, min_dist: float) -> np.ndarray:
+    """Drop points closer than *min_dist* to the previously kept point.
+
+    The final point is always kept. Segment lengths are computed up front so
+    runs of long segments are accepted in bulk; only points that follow a short
+    segment are checked one by one against the last kept point.
+    """
+    pts = as_points(points)
+    n = len(pts)
+    if n == 0 or min_dist <= 0:
+        return pts.copy()
+
+    min_sq = min_dist * min_dist
+    step = np.diff(pts, axis=0)
+    short = (np.flatnonzero(np.einsum("ij,ij->i", step, step) < min_sq) + 1).tolist()
+    if not short:
+        return pts.copy()
+
+    xs = pts[:, 0].tolist()
+    ys = pts[:, 1].tolist()
+    dropped: List[int] = []
+    position = 0
+    while position < len(short):
+        index = short[position]
+        anchor_x, anchor_y = xs[index - 1], ys[index - 1]
+        # scan forward until a point is far enough from the last kept one
+        while index < n:
+            dx = xs[index] - anchor_x
+            dy = ys[index] - anchor_y
+            if dx * dx + dy * dy >= min_sq:
+                break
+            dropped.append(index)
+            index += 1
+        if index >= n:
+            break
+        # points after the kept one are fine until the next short segment
+        position = bisect.bisect_right(short, index, position)
+
+    keep = np.ones(n, dtype=bool)
+    keep[dropped] = False
+    if not keep[-1]:
+        last_kept = int(np.flatnonzero(keep)[-1])
+        keep[-1] = not np.array_equal(pts[last_kept], pts[-1])
+    return pts[keep]
+
+
+def path_length(points: PointsLike) -> float:
+    """Total length of a polyline."""
+    pts = as_points(points)
+    if len(pts) < 2:
+        return 0.0
+    step = np.diff(pts, axis=0)
+    return float(np.hypot(step[:, 0], step[:, 1]).sum())
@@ -0,0 +1,562 @@
+"""Software GRBL emulator for exercising the serial streamer without hardware.
+
+The emulator models the parts of GRBL 1.1 that matter for streaming
+throughput: the 128-byte serial RX buffer, a planner queue of limited depth,
+per-move execution time from feed rate and acceleration, ``ok``/``error:N``
+responses and the real-time commands ``?``, ``!``, ``~`` and ``0x18``.
+Optionally it also checks Marlin-style ``N<n> ...*<checksum>`` line numbers
+and can corrupt lines or lose acks to exercise the host's recovery.
+
+It is exposed to pyserial as ``grblsim://`` URLs (see
+``services/serial_handlers/protocol_grblsim.py``), e.g.::
+
+    grblsim://?speed=50&planner=15&accel=500
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Optional, Tuple
+
+GRBL_BANNER = "Grbl 1.1h ['$' for help]"
+
+_WORD_PATTERN = re.compile(r"([A-Z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT_PATTERN = re.compile(r"\([^)]*\)|;.*$")
+_NUMBERED_PATTERN = re.compile(r"^N(\d+)(.*?)(?:\*(\d+))?$")
+_M110_PATTERN = re.compile(r"^M110(?:\s*N(\d+))?$")
+
+_REALTIME_STATUS = 0x3F  # '?'
+_REALTIME_HOLD = 0x21  # '!'
+_REALTIME_RESUME = 0x7E  # '~'
+_REALTIME_RESET = 0x18  # ctrl-x
+
+# GRBL error codes used by the emulator
+ERROR_BAD_NUMBER = 2
+ERROR_LOCKED = 9
+ERROR_UNSUPPORTED = 20
+ERROR_UNDEFINED_FEED = 22
+
+
+@dataclass
+class GrblSimSettings:
+    """Machine model used by :class:`GrblSimulator`."""
+
+    rx_buffer_size: int = 128
+    planner_blocks: int = 15
+    max_rate: float = 5000.0  # mm/min, used for G0
+    acceleration: float = 500.0  # mm/s^2
+    time_scale: float = 1.0  # >1 runs faster than wall-clock time
+    baudrate: int = 115200
+    response_latency: float = 0.0  # seconds before a response reaches the host (USB latency)
+    line_numbers: bool = False  # validate Marlin-style "N<n> ...*<checksum>" lines
+    corrupt_every: int = 0  # flip a bit in every Nth received line (line noise)
+    drop_ok_every: int = 0  # lose every Nth "ok" on its way to the host
+
+
+@dataclass
+class GrblSimStats:
+    """Counters collected while the emulator runs."""
+
+    bytes_received: int = 0
+    lines_received: int = 0
+    oks: int = 0
+    errors: int = 0
+    resends: int = 0
+    rx_overflows: int = 0
+    max_rx_bytes: int = 0
+    max_planner_blocks: int = 0
+    motion_seconds: float = 0.0  # simulated time spent executing moves and dwells
+    started_at: float = field(default_factory=time.monotonic)
+    first_motion_at: Optional[float] = None
+    last_motion_at: Optional[float] = None
+    hold_latency_seconds: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "bytes_received": self.bytes_received,
+            "lines_received": self.lines_received,
+            "oks": self.oks,
+            "errors": self.errors,
+            "resends": self.resends,
+            "rx_overflows": self.rx_overflows,
+            "max_rx_bytes": self.max_rx_bytes,
+            "max_planner_blocks": self.max_planner_blocks,
+            "motion_seconds": round(self.motion_seconds, 4),
+        }
+
+
+@dataclass
+class _Block:
+    target: Tuple[float, float]
+    duration: float  # simulated seconds
+    stop_seconds: float  # time needed to decelerate to rest at full speed
+
+
+def _checksum(payload: bytes) -> int:
+    checksum = 0
+    for byte in payload:
+        checksum ^= byte
+    return checksum
+
+
+def move_duration(distance: float, rate_mm_min: float, acceleration: float) -> Tuple[float, float]:
+    """Return ``(duration, stop_time)`` for a rest-to-rest trapezoidal move."""
+    if distance <= 0:
+        return 0.0, 0.0
+    velocity = max(rate_mm_min, 1e-6) / 60.0
+    if acceleration <= 0:
+        return distance / velocity, 0.0
+    ramp_distance = velocity * velocity / acceleration  # accel + decel
+    if distance >= ramp_distance:
+        return distance / velocity + velocity / acceleration, velocity / acceleration
+    peak = math.sqrt(distance * acceleration)
+    return 2.0 * peak / acceleration, peak / acceleration
+
+
+class GrblSimulator:
+    """Threaded GRBL model: a parser thread feeds a planner drained by an executor."""
+
+    def __init__(self, settings: Optional[GrblSimSettings] = None):
+        self.settings = settings or GrblSimSettings()
+        self.stats = GrblSimStats()
+
+        self._cond = threading.Condition()
+        self._rx = bytearray()
+        self._out = bytearray()
+        self._out_pending: Deque[Tuple[float, bytes]] = deque()
+        self._planner: Deque[_Block] = deque()
+        self._executing = False
+        self._hold = False
+        self._hold_requested_at: Optional[float] = None
+        self._alarm = False
+        self._generation = 0  # bumped on soft reset to abort in-progress work
+        self._running = False
+        self._read_cancelled = False
+
+        self._position = (0.0, 0.0)  # position of the last executed block
+        self._planned_position = (0.0, 0.0)
+        self._motion_mode = 0
+        self._feed_rate: Optional[float] = None
+        self._absolute = True
+        self._line_number = 0  # last accepted Marlin-style line number
+
+        self._parser = threading.Thread(target=self._parse_loop, name="grblsim-parser", daemon=True)
+        self._executor = threading.Thread(target=self._execute_loop, name="grblsim-executor", daemon=True)
+
+    # --- lifecycle ---
+    def start(self) -> None:
+        with self._cond:
+            self._running = True
+            self._emit(GRBL_BANNER)
+        self._parser.start()
+        self._executor.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for thread in (self._parser, self._executor):
+            if thread.is_alive():
+                thread.join(timeout=1.0)
+
+    # --- host side ---
+    def receive(self, data: bytes) -> None:
+        """Accept bytes written by the host, honouring wire time and RX capacity."""
+        wire_seconds = 10.0 * len(data) / max(self.settings.baudrate, 1)
+        self._sleep(wire_seconds)
+        with self._cond:
+            self.stats.bytes_received += len(data)
+            for byte in data:
+                if byte in (_REALTIME_STATUS, _REALTIME_HOLD, _REALTIME_RESUME, _REALTIME_RESET):
+                    self._realtime(byte)
+                elif len(self._rx) >= self.settings.rx_buffer_size:
+                    # a real controller silently drops overflowing bytes
+                    self.stats.rx_overflows += 1
+                else:
+                    self._rx.append(byte)
+            self.stats.max_rx_bytes = max(self.stats.max_rx_bytes, len(self._rx))
+            self._cond.notify_all()
+
+    def read(self, size: int, timeout: Optional[float]) -> bytes:
+        """Return up to *size* response bytes, waiting at most *timeout* seconds."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._release_output()
+                if self._out or not self._running or self._read_cancelled:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                if self._out_pending:
+                    until_ready = self._out_pending[0][0] - time.monotonic()
+                    remaining = until_ready if remaining is None else min(remaining, until_ready)
+                self._cond.wait(remaining)
+            self._read_cancelled = False
+            chunk = bytes(self._out[:size])
+            del self._out[:size]
+            return chunk
+
+    @property
+    def out_waiting(self) -> int:
+        with self._cond:
+            self._release_output()
+            return len(self._out)
+
+    def clear_output(self) -> None:
+        with self._cond:
+            self._out.clear()
+            self._out_pending.clear()
+
+    def cancel_read(self) -> None:
+        with self._cond:
+            self._read_cancelled = True
+            self._cond.notify_all()
+
+    def is_idle(self) -> bool:
+        with self._cond:
+            return not self._rx and not self._planner and not self._executing
+
+    # --- internals ---
+    def _sleep(self, simulated_seconds: float) -> None:
+        if simulated_seconds > 0:
+            time.sleep(simulated_seconds / max(self.settings.time_scale, 1e-9))
+
+    def _emit(self, text: str) -> None:
+        data = text.encode("ascii", errors="replace") + b"\r\n"
+        latency = self.settings.response_latency / max(self.settings.time_scale, 1e-9)
+        if latency > 0:
+            self._out_pending.append((time.monotonic() + latency, data))
+        else:
+            self._out.extend(data)
+        self._cond.notify_all()
+
+    def _release_output(self) -> None:
+        now = time.monotonic()
+        while self._out_pending and self._out_pending[0][0] <= now:
+            self._out.extend(self._out_pending.popleft()[1])
+
+    def _state_name(self) -> str:
+        if self._alarm:
+            return "Alarm"
+        if self._hold:
+            return "Hold:0" if not self._executing else "Hold:1"
+        if self._executing or self._planner:
+            return "Run"
+        return "Idle"
+
+    def _realtime(self, byte: int) -> None:
+        if byte == _REALTIME_STATUS:
+            x, y = self._position
+            planner_free = self.settings.planner_blocks - len(self._planner)
+            rx_free = self.settings.rx_buffer_size - len(self._rx)
+            feed = int(self._feed_rate or 0)
+            self._emit(f"<{self._state_name()}|MPos:{x:.3f},{y:.3f},0.000|Bf:{planner_free},{rx_free}|FS:{feed},0>")
+        elif byte == _REALTIME_HOLD:
+            if not self._hold:
+                self._hold = True
+                self._hold_requested_at = time.monotonic()
+                if not self._executing:
+                    self._record_hold_latency()
+        elif byte == _REALTIME_RESUME:
+            self._hold = False
+            self._hold_requested_at = None
+        elif byte == _REALTIME_RESET:
+            # like GRBL, a reset while stopped in feed hold keeps the position
+            was_moving = self._executing or (bool(self._planner) and not self._hold)
+            self._generation += 1
+            self._rx.clear()
+            self._planner.clear()
+            self._hold = False
+            self._hold_requested_at = None
+            self._planned_position = self._position
+            self._line_number = 0
+            if was_moving:
+                # position is lost when motion is aborted; GRBL locks out until $X/$H
+                self._alarm = True
+                self._emit("ALARM:3")
+            self._emit("")
+            self._emit(GRBL_BANNER)
+            if self._alarm:
+                self._emit("[MSG:'$H'|'$X' to unlock]")
+
+    def _record_hold_latency(self) -> None:
+        if self._hold_requested_at is not None and self.stats.hold_latency_seconds is None:
+            self.stats.hold_latency_seconds = time.monotonic() - self._hold_requested_at
+
+    def _respond(self, error: int = 0) -> None:
+        if error:
+            self.stats.errors += 1
+            self._emit(f"error:{error}")
+        else:
+            self.stats.oks += 1
+            if self.settings.drop_ok_every and self.stats.oks % self.settings.drop_ok_every == 0:
+                return
+            self._emit("ok")
+
+    def _accept_line_number(self, text: str) -> Optional[str]:
+        """Check a Marlin-style numbered line; return its command, or ``None`` once answered.
+
+        Unnumbered lines are accepted as they are. A numbered line needs a
+        valid checksum and the next number in sequence (``M110`` sets it);
+        otherwise it is rejected with ``Error:``, ``Resend:`` and ``ok``.
+        """
+        match = _NUMBERED_PATTERN.match(text)
+        if match is None:
+            return text
+        number = int(match.group(1))
+        command = match.group(2).strip()
+        reset = _M110_PATTERN.match(command.upper())
+        if match.group(3) is None:
+            error = "No Checksum with line number"
+        elif _checksum(text[: text.rindex("*")].encode("ascii", errors="replace")) != int(match.group(3)):
+            error = "checksum mismatch"
+        elif reset is None and number != self._line_number + 1:
+            error = "Line Number is not Last Line Number+1"
+        else:
+            if reset is not None:
+                self._line_number = int(reset.group(1)) if reset.group(1) is not None else number
+                self._respond()
+                return None
+            self._line_number = number
+            return command
+        self.stats.resends += 1
+        self._emit(f"Error:{error}, Last Line: {self._line_number}")
+        self._emit(f"Resend: {self._line_number + 1}")
+        self._emit("ok")
+        return None
+
+    def _parse_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and b"\n" not in self._rx:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                newline = self._rx.index(b"\n")
+                raw = bytes(self._rx[:newline])
+                del self._rx[: newline + 1]
+                self.stats.lines_received += 1
+                if raw and self.settings.corrupt_every and self.stats.lines_received % self.settings.corrupt_every == 0:
+                    middle = len(raw) // 2
+                    raw = raw[:middle] + bytes([raw[middle] ^ 0x01]) + raw[middle + 1 :]
+                generation = self._generation
+            self._process_line(raw.decode("ascii", errors="replace"), generation)
+
+    def _process_line(self, text: str, generation: int) -> None:
+        with self._cond:
+            if generation != self._generation:
+                return
+            if self.settings.line_numbers:
+                text = self._accept_line_number(text.strip())
+                if text is None:
+                    return
+            line = _COMMENT_PATTERN.sub("", text).strip().upper()
+            if not line:
+                self._respond()
+                return
+            if line.startswith("$"):
+                if line == "$X":
+                    self._alarm = False
+                    self._emit("[MSG:Caution: Unlocked]")
+                elif line == "$H":
+                    self._alarm = False
+                    self._position = self._planned_position = (0.0, 0.0)
+                self._respond()
+                return
+            if self._alarm:
+                self._respond(ERROR_LOCKED)
+                return
+
+        words = _WORD_PATTERN.findall(line.replace(" ", ""))
+        if not words or len("".join(letter + value for letter, value in words)) != len(line.replace(" ", "")):
+            with self._cond:
+                self._respond(ERROR_BAD_NUMBER)
+            return
+
+        dwell: Optional[float] = None
+        sync = False
+        axes: Dict[str, float] = {}
+        motion_mode = self._motion_mode
+        for letter, value in words:
+            number = float(value)
+            if letter == "G":
+                code = int(round(number))
+                if code in (0, 1):
+                    motion_mode = code
+                elif code == 4:
+                    dwell = 0.0
+                elif code == 90:
+                    self._absolute = True
+                elif code == 91:
+                    self._absolute = False
+                elif code not in (17, 21, 94):
+                    with self._cond:
+                        self._respond(ERROR_UNSUPPORTED)
+                    return
+            elif letter == "M":
+                code = int(round(number))
+                if code in (3, 4, 5, 8, 9):
+                    sync = True
+                elif code not in (0, 2, 30):
+                    with self._cond:
+                        self._respond(ERROR_UNSUPPORTED)
+                    return
+            elif letter == "P" and dwell is not None:
+                dwell = number
+            elif letter == "F":
+                self._feed_rate = number
+            elif letter in ("X", "Y", "Z"):
+                axes[letter] = number
+            elif letter in ("S", "N"):
+                continue
+            else:
+                with self._cond:
+                    self._respond(ERROR_UNSUPPORTED)
+                return
+        self._motion_mode = motion_mode
+
+        if dwell is not None or sync:
+            if not self._wait_for_sync(generation):
+                return
+            if dwell:
+                self._run_dwell(dwell, generation)
+            with self._cond:
+                if generation == self._generation:
+                    self._respond()
+            return
+
+        if "X" in axes or "Y" in axes:
+            if motion_mode == 1 and not self._feed_rate:
+                with self._cond:
+                    self._respond(ERROR_UNDEFINED_FEED)
+                return
+            self._plan_move(axes, motion_mode, generation)
+            return
+
+        with self._cond:
+            self._respond()
+
+    def _plan_move(self, axes: Dict[str, float], motion_mode: int, generation: int) -> None:
+        with self._cond:
+            start = self._planned_position
+            if self._absolute:
+                target = (axes.get("X", start[0]), axes.get("Y", start[1]))
+            else:
+                target = (start[0] + axes.get("X", 0.0), start[1] + axes.get("Y", 0.0))
+            rate = self.settings.max_rate if motion_mode == 0 else min(self._feed_rate or 0.0, self.settings.max_rate)
+            distance = math.hypot(target[0] - start[0], target[1] - start[1])
+            duration, stop_seconds = move_duration(distance, rate, self.settings.acceleration)
+
+            # GRBL answers "ok" only once the block fits in the planner
+            while (
+                self._running
+                and generation == self._generation
+                and len(self._planner) >= self.settings.planner_blocks
+            ):
+                self._cond.wait()
+            if not self._running or generation != self._generation:
+                return
+            self._planned_position = target
+            if duration > 0:
+                self._planner.append(_Block(target=target, duration=duration, stop_seconds=stop_seconds))
+                self.stats.max_planner_blocks = max(self.stats.max_planner_blocks, len(self._planner))
+            else:
+                self._position = target
+            self._respond()
+
+    def _wait_for_sync(self, generation: int) -> bool:
+        with self._cond:
+            while (
+                self._running
+                and generation == self._generation
+                and (self._planner or self._executing)
+            ):
+                self._cond.wait()
+            return self._running and generation == self._generation
+
+    def _run_dwell(self, seconds: float, generation: int) -> None:
+        with self._cond:
+            self._executing = True
+            self._mark_motion()
+        try:
+            remaining = seconds
+            while remaining > 0:
+                with self._cond:
+                    if generation != self._generation or not self._running:
+                        return
+                step = min(remaining, 0.005)
+                self._sleep(step)
+                remaining -= step
+            with self._cond:
+                self.stats.motion_seconds += seconds
+        finally:
+            with self._cond:
+                self._executing = False
+                self._mark_motion()
+                if self._hold:
+                    # a dwell is not interrupted by feed hold; motion stops once it ends
+                    self._record_hold_latency()
+                self._cond.notify_all()
+
+    def _mark_motion(self) -> None:
+        now = time.monotonic()
+        if self.stats.first_motion_at is None:
+            self.stats.first_motion_at = now
+        self.stats.last_motion_at = now
+
+    def _execute_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._running and (not self._planner or self._hold):
+                    self._cond.wait()
+                if not self._running:
+                    return
+                block = self._planner[0]
+                generation = self._generation
+                self._executing = True
+                self._mark_motion()
+
+            remaining = block.duration
+            completed = True
+            while remaining > 0:
+                with self._cond:
+                    if generation != self._generation or not self._running:
+                        completed = False
+                        break
+                    holding = self._hold
+                if holding:
+                    # decelerate to a stop, then wait for resume or reset
+                    stop = min(remaining, block.stop_seconds)
+                    self._sleep(stop)
+                    remaining -= stop
+                    with self._cond:
+                        self.stats.motion_seconds += stop
+                        self._executing = False
+                        self._record_hold_latency()
+                        self._cond.notify_all()
+                        while self._running and self._hold and generation == self._generation:
+                            self._cond.wait()
+                        if generation != self._generation or not self._running:
+                            completed = False
+                            break
+                        self._executing = True
+                    continue
+                step = min(remaining, 0.005)
+                self._sleep(step)
+                remaining -= step
+                with self._cond:
+                    self.stats.motion_seconds += step
+
+            with self._cond:
+                if completed and self._planner and self._planner[0] is block:
+                    self._planner.popleft()
+                    self._position = block.target
+                self._executing = False
+                self._mark_motion()
+                self._cond.notify_all()
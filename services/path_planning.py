@@ -0,0 +1,330 @@
+"""Pen-up travel minimisation: joining, ordering and orienting paths before emission."""
+
+from __future__ import annotations
+
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+Point = Tuple[float, float]
+
+
+@dataclass
+class PathOrder:
+    """Result of :func:`plan_path_order`.
+
+    ``order[k]`` is the index of the k-th path to draw and ``reversed[k]``
+    says whether it is drawn end-to-start.
+    """
+
+    order: List[int]
+    reversed: List[bool]
+    initial_travel: float
+    travel: float
+
+
+def travel_jumps(paths: Sequence[np.ndarray], origin: Point = (0.0, 0.0)) -> np.ndarray:
+    """Pen-up jump lengths for drawing *paths* in sequence, from and back to *origin*."""
+    if not paths:
+        return np.zeros(0)
+    starts = np.array([path[0] for path in paths], dtype=float)
+    ends = np.array([path[-1] for path in paths], dtype=float)
+    origin_arr = np.asarray(origin, dtype=float)[None, :]
+    sources = np.concatenate([origin_arr, ends])
+    targets = np.concatenate([starts, origin_arr])
+    return np.hypot(*(targets - sources).T)
+
+
+def join_paths(paths: Sequence[np.ndarray], tolerance: float) -> Tuple[List[np.ndarray], int]:
+    """Merge paths whose endpoints lie within *tolerance* of each other.
+
+    Endpoints are hashed into a grid of *tolerance*-sized cells, so each
+    lookup only inspects the 3x3 block around a chain end. Chains are grown
+    greedily in both directions, reversing the attached path when its far end
+    is the one that matches; a closing gap is drawn pen-down. Returns the
+    merged paths and the number of joins (pen lifts removed).
+    """
+    if tolerance <= 0 or len(paths) < 2:
+        return list(paths), 0
+
+    ends = np.array([[path[0], path[-1]] for path in paths], dtype=float).reshape(-1, 2)
+    keys = np.floor(ends / tolerance).astype(np.int64).tolist()
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    for endpoint, (cx, cy) in enumerate(keys):
+        grid.setdefault((cx, cy), []).append(endpoint)
+    used = bytearray(len(paths))
+    tol_sq = tolerance * tolerance
+
+    def _match(point: np.ndarray) -> int:
+        cx, cy = (int(v) for v in np.floor(point / tolerance))
+        best, best_sq = -1, tol_sq
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for endpoint in grid.get((cx + dx, cy + dy), ()):
+                    if used[endpoint // 2]:
+                        continue
+                    delta = ends[endpoint] - point
+                    dist_sq = float(delta @ delta)
+                    if dist_sq <= best_sq:
+                        best, best_sq = endpoint, dist_sq
+        return best
+
+    def _attach(chain: List[np.ndarray], piece: np.ndarray) -> None:
+        if np.array_equal(chain[-1][-1], piece[0]):
+            piece = piece[1:]
+        chain.append(piece)
+
+    merged: List[np.ndarray] = []
+    joins = 0
+    for index, path in enumerate(paths):
+        if used[index]:
+            continue
+        used[index] = 1
+        forward: List[np.ndarray] = [path]
+        while True:
+            endpoint = _match(forward[-1][-1])
+            if endpoint < 0:
+                break
+            other = endpoint // 2
+            used[other] = 1
+            _attach(forward, paths[other] if endpoint % 2 == 0 else paths[other][::-1])
+            joins += 1
+        backward: List[np.ndarray] = [path[::-1]]
+        while True:
+            endpoint = _match(backward[-1][-1])
+            if endpoint < 0:
+                break
+            other = endpoint // 2
+            used[other] = 1
+            _attach(backward, paths[other] if endpoint % 2 == 0 else paths[other][::-1])
+            joins += 1
+        head = [piece[::-1] for piece in reversed(backward[1:])]
+        merged.append(np.concatenate(head + forward) if len(head) + len(forward) > 1 else path)
+    return merged, joins
+
+
+def apply_path_order(paths: Sequence[np.ndarray], plan: PathOrder) -> List[np.ndarray]:
+    """Return *paths* rearranged (and reversed where needed) according to *plan*."""
+    return [paths[i][::-1] if flip else paths[i] for i, flip in zip(plan.order, plan.reversed)]
+
+
+class _EndpointGrid:
+    """Uniform grid over path endpoints for nearest-unvisited queries."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        self.count = len(starts)
+        self.points = np.concatenate([starts, ends])
+        self.origin = self.points.min(axis=0)
+        span = float(max(np.ptp(self.points, axis=0).max(), 1e-9))
+        self.cell = max(span / max(math.sqrt(self.count), 1.0), 1e-9)
+        self.extent = int(span / self.cell) + 1
+        self.cells: Dict[Tuple[int, int], List[int]] = {}
+        keys = np.floor((self.points - self.origin) / self.cell).astype(np.int64).tolist()
+        for index, (cx, cy) in enumerate(keys):
+            self.cells.setdefault((cx, cy), []).append(index)
+        self.visited = np.zeros(self.count, dtype=bool)
+        self.remaining = self.count
+
+    def _cell_of(self, point: np.ndarray) -> Tuple[int, int]:
+        cx, cy = np.floor((point - self.origin) / self.cell).astype(np.int64).tolist()
+        return cx, cy
+
+    def visit(self, path: int) -> None:
+        self.visited[path] = True
+        self.remaining -= 1
+
+    def nearest(self, point: np.ndarray) -> int:
+        """Return the endpoint index (``path`` or ``path + count``) closest to *point*."""
+        cx, cy = self._cell_of(point)
+        max_ring = max(abs(cx), abs(cx - self.extent), abs(cy), abs(cy - self.extent)) + 1
+        best, best_dist = -1, math.inf
+        for ring in range(max_ring + 1):
+            if ring * ring > 4 * self.remaining:
+                # the grid is mostly empty around here; scan what is left directly
+                return self._brute_force(point)
+            if best >= 0 and best_dist <= (ring - 1) * self.cell:
+                break
+            for key in self._ring(cx, cy, ring):
+                members = self.cells.get(key)
+                if not members:
+                    continue
+                alive = [k for k in members if not self.visited[k % self.count]]
+                if len(alive) != len(members):
+                    if alive:
+                        self.cells[key] = alive
+                    else:
+                        del self.cells[key]
+                        continue
+                deltas = self.points[alive] - point
+                dists = np.hypot(deltas[:, 0], deltas[:, 1])
+                local = int(np.argmin(dists))
+                if dists[local] < best_dist:
+                    best, best_dist = alive[local], float(dists[local])
+        return best if best >= 0 else self._brute_force(point)
+
+    def _brute_force(self, point: np.ndarray) -> int:
+        candidates = np.flatnonzero(~np.concatenate([self.visited, self.visited]))
+        deltas = self.points[candidates] - point
+        return int(candidates[int(np.argmin(np.hypot(deltas[:, 0], deltas[:, 1])))])
+
+    @staticmethod
+    def _ring(cx: int, cy: int, ring: int):
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+
+def _nearest_neighbour_tour(starts: np.ndarray, ends: np.ndarray, origin: np.ndarray) -> Tuple[List[int], List[bool]]:
+    grid = _EndpointGrid(starts, ends)
+    n = len(starts)
+    position = origin
+    order: List[int] = []
+    flips: List[bool] = []
+    for _ in range(n):
+        endpoint = grid.nearest(position)
+        path, flip = endpoint % n, endpoint >= n
+        grid.visit(path)
+        order.append(path)
+        flips.append(flip)
+        position = starts[path] if flip else ends[path]
+    return order, flips
+
+
+class _Tour:
+    """Cyclic tour whose node 0 is the fixed origin; node k > 0 is a path."""
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray, origin: np.ndarray, order: List[int], flips: List[bool]):
+        self.starts = starts
+        self.ends = ends
+        self.origin = origin
+        self.order = order
+        self.flips = flips
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        order = np.asarray(self.order, dtype=np.int64)
+        flips = np.asarray(self.flips, dtype=bool)[:, None]
+        self.entry = np.concatenate([self.origin[None, :], np.where(flips, self.ends[order], self.starts[order])])
+        self.exit = np.concatenate([self.origin[None, :], np.where(flips, self.starts[order], self.ends[order])])
+        self.refresh_edges()
+
+    def refresh_edges(self) -> None:
+        self.next_entry = np.roll(self.entry, -1, axis=0)
+        delta = self.exit - self.next_entry
+        self.edges = np.hypot(delta[:, 0], delta[:, 1])
+
+    @property
+    def length(self) -> float:
+        return float(self.edges.sum())
+
+    def two_opt_pass(self, deadline: float) -> bool:
+        """Reverse segments ``i..j`` where that shortens the tour."""
+        improved = False
+        size = len(self.entry)
+        for i in range(1, size):
+            if time.monotonic() > deadline:
+                break
+            prev_exit = self.exit[i - 1]
+            a = self.exit[i:] - prev_exit
+            b = self.next_entry[i:] - self.entry[i]
+            delta = np.hypot(a[:, 0], a[:, 1]) + np.hypot(b[:, 0], b[:, 1]) - self.edges[i - 1] - self.edges[i:]
+            j = int(np.argmin(delta))
+            if delta[j] >= -1e-9:
+                continue
+            j += i
+            self.entry[i : j + 1], self.exit[i : j + 1] = self.exit[i : j + 1][::-1].copy(), self.entry[i : j + 1][::-1].copy()
+            # tour node k is path order[k - 1]
+            self.order[i - 1 : j] = self.order[i - 1 : j][::-1]
+            self.flips[i - 1 : j] = [not flip for flip in self.flips[i - 1 : j][::-1]]
+            self.refresh_edges()
+            improved = True
+        return improved
+
+    def or_opt_pass(self, deadline: float, max_segment: int = 3) -> bool:
+        """Move short runs of paths (optionally reversed) to a cheaper slot."""
+        improved = False
+        size = len(self.entry)
+        for length in range(1, max_segment + 1):
+            i = 1
+            while i + length <= size:
+                if time.monotonic() > deadline:
+                    return improved
+                last = i + length - 1
+                after = (last + 1) % size
+                seg_in, seg_out = self.entry[i], self.exit[last]
+                bridge = self.exit[i - 1] - self.entry[after]
+                gain = self.edges[i - 1] + self.edges[last] - math.hypot(bridge[0], bridge[1])
+
+                to_in = self.exit - seg_in
+                out_to = self.next_entry - seg_out
+                to_out = self.exit - seg_out
+                in_to = self.next_entry - seg_in
+                forward = np.hypot(to_in[:, 0], to_in[:, 1]) + np.hypot(out_to[:, 0], out_to[:, 1]) - self.edges
+                backward = np.hypot(to_out[:, 0], to_out[:, 1]) + np.hypot(in_to[:, 0], in_to[:, 1]) - self.edges
+                cost = np.minimum(forward, backward)
+                cost[i - 1 : last + 1] = np.inf
+                slot = int(np.argmin(cost))
+                if cost[slot] - gain >= -1e-9:
+                    i += 1
+                    continue
+
+                reverse = backward[slot] < forward[slot]
+                moved = list(range(i - 1, last))  # positions in order/flips
+                segment = [(self.order[k], self.flips[k]) for k in moved]
+                if reverse:
+                    segment = [(path, not flip) for path, flip in reversed(segment)]
+                rest = [(self.order[k], self.flips[k]) for k in range(len(self.order)) if not (i - 1 <= k < last)]
+                # slot p means "after tour node p"; tour node p is order position p - 1
+                insert_at = slot if slot < i - 1 else slot - length
+                rest[insert_at:insert_at] = segment
+                self.order = [path for path, _ in rest]
+                self.flips = [flip for _, flip in rest]
+                self.rebuild()
+                improved = True
+        return improved
+
+
+def plan_path_order(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    *,
+    origin: Point = (0.0, 0.0),
+    time_budget: float = 1.0,
+) -> PathOrder:
+    """Choose a drawing order and direction for paths to minimise pen-up travel.
+
+    A nearest-neighbour tour over both endpoints of every path (served by a
+    uniform grid index) is refined with 2-opt segment reversals and Or-opt
+    moves of up to three paths until no move helps or *time_budget* seconds
+    have elapsed. The tour starts and ends at *origin*.
+    """
+    starts = np.asarray(starts, dtype=float).reshape(-1, 2)
+    ends = np.asarray(ends, dtype=float).reshape(-1, 2)
+    origin_arr = np.asarray(origin, dtype=float)
+    n = len(starts)
+    identity = _Tour(starts, ends, origin_arr, list(range(n)), [False] * n) if n else None
+    initial = identity.length if identity is not None else 0.0
+    if n < 2:
+        return PathOrder(order=list(range(n)), reversed=[False] * n, initial_travel=initial, travel=initial)
+
+    deadline = time.monotonic() + max(time_budget, 0.0)
+    order, flips = _nearest_neighbour_tour(starts, ends, origin_arr)
+    tour = _Tour(starts, ends, origin_arr, order, flips)
+    while time.monotonic() < deadline:
+        changed = tour.two_opt_pass(deadline)
+        changed = tour.or_opt_pass(deadline) or changed
+        if not changed:
+            break
+
+    if tour.length >= initial:
+        return PathOrder(order=list(range(n)), reversed=[False] * n, initial_travel=initial, travel=initial)
+    return PathOrder(order=tour.order, reversed=tour.flips, initial_travel=initial, travel=tour.length)
@@ -1,12 +1,41 @@
 from __future__ import annotations
 
 import logging
+import queue
+import re
+import threading
 import time
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Callable, Iterable, Optional
+from typing import Callable, Deque, Dict, Iterable, NamedTuple, Optional, Tuple, Union
 
 import serial
 
+from services.print_time import AckTimeModel, MachineProfile
+from services.stream_modes import (  # noqa: F401 - re-exported
+    DEFAULT_STREAM_MODE,
+    STREAM_MODE_CHAR_COUNT,
+    STREAM_MODE_NUMBERED,
+    STREAM_MODE_PING_PONG,
+    STREAM_MODES,
+)
+
+# GRBL's serial RX buffer is 128 bytes; keep one byte of headroom like the
+# reference stream.py does.
+GRBL_RX_BUFFER_SIZE = 127
+
+# GRBL real-time commands, acted on as soon as they arrive (never queued)
+REALTIME_STATUS = b"?"
+REALTIME_FEED_HOLD = b"!"
+REALTIME_SOFT_RESET = b"\x18"
+# how often a cancel polls the status report while waiting for the hold to finish
+_HOLD_POLL_INTERVAL = 0.02
+
+# make app-provided URL handlers (e.g. the grblsim:// emulator) available
+if "services.serial_handlers" not in serial.protocol_handler_packages:
+    serial.protocol_handler_packages.append("services.serial_handlers")
+
 # ----- Exceptions -----
 class PlotterError(RuntimeError):
     """Raised when plotter communication fails."""
@@ -14,66 +43,241 @@ class PlotterError(RuntimeError):
 
 # ----- Helper functions (from user-provided snippet, slightly adapted) -----
 def _open_serial(port: str, baudrate: int, timeout: float) -> serial.Serial:
-    """Open the serial port with the same settings used by the reference script."""
-    ser = serial.Serial()
-    ser.port = port
+    """Open the serial port with the same settings used by the reference script.
+
+    *port* may also be a pyserial URL such as ``loop://`` or ``grblsim://``.
+    """
+    ser = serial.serial_for_url(port, do_not_open=True)
     ser.baudrate = baudrate
     ser.timeout = timeout  # read timeout (seconds)
     ser.write_timeout = timeout
+    # flock the device on POSIX so a second process (e.g. another WSGI worker)
+    # fails to connect instead of interleaving with a running print
+    ser.exclusive = True
     ser.open()
     return ser
 
 
-def _wait_for_ack(ser: serial.Serial, ack: str, timeout: float) -> Optional[str]:
+class ControllerMessage(NamedTuple):
+    """A single line received from the controller, classified by kind."""
+
+    kind: str
+    text: str
+
+
+@dataclass
+class StreamStats:
+    """Serial traffic of one :meth:`PlotterController.send_gcode_lines` call."""
+
+    lines: int = 0  # lines acknowledged by the controller
+    bytes_written: int = 0  # resends included
+    writes: int = 0
+    flushes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def syscalls(self) -> int:
+        return self.writes + self.flushes
+
+    @property
+    def syscalls_per_second(self) -> float:
+        return self.syscalls / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def lines_per_second(self) -> float:
+        return self.lines / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "lines": self.lines,
+            "bytes_written": self.bytes_written,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "seconds": round(self.seconds, 3),
+            "syscalls_per_second": round(self.syscalls_per_second, 1),
+            "lines_per_second": round(self.lines_per_second, 1),
+        }
+
+
+# message kinds produced by SerialReader
+MSG_OK = "ok"
+MSG_ERROR = "error"
+MSG_ALARM = "alarm"
+MSG_STATUS = "status"
+MSG_INFO = "info"
+MSG_RESEND = "resend"
+MSG_OTHER = "other"
+# pseudo-messages used to wake up a waiting sender
+MSG_INTERRUPT = "interrupt"
+MSG_CLOSED = "closed"
+
+
+def classify_response(text: str) -> str:
+    """Return the message kind for a GRBL response line."""
+    lowered = text.lower()
+    if lowered.startswith(("resend", "rs ")):
+        return MSG_RESEND
+    if lowered.startswith("ok"):
+        return MSG_OK
+    if lowered.startswith("error"):
+        return MSG_ERROR
+    if lowered.startswith("alarm"):
+        return MSG_ALARM
+    if text.startswith("<"):
+        return MSG_STATUS
+    if text.startswith("[") or lowered.startswith("grbl"):
+        return MSG_INFO
+    return MSG_OTHER
+
+
+class SerialReader:
+    """Dedicated thread that blocks on the port and queues controller lines.
+
+    Incoming bytes are split into lines with a ``bytearray`` and pushed onto
+    :attr:`messages` as :class:`ControllerMessage` tuples. Unsolicited
+    ``ALARM`` and ``[MSG:...]`` lines are logged here so every stream mode
+    sees them the same way.
     """
-    Read from *ser* until a line containing *ack* is seen or *timeout*
+
+    def __init__(self, ser: serial.Serial):
+        self._serial = ser
+        self.messages: "queue.Queue[ControllerMessage]" = queue.Queue()
+        self.last_alarm: Optional[str] = None
+        self._buffer = bytearray()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="plotter-serial-reader", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the reader thread; unblocks a pending read where supported."""
+        self._stop.set()
+        cancel_read = getattr(self._serial, "cancel_read", None)
+        if cancel_read is not None:
+            try:
+                cancel_read()
+            except Exception:  # noqa: BLE001
+                logging.debug("Serial cancel_read failed", exc_info=True)
+        if threading.current_thread() is not self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def interrupt(self) -> None:
+        """Wake up any sender blocked in :meth:`get`."""
+        self.messages.put(ControllerMessage(MSG_INTERRUPT, ""))
+
+    def get(self, deadline: float) -> Optional[ControllerMessage]:
+        """Return the next message or ``None`` once the monotonic *deadline* passes."""
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            try:
+                return self.messages.get_nowait()
+            except queue.Empty:
+                return None
+        try:
+            return self.messages.get(timeout=remaining)
+        except queue.Empty:
+            return None
+
+    def clear(self) -> None:
+        """Discard any queued messages."""
+        while True:
+            try:
+                self.messages.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                # blocks for up to the port's read timeout when nothing is waiting
+                chunk = self._serial.read(self._serial.in_waiting or 1)
+            except Exception as exc:  # noqa: BLE001
+                if not self._stop.is_set():
+                    logging.warning("Serial read failed: %s", exc)
+                    self.messages.put(ControllerMessage(MSG_CLOSED, str(exc)))
+                return
+            if not chunk:
+                continue
+            self._buffer.extend(chunk)
+            while True:
+                newline = self._buffer.find(b"\n")
+                if newline < 0:
+                    break
+                raw = bytes(self._buffer[:newline])
+                del self._buffer[: newline + 1]
+                text = raw.decode(errors="replace").strip()
+                if text:
+                    self._dispatch(text)
+
+    def _dispatch(self, text: str) -> None:
+        kind = classify_response(text)
+        if kind == MSG_ALARM:
+            self.last_alarm = text
+            logging.error("Controller alarm: %s", text)
+        elif kind == MSG_INFO:
+            logging.info("Controller message: %s", text)
+        else:
+            logging.debug("RX: %s", text)
+        self.messages.put(ControllerMessage(kind, text))
+
+
+def _wait_for_ack(reader: SerialReader, ack: str, timeout: float) -> Optional[str]:
+    """
+    Wait on *reader* until a line containing *ack* is seen or *timeout*
     seconds have elapsed. Matching is case-insensitive and whitespace-trimmed.
-    Returns the matching line (stripped) or ``None`` on timeout.
+    Returns the matching line (stripped) or ``None`` on timeout or interrupt.
     """
-    deadline = time.time() + timeout
-    buffer = b""
+    deadline = time.monotonic() + timeout
     ack_lc = ack.strip().lower()
 
-    while time.time() < deadline:
-        # read whatever is already waiting; fall back to a single byte poll
-        try:
-            chunk = ser.read(ser.in_waiting or 1)
-        except Exception as exc:  # pragma: no cover – very unlikely
-            logging.debug("Serial read error: %s", exc)
+    while True:
+        message = reader.get(deadline)
+        if message is None or message.kind in (MSG_INTERRUPT, MSG_CLOSED):
             return None
+        if ack_lc in message.text.lower():
+            return message.text
 
-        if not chunk:
-            # nothing received – give the CPU a breather
-            time.sleep(0.01)
-            continue
 
-        buffer += chunk
-        while b"\n" in buffer:
-            line, buffer = buffer.split(b"\n", 1)
-            try:
-                txt = line.decode(errors="replace").strip()
-            except Exception:  # pragma: no cover
-                txt = repr(line)
+_RESEND_NUMBER_PATTERN = re.compile(r"(\d+)")
+# GRBL answers a bad line with "error:N" instead of "ok"; Marlin sends "Error:..." before its "ok"
+_GRBL_ERROR_PATTERN = re.compile(r"^error:\d+$", re.IGNORECASE)
+
+
+def line_checksum(payload: bytes) -> int:
+    """Return the Marlin/RepRap checksum of *payload*: the XOR of all its bytes."""
+    checksum = 0
+    for byte in payload:
+        checksum ^= byte
+    return checksum
 
-            logging.debug("RX: %s", txt)
-            if ack_lc in txt.lower():
-                return txt
 
-    # timeout
-    return None
+def numbered_line(number: int, command: str) -> bytes:
+    """Return *command* framed as ``N<number> <command>*<checksum>`` with a newline."""
+    payload = f"N{number} {command}".encode("utf-8")
+    return payload + b"*%d\n" % line_checksum(payload)
+
+
+def _line_text(encoded: bytes) -> str:
+    return encoded.decode("utf-8", "replace").rstrip("\r\n")
 
 
 def _send_line_and_wait(
     ser: serial.Serial,
+    reader: SerialReader,
     line: str,
     ack: str,
     timeout: float,
     retries: int,
     send_delay: float = 0.0,
+    should_abort: Optional[Callable[[], bool]] = None,
+    write_lock: Optional[threading.Lock] = None,
+    stats: Optional[StreamStats] = None,
 ) -> bool:
     """
-    Send *line* (ensuring a trailing newline) and wait for *ack*.
+    Send *line* (ensuring a trailing newline) and wait for *ack* from *reader*.
     Retries up to *retries* times. Returns ``True`` on success, ``False`` otherwise.
+    Writes and flushes are counted in *stats* when given.
     """
     # Guarantee a line-terminator – the printer expects “\n”.
     encoded = line.encode("utf-8")
@@ -87,23 +291,33 @@ def _send_line_and_wait(
             "Sending (attempt %d/%d): %s", attempt, retries + 1, line.rstrip("\r\n")
         )
         try:
-            ser.write(encoded)
-            ser.flush()
+            if write_lock is not None:
+                with write_lock:
+                    ser.write(encoded)
+                    ser.flush()
+            else:
+                ser.write(encoded)
+                ser.flush()
         except Exception as exc:  # pragma: no cover – serial write failure is fatal
             logging.error("Failed to write to serial port: %s", exc)
             return False
+        if stats is not None:
+            stats.writes += 1
+            stats.flushes += 1
+            stats.bytes_written += len(encoded)
 
         if send_delay:
             time.sleep(send_delay)
 
-        resp = _wait_for_ack(ser, ack, timeout)
+        resp = _wait_for_ack(reader, ack, timeout)
         if resp is not None:
             logging.info("ACK received: %s", resp)
             return True
-        else:
-            logging.warning(
-                "No ACK within %.1f s (attempt %d/%d).", timeout, attempt, retries + 1
-            )
+        if should_abort is not None and should_abort():
+            return False
+        logging.warning(
+            "No ACK within %.1f s (attempt %d/%d).", timeout, attempt, retries + 1
+        )
 
     logging.error(
         "Exceeded %d retries without ACK for line: %s", retries, line.rstrip("\r\n")
@@ -125,6 +339,13 @@ class PlotterController:
         line_delay: float = 0.0,
         send_retries: int = 2,
         ack: str = "ok",
+        stream_mode: str = STREAM_MODE_PING_PONG,
+        rx_buffer_size: int = GRBL_RX_BUFFER_SIZE,
+        realtime_cancel: bool = True,
+        hold_timeout: float = 1.0,
+        machine: Optional[MachineProfile] = None,
+        ack_timeout_min: Optional[float] = None,
+        ack_timeout_factor: float = 1.5,
     ):
         """
         Parameters
@@ -132,10 +353,30 @@ class PlotterController:
         port, baudrate: as before
         timeout: read/write timeout passed to serial and ack wait (seconds)
         startup_delay: seconds to wait after opening port for device to settle
-        line_delay: delay between lines (passed as send_delay to _send_line_and_wait)
+        line_delay: delay between lines (passed as send_delay to _send_line_and_wait);
+            only used by the ping-pong stream mode
         send_retries: number of retries for each line (0 means one attempt)
         ack: substring to match as acknowledgement (default 'ok')
+        stream_mode: ``"ping-pong"`` waits for each ack before sending the next
+            line; ``"char-count"`` keeps the controller RX buffer full;
+            ``"numbered"`` sends Marlin-style line-numbered, checksummed lines
+            that are only resent when the firmware asks (or provably safe)
+        rx_buffer_size: controller RX buffer size (bytes) used by char-count mode
+        realtime_cancel: on cancel, send GRBL's feed hold (``!``) at once and a
+            soft reset (``0x18``) once motion has stopped, instead of only
+            stopping between lines
+        hold_timeout: seconds to wait for the feed hold to stop motion before
+            resetting anyway
+        machine: kinematics used to predict how long each line's ack may take
+        ack_timeout_min: when set, each streamed line waits for its ack
+            ``ack_timeout_min + ack_timeout_factor * predicted seconds``
+            instead of the fixed *timeout* (see :class:`AckTimeModel`)
+        ack_timeout_factor: safety factor applied to the predicted wait
         """
+        stream_mode = (stream_mode or STREAM_MODE_PING_PONG).strip().lower()
+        if stream_mode not in STREAM_MODES:
+            raise ValueError(f"Unknown stream mode '{stream_mode}'; expected one of {STREAM_MODES}.")
+
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
@@ -143,9 +384,26 @@ class PlotterController:
         self.line_delay = line_delay
         self.send_retries = send_retries
         self.ack = ack
+        self.stream_mode = stream_mode
+        self.rx_buffer_size = max(1, int(rx_buffer_size))
+        self.realtime_cancel = realtime_cancel
+        self.hold_timeout = hold_timeout
+        self.machine = machine or MachineProfile()
+        self.ack_timeout_min = ack_timeout_min
+        self.ack_timeout_factor = ack_timeout_factor
+        # seconds from request_cancel() until the controller reported motion stopped
+        self.last_cancel_latency: Optional[float] = None
+        # lines written again during the last numbered stream
+        self.last_resends = 0
+        # serial telemetry of the last send_gcode_lines call
+        self.last_stream_stats = StreamStats()
 
         self._serial: Optional[serial.Serial] = None
+        self._reader: Optional[SerialReader] = None
         self._cancel_requested = False
+        self._cancel_requested_at: Optional[float] = None
+        # lines and real-time bytes come from different threads
+        self._write_lock = threading.Lock()
 
     # --- connection lifecycle ---
     def connect(self) -> None:
@@ -169,9 +427,14 @@ class PlotterController:
             logging.debug("Serial reset buffer not available or failed", exc_info=True)
 
         self._flush_startup()
+        self._reader = SerialReader(self._serial)
+        self._reader.start()
 
     def disconnect(self) -> None:
         """Close the serial connection."""
+        if self._reader:
+            self._reader.stop()
+            self._reader = None
         if self._serial:
             try:
                 self._serial.close()
@@ -192,14 +455,87 @@ class PlotterController:
         self.connect()
 
     def request_cancel(self) -> None:
-        """Signal that the current streaming operation should stop."""
+        """Signal that the current streaming operation should stop.
+
+        With ``realtime_cancel`` the feed hold is written immediately, ahead
+        of anything still queued, so the pen stops within one deceleration
+        instead of after every buffered line; the streaming thread then
+        finishes the stop in :meth:`_stop_after_hold`.
+        """
         self._cancel_requested = True
+        if self.realtime_cancel and self._serial is not None:
+            self._cancel_requested_at = time.monotonic()
+            try:
+                self._write_realtime(REALTIME_FEED_HOLD)
+            except Exception:  # noqa: BLE001
+                logging.warning("Failed to send feed hold", exc_info=True)
+        if self._reader is not None:
+            self._reader.interrupt()
+
+    def _ack_timeout(self, expected_seconds: float) -> float:
+        """Return how long to wait for an ack predicted to take *expected_seconds*."""
+        if self.ack_timeout_min is None:
+            return self.timeout
+        return self.ack_timeout_min + self.ack_timeout_factor * expected_seconds
+
+    def _write_realtime(self, command: bytes) -> None:
+        assert self._serial is not None
+        with self._write_lock:
+            self._serial.write(command)
+            self._serial.flush()
+
+    def _cancelled(self) -> PlotterError:
+        """Complete a cancel and return the error that ends the stream."""
+        self._stop_after_hold()
+        return PlotterError("Transmission cancelled by user.")
+
+    def _stop_after_hold(self) -> None:
+        """Wait for the feed hold to bring motion to rest, then soft-reset.
+
+        Resetting only once GRBL reports ``Hold:0`` (or ``Idle``) keeps its
+        position, so no homing cycle is needed afterwards; the reset flushes
+        the planner and RX buffer and turns the spindle (pen) off.
+        """
+        requested_at = self._cancel_requested_at
+        self._cancel_requested_at = None
+        if requested_at is None or self._serial is None or self._reader is None:
+            return
+
+        stopped = False
+        deadline = requested_at + self.hold_timeout
+        while not stopped and time.monotonic() < deadline:
+            self._write_realtime(REALTIME_STATUS)
+            poll_until = min(deadline, time.monotonic() + _HOLD_POLL_INTERVAL)
+            while True:
+                message = self._reader.get(poll_until)
+                if message is None:
+                    break
+                if message.kind == MSG_STATUS and message.text.startswith(("<Hold:0", "<Idle", "<Alarm")):
+                    stopped = True
+                    break
+        if stopped:
+            self.last_cancel_latency = time.monotonic() - requested_at
+            logging.info("Feed hold stopped motion %.1f ms after cancel", self.last_cancel_latency * 1000)
+        else:
+            logging.warning("No stopped status within %.1f s of feed hold; resetting anyway", self.hold_timeout)
+
+        self._write_realtime(REALTIME_SOFT_RESET)
+        if stopped:
+            # wait for the reset banner so stale acks do not leak into the next command
+            banner_deadline = time.monotonic() + self.hold_timeout
+            while True:
+                message = self._reader.get(banner_deadline)
+                if message is None or (message.kind == MSG_INFO and message.text.lower().startswith("grbl")):
+                    break
+        self._reader.clear()
 
     def rehome(self) -> None:
         """Raise the pen and return the carriage to origin."""
         self._ensure_connection()
-        assert self._serial is not None
+        assert self._serial is not None and self._reader is not None
+        self._stop_after_hold()
         self._cancel_requested = False
+        self._reader.clear()
         commands = (
             "M5 ; pen up",
             "G0 X0.00 Y0.00 ; return to origin",
@@ -209,6 +545,7 @@ class PlotterController:
             logging.info("REHOME CMD %d: %s", idx, line.rstrip("\r\n"))
             ok = _send_line_and_wait(
                 ser=self._serial,
+                reader=self._reader,
                 line=line,
                 ack=self.ack,
                 timeout=self.timeout,
@@ -219,47 +556,320 @@ class PlotterController:
                 raise PlotterError("Failed to rehome plotter.")
 
     def _ensure_connection(self) -> None:
-        if not self._serial or not self._serial.is_open:
+        if not self._serial or not self._serial.is_open or self._reader is None:
             raise PlotterError("Serial connection is not open.")
 
     # --- sending G-code ---
     def send_gcode_lines(
         self,
-        lines: Iterable[str],
+        lines: Iterable[Union[str, bytes]],
         *,
         progress_callback: Optional[Callable[[int], None]] = None,
     ) -> None:
-        """Send G-code lines to the plotter, using _send_line_and_wait for ACK handling."""
+        """Send G-code lines to the plotter using the configured stream mode.
+
+        ``bytes`` items are taken as already-encoded wire lines and written as is.
+        """
         self._ensure_connection()
         self._cancel_requested = False
-        assert self._serial is not None  # for type checkers
+        self._cancel_requested_at = None
+        self.last_cancel_latency = None
+        self.last_stream_stats = StreamStats()
+        assert self._serial is not None and self._reader is not None  # for type checkers
+        # drop stale acks/status lines left over from a previous command
+        self._reader.clear()
+
+        started = time.monotonic()
+        try:
+            if self.stream_mode == STREAM_MODE_CHAR_COUNT:
+                self._stream_char_count(lines, progress_callback=progress_callback)
+            elif self.stream_mode == STREAM_MODE_NUMBERED:
+                self._stream_numbered(lines, progress_callback=progress_callback)
+            else:
+                self._stream_ping_pong(lines, progress_callback=progress_callback)
+        finally:
+            stats = self.last_stream_stats
+            stats.seconds = time.monotonic() - started
+            logging.info(
+                "Streamed %d lines in %.2f s: %.1f lines/s, %d writes, %.1f syscalls/s",
+                stats.lines,
+                stats.seconds,
+                stats.lines_per_second,
+                stats.writes,
+                stats.syscalls_per_second,
+            )
+        # a cancel that raced the last acknowledgement still left GRBL in feed hold
+        self._stop_after_hold()
+
+    def _stream_ping_pong(
+        self,
+        lines: Iterable[Union[str, bytes]],
+        *,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """Send one line at a time, waiting for its ACK before the next."""
+        assert self._serial is not None and self._reader is not None
+        ack_times = AckTimeModel(self.machine) if self.ack_timeout_min is not None else None
 
         for idx, raw_line in enumerate(lines, start=1):
+            if isinstance(raw_line, bytes):
+                raw_line = raw_line.decode("utf-8")
             # mirror behaviour of reference: strip CR/LF then re-append single LF
             line = raw_line.rstrip("\r\n") + "\n"
             if not line.strip():
                 continue  # skip blank lines
 
             if self._cancel_requested:
-                raise PlotterError("Transmission cancelled by user.")
+                raise self._cancelled()
 
             logging.info("SEND: %s", line.rstrip("\r\n"))
             ok = _send_line_and_wait(
                 ser=self._serial,
+                reader=self._reader,
                 line=line,
                 ack=self.ack,
-                timeout=self.timeout,
+                timeout=self._ack_timeout(ack_times.expected_ack_seconds(line) if ack_times is not None else 0.0),
                 retries=self.send_retries,
                 send_delay=self.line_delay,
+                should_abort=lambda: self._cancel_requested,
+                write_lock=self._write_lock,
+                stats=self.last_stream_stats,
             )
             if not ok:
+                if self._cancel_requested:
+                    raise self._cancelled()
                 # add context about which line failed
                 raise PlotterError(f"Failed to transmit line (line {idx}): {line.rstrip()}")
-            if progress_callback:
-                try:
-                    progress_callback(idx)
-                except Exception:
-                    logging.debug("Progress callback failed", exc_info=True)
+            self._report_progress(progress_callback, idx)
+
+    def _stream_char_count(
+        self,
+        lines: Iterable[Union[str, bytes]],
+        *,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """Stream lines while keeping the controller RX buffer as full as possible.
+
+        Every unacknowledged line is tracked with its byte length. A new line
+        is only written once the sum of in-flight bytes plus the new line fits
+        in ``rx_buffer_size``. Responses are matched to lines in FIFO order:
+        GRBL answers every line with exactly one ``ok`` or ``error:N``.
+        Lines are written in windows: every line that fits in the free buffer
+        space goes out in one ``write`` call (no flush; the acks pace the
+        stream), and acks that have already arrived are consumed before the
+        next window is sized.
+        Lines are never retried in this mode because a resend could execute a
+        motion twice.
+        """
+        assert self._serial is not None and self._reader is not None
+        # (line number, bytes, line, predicted seconds between its arrival and its ack)
+        in_flight: Deque[Tuple[int, int, bytes, float]] = deque()
+        ack_times = AckTimeModel(self.machine) if self.ack_timeout_min is not None else None
+        stats = self.last_stream_stats
+        buffered = 0
+        # lines accepted into the buffer budget but not yet written
+        window = bytearray()
+        # (line number, monotonic deadline) for the oldest unacknowledged line; fixed
+        # once set, so status reports and other chatter cannot postpone a timeout
+        head_deadline: Optional[Tuple[int, float]] = None
+
+        def _write_window() -> None:
+            assert self._serial is not None
+            try:
+                with self._write_lock:
+                    self._serial.write(window)
+            except Exception as exc:  # pragma: no cover – serial write failure is fatal
+                raise PlotterError(f"Failed to write to serial port (line {in_flight[-1][0]}): {exc}") from exc
+            stats.writes += 1
+            stats.bytes_written += len(window)
+            window.clear()
+
+        def _await_one_response(timeout: Optional[float] = None) -> bool:
+            """Consume one response; with *timeout*, return ``False`` if none arrived in time."""
+            nonlocal buffered, head_deadline
+            assert self._reader is not None
+            idx, length, sent, expected = in_flight[0]
+            wait = self._ack_timeout(expected)
+            if timeout is not None:
+                deadline = time.monotonic() + timeout
+            else:
+                if head_deadline is None or head_deadline[0] != idx:
+                    head_deadline = (idx, time.monotonic() + wait)
+                deadline = head_deadline[1]
+            message = self._reader.get(deadline)
+            if message is None:
+                if timeout is not None:
+                    return False
+                raise PlotterError(
+                    f"No response within {wait:.1f} s (line {idx}): {_line_text(sent)}"
+                )
+            if message.kind == MSG_INTERRUPT:
+                if self._cancel_requested:
+                    raise self._cancelled()
+                return True
+            if message.kind == MSG_CLOSED:
+                raise PlotterError(f"Serial link lost while streaming line {idx}: {message.text}")
+            if message.kind == MSG_OK or self.ack.strip().lower() in message.text.lower():
+                in_flight.popleft()
+                buffered -= length
+                self._report_progress(progress_callback, idx)
+            elif message.kind == MSG_ERROR:
+                in_flight.popleft()
+                buffered -= length
+                raise PlotterError(f"Controller rejected line {idx} ({message.text}): {_line_text(sent)}")
+            elif message.kind == MSG_ALARM:
+                raise PlotterError(f"Controller alarm while streaming line {idx}: {message.text}")
+            # banners, [MSG:...] and status reports do not consume a buffer slot
+            return True
+
+        log_sends = logging.getLogger().isEnabledFor(logging.INFO)
+        for idx, raw_line in enumerate(lines, start=1):
+            if isinstance(raw_line, bytes):
+                # pre-encoded wire line (see services.gcode_compiled); no string work
+                if not raw_line.strip():
+                    continue
+                encoded = raw_line if raw_line.endswith(b"\n") else raw_line + b"\n"
+            else:
+                stripped = raw_line.rstrip("\r\n")
+                if not stripped.strip():
+                    continue
+                encoded = (stripped + "\n").encode("utf-8")
+
+            if self._cancel_requested:
+                raise self._cancelled()
+
+            # a line longer than the buffer is sent on its own once it drains
+            while in_flight and buffered + len(encoded) > self.rx_buffer_size:
+                if window:
+                    _write_window()
+                _await_one_response()
+                # acks that are already here free more room for the next window
+                while in_flight and _await_one_response(0.0):
+                    pass
+                if self._cancel_requested:
+                    raise self._cancelled()
+
+            if log_sends:
+                logging.info("SEND: %s", _line_text(encoded))
+            window += encoded
+            expected = ack_times.expected_ack_seconds(_line_text(encoded)) if ack_times is not None else 0.0
+            in_flight.append((idx, len(encoded), encoded, expected))
+            buffered += len(encoded)
+
+        if window:
+            _write_window()
+        while in_flight:
+            _await_one_response()
+
+    def _stream_numbered(
+        self,
+        lines: Iterable[Union[str, bytes]],
+        *,
+        progress_callback: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """Send line-numbered, checksummed lines, waiting for each ack.
+
+        The firmware's line counter is reset with ``M110`` first. A corrupted
+        line fails its checksum and is written again when the firmware asks
+        with ``Resend:``. A line whose ack times out is written again with
+        the same number: if the first copy did arrive, the firmware rejects
+        the duplicate and asks for the next number instead, so a lost ack can
+        never run a motion twice.
+        """
+        assert self._serial is not None and self._reader is not None
+        ack_times = AckTimeModel(self.machine) if self.ack_timeout_min is not None else None
+        self.last_resends = 0
+        self._send_numbered(0, "M110 N0", self.timeout)
+
+        number = 0
+        for idx, raw_line in enumerate(lines, start=1):
+            if isinstance(raw_line, bytes):
+                raw_line = raw_line.decode("utf-8")
+            # the firmware drops comments before checking the checksum, so never send them
+            command = raw_line.split(";", 1)[0].strip()
+            if not command:
+                continue
+
+            if self._cancel_requested:
+                raise self._cancelled()
+
+            number += 1
+            expected = ack_times.expected_ack_seconds(command) if ack_times is not None else 0.0
+            self._send_numbered(number, command, self._ack_timeout(expected))
+            self._report_progress(progress_callback, idx)
+
+    def _send_numbered(self, number: int, command: str, timeout: float) -> None:
+        """Write line *number* until the firmware has accepted it."""
+        assert self._serial is not None
+        encoded = numbered_line(number, command)
+        for attempt in range(1, self.send_retries + 2):
+            logging.info("SEND: %s", _line_text(encoded))
+            try:
+                with self._write_lock:
+                    self._serial.write(encoded)
+                    self._serial.flush()
+            except Exception as exc:  # pragma: no cover – serial write failure is fatal
+                raise PlotterError(f"Failed to write to serial port (line {number}): {exc}") from exc
+            self.last_stream_stats.writes += 1
+            self.last_stream_stats.flushes += 1
+            self.last_stream_stats.bytes_written += len(encoded)
+
+            wanted = self._await_numbered_ack(number, timeout)
+            if wanted == number + 1:
+                return
+            if wanted != number:
+                raise PlotterError(
+                    f"Controller asked for line {wanted} while sending line {number}: {command}"
+                )
+            self.last_resends += 1
+            logging.warning("Resending line %d (attempt %d/%d)", number, attempt + 1, self.send_retries + 1)
+        raise PlotterError(f"Line {number} not accepted after {self.send_retries + 1} attempts: {command}")
+
+    def _await_numbered_ack(self, number: int, timeout: float) -> int:
+        """Return the line number the firmware expects after line *number* was written."""
+        deadline = time.monotonic() + timeout
+        wanted: Optional[int] = None
+        error: Optional[str] = None
+        while True:
+            message = self._read_response(max(0.0, deadline - time.monotonic()))
+            if message is None:
+                if wanted is None:
+                    logging.warning("No ACK within %.1f s for line %d", timeout, number)
+                    # safe to resend: a duplicate of an accepted line is rejected by number
+                    return number
+                return wanted  # the "ok" that follows "Resend:" was lost
+            if message.kind == MSG_INTERRUPT:
+                if self._cancel_requested:
+                    raise self._cancelled()
+                continue
+            if message.kind == MSG_CLOSED:
+                raise PlotterError(f"Serial link lost while streaming line {number}: {message.text}")
+            if message.kind == MSG_ALARM:
+                raise PlotterError(f"Controller alarm while streaming line {number}: {message.text}")
+            if message.kind == MSG_RESEND:
+                match = _RESEND_NUMBER_PATTERN.search(message.text)
+                if match is None:
+                    raise PlotterError(f"Unreadable resend request: {message.text}")
+                wanted = int(match.group(1))
+            elif message.kind == MSG_ERROR:
+                if _GRBL_ERROR_PATTERN.match(message.text):
+                    raise PlotterError(f"Controller rejected line {number} ({message.text})")
+                error = message.text
+                logging.warning("Controller error on line %d: %s", number, error)
+            elif message.kind == MSG_OK or self.ack.strip().lower() in message.text.lower():
+                if wanted is not None:
+                    return wanted
+                if error is not None:
+                    raise PlotterError(f"Controller rejected line {number} ({error})")
+                return number + 1
+
+    def _report_progress(self, progress_callback: Optional[Callable[[int], None]], idx: int) -> None:
+        self.last_stream_stats.lines += 1
+        if progress_callback:
+            try:
+                progress_callback(idx)
+            except Exception:
+                logging.debug("Progress callback failed", exc_info=True)
 
     def send_gcode_file(
         self,
@@ -275,13 +885,18 @@ class PlotterController:
             self.send_gcode_lines(fp, progress_callback=progress_callback)
 
     # --- low-level helpers ---
+    def _read_response(self, timeout: float) -> Optional[ControllerMessage]:
+        """Return the next controller message or ``None`` after *timeout* seconds."""
+        assert self._reader is not None
+        return self._reader.get(time.monotonic() + timeout)
+
     def _flush_startup(self) -> None:
         """Drain any startup banner lines (non-blocking)."""
         assert self._serial is not None
-        start = time.time()
+        start = time.monotonic()
         # keep reading while there's data and we haven't exceeded startup_delay
         try:
-            while time.time() - start < self.startup_delay:
+            while time.monotonic() - start < self.startup_delay:
                 if not getattr(self._serial, "in_waiting", 0):
                     break
                 _ = self._serial.readline()
@@ -0,0 +1,209 @@
+"""Long-lived plotter service that owns the serial port across requests.
+
+The service is a per-process singleton. The port is opened exclusively, so
+run a single worker process: the service in any other process fails to
+connect rather than sharing the plotter.
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar, Union
+
+from config import Config
+from services.plotter import DEFAULT_STREAM_MODE, PlotterController, PlotterError
+from services.print_time import machine_profile_from_config
+
+T = TypeVar("T")
+
+ControllerFactory = Callable[..., PlotterController]
+
+
+@dataclass
+class _Command:
+    fn: Callable[[PlotterController], Any]
+    future: Future
+
+
+def _config_value(config: Union[Config, Dict[str, Any]], name: str, default: Any) -> Any:
+    if isinstance(config, dict):
+        return config.get(name, default)
+    return getattr(config, name, default)
+
+
+def _config_flag(config: Union[Config, Dict[str, Any]], name: str, default: bool) -> bool:
+    value = _config_value(config, name, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+def controller_settings(config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the ``PlotterController`` keyword arguments described by *config*."""
+    ack_timeout_min = float(_config_value(config, "PLOTTER_ACK_TIMEOUT_MIN", 2.0))
+    return {
+        "port": _config_value(config, "SERIAL_PORT", None),
+        "baudrate": int(_config_value(config, "SERIAL_BAUDRATE", 115200)),
+        "timeout": float(_config_value(config, "SERIAL_TIMEOUT", 10.0)),
+        "line_delay": float(_config_value(config, "PLOTTER_LINE_DELAY", 0.0)),
+        "stream_mode": str(_config_value(config, "PLOTTER_STREAM_MODE", DEFAULT_STREAM_MODE)),
+        "rx_buffer_size": int(_config_value(config, "PLOTTER_RX_BUFFER_SIZE", 127)),
+        "realtime_cancel": _config_flag(config, "PLOTTER_REALTIME_CANCEL", True),
+        "hold_timeout": float(_config_value(config, "PLOTTER_CANCEL_HOLD_TIMEOUT", 1.0)),
+        "machine": machine_profile_from_config(config),
+        # a non-positive minimum keeps the fixed SERIAL_TIMEOUT for every line
+        "ack_timeout_min": ack_timeout_min if ack_timeout_min > 0 else None,
+        "ack_timeout_factor": float(_config_value(config, "PLOTTER_ACK_TIMEOUT_FACTOR", 1.5)),
+    }
+
+
+class PlotterService:
+    """Serialize all plotter work through one thread that keeps the port open.
+
+    Work is submitted as callables that receive the connected
+    :class:`PlotterController`. The serial port is opened on the first command
+    and then kept warm, so later commands skip the reconnect, banner flush and
+    Arduino DTR reset. A command that fails with :class:`PlotterError` drops
+    the connection; the next command reconnects.
+    """
+
+    def __init__(self, controller_factory: Callable[[], PlotterController], *, name: str = "plotter-service"):
+        self._factory = controller_factory
+        self._commands: "queue.Queue[Optional[_Command]]" = queue.Queue()
+        self._controller: Optional[PlotterController] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._started = False
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def controller(self) -> Optional[PlotterController]:
+        """Return the controller owned by the service, if one was created."""
+        return self._controller
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._started:
+                self._started = True
+                self._thread.start()
+
+    def submit(self, fn: Callable[[PlotterController], T]) -> "Future[T]":
+        """Queue *fn* for execution on the plotter thread and return its future."""
+        if self._stopped:
+            raise PlotterError("Plotter service has been shut down.")
+        self.start()
+        future: Future = Future()
+        self._commands.put(_Command(fn=fn, future=future))
+        return future
+
+    def run(self, fn: Callable[[PlotterController], T], timeout: Optional[float] = None) -> T:
+        """Execute *fn* on the plotter thread and wait for its result."""
+        return self.submit(fn).result(timeout=timeout)
+
+    def request_cancel(self) -> None:
+        """Ask the command currently streaming to stop; bypasses the command queue."""
+        controller = self._controller
+        if controller is not None:
+            controller.request_cancel()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop accepting work, finish queued commands and close the port."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            started = self._started
+        if not started:
+            return
+        self._commands.put(None)
+        if wait and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _ensure_controller(self) -> PlotterController:
+        if self._controller is None:
+            self._controller = self._factory()
+        self._controller.connect()
+        return self._controller
+
+    def _drop_connection(self) -> None:
+        if self._controller is None:
+            return
+        try:
+            self._controller.disconnect()
+        except Exception:  # noqa: BLE001
+            logging.debug("Error while dropping plotter connection", exc_info=True)
+
+    def _run(self) -> None:
+        while True:
+            command = self._commands.get()
+            if command is None:
+                break
+            if not command.future.set_running_or_notify_cancel():
+                continue
+            try:
+                controller = self._ensure_controller()
+                result = command.fn(controller)
+            except BaseException as exc:  # noqa: BLE001
+                if isinstance(exc, PlotterError):
+                    logging.warning("Plotter command failed; dropping connection: %s", exc)
+                    self._drop_connection()
+                command.future.set_exception(exc)
+            else:
+                command.future.set_result(result)
+        self._drop_connection()
+
+
+_services_lock = threading.Lock()
+# Held while a service is replaced, so the old one releases the port first.
+_creation_lock = threading.Lock()
+_service: Optional[PlotterService] = None
+_service_key: Optional[Tuple[Any, ...]] = None
+
+
+def get_plotter_service(
+    config: Union[Config, Dict[str, Any]],
+    *,
+    controller_factory: ControllerFactory = PlotterController,
+) -> PlotterService:
+    """Return the process-wide plotter service for *config*.
+
+    The service is rebuilt when the serial settings or controller factory
+    change; the old service drains its queued work and closes the port
+    before the new one is handed out.
+    """
+    global _service, _service_key
+
+    settings = controller_settings(config)
+    key = (controller_factory, *sorted(settings.items()))
+    with _services_lock:
+        if _service is not None and _service_key == key:
+            return _service
+    with _creation_lock:
+        with _services_lock:
+            if _service is not None and _service_key == key:
+                return _service
+            previous, _service, _service_key = _service, None, None
+        if previous is not None:
+            previous.shutdown()
+        service = PlotterService(lambda: controller_factory(**settings))
+        with _services_lock:
+            _service, _service_key = service, key
+        return service
+
+
+def shutdown_plotter_service() -> None:
+    """Close the shared plotter service, if any."""
+    global _service, _service_key
+
+    with _services_lock:
+        service, _service, _service_key = _service, None, None
+    if service is not None:
+        service.shutdown()
+
+
+atexit.register(shutdown_plotter_service)
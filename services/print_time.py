@@ -0,0 +1,362 @@
+"""Kinematic print-time simulation for emitted G-code programs."""
+
+from __future__ import annotations
+
+import math
+import re
+from dataclasses import dataclass, field
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Union
+
+from config import Config
+from services.stream_modes import DEFAULT_STREAM_MODE, STREAM_MODE_PING_PONG
+
+_WORD_PATTERN = re.compile(r"([A-Za-z])\s*([-+]?(?:\d+\.?\d*|\.\d+))")
+_COMMENT_PATTERN = re.compile(r"\([^)]*\)|;.*$")
+
+# GRBL treats junctions sharper than this as a full stop
+_MIN_JUNCTION_COS = -0.999999
+_STRAIGHT_JUNCTION_COS = 0.999999
+
+
+@dataclass
+class MachineProfile:
+    """Motion limits of the plotter, mirroring the relevant GRBL settings."""
+
+    max_rate: float = 5000.0  # mm/min ($110/$111); G0 runs at this rate
+    acceleration: float = 500.0  # mm/s^2 ($120/$121)
+    junction_deviation: float = 0.01  # mm ($11)
+    planner_blocks: int = 15  # lookahead depth
+    line_delay: float = 0.0  # extra host-side seconds per streamed line
+
+
+@dataclass
+class PrintTimeEstimate:
+    """Result of :func:`simulate_gcode`."""
+
+    total_seconds: float
+    motion_seconds: float
+    dwell_seconds: float
+    stream_wait_seconds: float
+    path_seconds: List[float] = field(default_factory=list)
+    line_count: int = 0
+
+
+@dataclass
+class _Move:
+    length: float
+    nominal: float  # mm/s
+    unit: tuple
+    path_index: int
+    line_index: int
+    max_entry: float = 0.0
+    entry: float = 0.0
+    exit: float = 0.0
+
+
+def _config_value(config: Union[Config, Dict[str, Any]], name: str, default: Any) -> Any:
+    if isinstance(config, dict):
+        return config.get(name, default)
+    return getattr(config, name, default)
+
+
+def machine_profile_from_config(config: Union[Config, Dict[str, Any]]) -> MachineProfile:
+    """Build a :class:`MachineProfile` from application config values."""
+    stream_mode = str(_config_value(config, "PLOTTER_STREAM_MODE", DEFAULT_STREAM_MODE)).strip().lower()
+    line_delay = float(_config_value(config, "PLOTTER_LINE_DELAY", 0.0))
+    return MachineProfile(
+        max_rate=float(_config_value(config, "PLOTTER_MAX_RATE", 5000.0)),
+        acceleration=float(_config_value(config, "PLOTTER_ACCELERATION", 500.0)),
+        junction_deviation=float(_config_value(config, "PLOTTER_JUNCTION_DEVIATION", 0.01)),
+        # the per-line delay is only applied by the ping-pong sender
+        line_delay=line_delay if stream_mode == STREAM_MODE_PING_PONG else 0.0,
+    )
+
+
+def block_time(length: float, entry: float, exit: float, nominal: float, acceleration: float) -> float:
+    """Return the duration of a trapezoidal (or triangular) velocity profile."""
+    if length <= 0:
+        return 0.0
+    if acceleration <= 0:
+        return length / max(nominal, 1e-9)
+    accel_dist = max(0.0, (nominal * nominal - entry * entry) / (2 * acceleration))
+    decel_dist = max(0.0, (nominal * nominal - exit * exit) / (2 * acceleration))
+    if accel_dist + decel_dist <= length:
+        cruise = length - accel_dist - decel_dist
+        return (nominal - entry) / acceleration + (nominal - exit) / acceleration + cruise / nominal
+    peak = math.sqrt(max(0.0, (2 * acceleration * length + entry * entry + exit * exit) / 2))
+    return max(0.0, (peak - entry) / acceleration) + max(0.0, (peak - exit) / acceleration)
+
+
+def rapid_seconds(distances: Iterable[float], profile: Optional[MachineProfile] = None) -> float:
+    """Total time of rest-to-rest ``G0`` moves over *distances*."""
+    profile = profile or MachineProfile()
+    rate = max(profile.max_rate, 1e-6) / 60.0
+    return sum(block_time(float(d), 0.0, 0.0, rate, profile.acceleration) for d in distances)
+
+
+class AckTimeModel:
+    """Predict how long the controller may take to acknowledge each streamed line.
+
+    GRBL answers a motion line once it fits in the planner, so the ack of a
+    line waits for the oldest queued block to finish when the planner is
+    full. Dwells and pen commands drain the whole planner first and answer
+    after the dwell. Every block is costed as a rest-to-rest move, so the
+    prediction is an upper bound and a deadline derived from it does not
+    fire on long travels or dwells, while a short line that stalls is
+    caught quickly.
+
+    Feed lines to :meth:`expected_ack_seconds` in the order they are sent.
+    """
+
+    def __init__(self, profile: Optional[MachineProfile] = None):
+        self.profile = profile or MachineProfile()
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget queued motion, e.g. after the controller was reset."""
+        self._queued: Deque[float] = deque()
+        self._position = (0.0, 0.0)
+        self._motion_mode = 0
+        self._feed = max(self.profile.max_rate, 1e-6) / 60.0
+        self._absolute = True
+
+    def expected_ack_seconds(self, raw: str) -> float:
+        """Return the predicted wait between *raw* reaching the controller and its ack."""
+        line = _COMMENT_PATTERN.sub("", raw).strip().upper()
+        if not line or line.startswith("$"):
+            return 0.0
+        dwell: Optional[float] = None
+        sync = False
+        target_x: Optional[float] = None
+        target_y: Optional[float] = None
+        for letter, value in _WORD_PATTERN.findall(line):
+            number = float(value)
+            if letter == "G":
+                code = int(round(number))
+                if code in (0, 1):
+                    self._motion_mode = code
+                elif code == 4:
+                    dwell = 0.0
+                elif code == 90:
+                    self._absolute = True
+                elif code == 91:
+                    self._absolute = False
+            elif letter == "M" and int(round(number)) in (3, 4, 5):
+                sync = True
+            elif letter == "P" and dwell is not None:
+                dwell = number
+            elif letter == "F":
+                self._feed = max(number, 1e-6) / 60.0
+            elif letter == "X":
+                target_x = number
+            elif letter == "Y":
+                target_y = number
+
+        if dwell is not None or sync:
+            wait = sum(self._queued) + (dwell or 0.0)
+            self._queued.clear()
+            return wait
+        if target_x is None and target_y is None:
+            return 0.0
+
+        x, y = self._position
+        if self._absolute:
+            target = (x if target_x is None else target_x, y if target_y is None else target_y)
+        else:
+            target = (x + (target_x or 0.0), y + (target_y or 0.0))
+        self._position = target
+        max_rate = max(self.profile.max_rate, 1e-6) / 60.0
+        rate = max_rate if self._motion_mode == 0 else min(self._feed, max_rate)
+        self._queued.append(block_time(math.hypot(target[0] - x, target[1] - y), 0.0, 0.0, rate, self.profile.acceleration))
+        if len(self._queued) > max(1, self.profile.planner_blocks):
+            return self._queued.popleft()
+        return 0.0
+
+
+def _junction_speed(prev: _Move, current: _Move, profile: MachineProfile) -> float:
+    """GRBL's junction-deviation cornering speed between two moves."""
+    cos_theta = -(prev.unit[0] * current.unit[0] + prev.unit[1] * current.unit[1])
+    limit = min(prev.nominal, current.nominal)
+    if cos_theta > _STRAIGHT_JUNCTION_COS:
+        return 0.0  # full reversal
+    if cos_theta < _MIN_JUNCTION_COS:
+        return limit  # straight line
+    sin_theta_d2 = math.sqrt(0.5 * (1.0 - cos_theta))
+    speed_sq = profile.acceleration * profile.junction_deviation * sin_theta_d2 / (1.0 - sin_theta_d2)
+    return min(limit, math.sqrt(max(speed_sq, 0.0)))
+
+
+def _plan(moves: List[_Move], profile: MachineProfile) -> None:
+    """Assign entry/exit speeds to a run of moves that starts and ends at rest."""
+    if not moves:
+        return
+    accel = profile.acceleration
+    window = max(1, profile.planner_blocks)
+
+    for i, move in enumerate(moves):
+        move.max_entry = 0.0 if i == 0 else _junction_speed(moves[i - 1], move, profile)
+
+    # Limited lookahead: a block may only exit as fast as the planner could
+    # still stop within the blocks queued behind it.
+    lengths = [m.length for m in moves]
+    stop_budget = [0.0] * len(moves)
+    running = 0.0
+    for i in range(len(moves) - 1, -1, -1):
+        running += lengths[i]
+        if i + window < len(moves):
+            running -= lengths[i + window]
+        stop_budget[i] = running - lengths[i]
+
+    # backward pass: every block must be able to decelerate to its successor
+    next_entry = 0.0
+    for i in range(len(moves) - 1, -1, -1):
+        move = moves[i]
+        exit_limit = math.sqrt(2 * accel * stop_budget[i]) if accel > 0 else move.nominal
+        move.exit = min(next_entry, exit_limit)
+        reachable = math.sqrt(move.exit * move.exit + 2 * accel * move.length) if accel > 0 else move.nominal
+        move.entry = min(move.max_entry, move.nominal, reachable)
+        next_entry = move.entry
+
+    # forward pass: every block must be able to accelerate from its predecessor
+    prev_exit = 0.0
+    for move in moves:
+        move.entry = min(move.entry, prev_exit)
+        reachable = math.sqrt(move.entry * move.entry + 2 * accel * move.length) if accel > 0 else move.nominal
+        move.exit = min(move.exit, reachable, move.nominal)
+        prev_exit = move.exit
+
+
+def simulate_gcode(lines: Iterable[str], profile: Optional[MachineProfile] = None) -> PrintTimeEstimate:
+    """Estimate how long a controller takes to execute *lines*.
+
+    Moves are planned with trapezoidal velocity profiles, GRBL's
+    junction-deviation cornering and a lookahead window of
+    ``profile.planner_blocks``. ``G4`` dwells and spindle/pen commands
+    (``M3``/``M5``) drain the planner, as they do on GRBL. ``G0`` runs at
+    ``max_rate``. When ``profile.line_delay`` is set, a block cannot start
+    before the host has had time to send its line.
+
+    Times between a pen-down (``M3``) and the following pen-up (``M5``) are
+    reported per path in ``path_seconds``.
+    """
+    profile = profile or MachineProfile()
+    max_rate = max(profile.max_rate, 1e-6) / 60.0
+
+    position = (0.0, 0.0)
+    motion_mode = 0
+    feed = max_rate
+    absolute = True
+    pen_down = False
+    path_index = -1
+
+    pending: List[_Move] = []
+    events: List[tuple] = []  # ("move", _Move) | ("dwell", seconds, line_index, path_index)
+    line_count = 0
+
+    def _flush() -> None:
+        _plan(pending, profile)
+        events.extend(("move", m) for m in pending)
+        pending.clear()
+
+    for raw in lines:
+        line = _COMMENT_PATTERN.sub("", raw).strip().upper()
+        line_count += 1
+        if not line:
+            continue
+        words = _WORD_PATTERN.findall(line)
+        dwell: Optional[float] = None
+        sync = False
+        target_x: Optional[float] = None
+        target_y: Optional[float] = None
+        for letter, value in words:
+            number = float(value)
+            if letter == "G":
+                code = int(round(number))
+                if code in (0, 1):
+                    motion_mode = code
+                elif code == 4:
+                    dwell = 0.0
+                elif code == 90:
+                    absolute = True
+                elif code == 91:
+                    absolute = False
+            elif letter == "M":
+                code = int(round(number))
+                if code in (3, 4):
+                    sync = True
+                    if not pen_down:
+                        pen_down = True
+                        path_index += 1
+                elif code == 5:
+                    sync = True
+                    pen_down = False
+            elif letter == "P" and dwell is not None:
+                dwell = number
+            elif letter == "F":
+                feed = max(number, 1e-6) / 60.0
+            elif letter == "X":
+                target_x = number
+            elif letter == "Y":
+                target_y = number
+
+        current_path = path_index if pen_down else -1
+        if dwell is not None or sync:
+            _flush()
+            events.append(("dwell", dwell or 0.0, line_count, current_path))
+            continue
+        if target_x is None and target_y is None:
+            continue
+        if absolute:
+            target = (position[0] if target_x is None else target_x, position[1] if target_y is None else target_y)
+        else:
+            target = (position[0] + (target_x or 0.0), position[1] + (target_y or 0.0))
+        dx, dy = target[0] - position[0], target[1] - position[1]
+        length = math.hypot(dx, dy)
+        position = target
+        if length <= 1e-9:
+            continue
+        nominal = max_rate if motion_mode == 0 else min(feed, max_rate)
+        pending.append(
+            _Move(
+                length=length,
+                nominal=nominal,
+                unit=(dx / length, dy / length),
+                path_index=current_path,
+                line_index=line_count,
+            )
+        )
+    _flush()
+
+    clock = 0.0
+    motion_seconds = 0.0
+    dwell_seconds = 0.0
+    stream_wait = 0.0
+    path_seconds: Dict[int, float] = {}
+    for event in events:
+        if event[0] == "move":
+            move = event[1]
+            line_index, path = move.line_index, move.path_index
+            duration = block_time(move.length, move.entry, move.exit, move.nominal, profile.acceleration)
+            motion_seconds += duration
+        else:
+            _, duration, line_index, path = event
+            dwell_seconds += duration
+        if profile.line_delay > 0:
+            # the host cannot have delivered this line any earlier
+            arrival = line_index * profile.line_delay
+            if arrival > clock:
+                stream_wait += arrival - clock
+                clock = arrival
+        clock += duration
+        if path >= 0:
+            path_seconds[path] = path_seconds.get(path, 0.0) + duration
+
+    return PrintTimeEstimate(
+        total_seconds=clock,
+        motion_seconds=motion_seconds,
+        dwell_seconds=dwell_seconds,
+        stream_wait_seconds=stream_wait,
+        path_seconds=[path_seconds.get(i, 0.0) for i in range(path_index + 1)],
+        line_count=line_count,
+    )
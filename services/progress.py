@@ -0,0 +1,211 @@
+"""In-memory print progress with write-behind persistence."""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Sequence
+
+# Persist one job's progress dict, or clear it when given ``None``.
+FlushCallback = Callable[[int, Optional[Dict[str, Any]]], None]
+
+
+@dataclass
+class PrintProgress:
+    """Live progress of one print, acknowledged line by line."""
+
+    job_id: int
+    total_lines: int
+    total_bytes: int
+    current_line: int = 0
+    bytes_sent: int = 0
+    lines_per_second: Optional[float] = None
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    updated_at: datetime = field(default_factory=datetime.utcnow)
+    _started_clock: float = field(default_factory=time.monotonic, repr=False)
+    _sample_clock: float = field(default_factory=time.monotonic, repr=False)
+    _sample_line: int = field(default=0, repr=False)
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        if not self.lines_per_second:
+            return None
+        return max(0, self.total_lines - self.current_line) / self.lines_per_second
+
+    def to_dict(self) -> Dict[str, Any]:
+        eta = self.eta_seconds
+        return {
+            "total_lines": self.total_lines,
+            "current_line": self.current_line,
+            "total_bytes": self.total_bytes,
+            "bytes_sent": self.bytes_sent,
+            "lines_per_second": round(self.lines_per_second, 2) if self.lines_per_second else None,
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+            "elapsed_seconds": round(time.monotonic() - self._started_clock, 1),
+            "started_at": self.started_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class ProgressStore:
+    """Keep print progress in memory and persist it behind the serial hot path.
+
+    :meth:`update` only touches memory, so it can run for every acknowledged
+    line. A background thread hands changed records to *flush* every
+    ``flush_interval`` seconds; :meth:`begin` and :meth:`finish` flush
+    immediately because they are state changes. A record that has not
+    changed is still written every ``heartbeat_interval`` seconds, so the
+    job's ``updated_at`` shows other processes that the print is alive.
+    *publish*, if given, is called at most every ``publish_interval``
+    seconds per job.
+
+    The line rate is an exponentially weighted average over samples at least
+    ``rate_window`` seconds apart, which smooths out GRBL acknowledging lines
+    in bursts as its planner buffer drains.
+    """
+
+    def __init__(
+        self,
+        flush: FlushCallback,
+        *,
+        publish: Optional[FlushCallback] = None,
+        flush_interval: float = 2.0,
+        heartbeat_interval: float = 10.0,
+        publish_interval: float = 0.25,
+        rate_window: float = 1.0,
+        rate_smoothing: float = 0.3,
+    ):
+        self._flush = flush
+        self._publish = publish
+        self.flush_interval = flush_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.publish_interval = publish_interval
+        self.rate_window = rate_window
+        self.rate_smoothing = rate_smoothing
+        self._records: Dict[int, PrintProgress] = {}
+        self._line_offsets: Dict[int, Sequence[int]] = {}
+        self._dirty: set[int] = set()
+        self._published_at: Dict[int, float] = {}
+        self._persisted_at: Dict[int, float] = {}
+        self._lock = threading.Lock()
+        # serialises persistence so a late periodic flush cannot undo finish()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, job_id: int, line_ends: Sequence[int], *, start_line: int = 0) -> Dict[str, Any]:
+        """Start tracking a print; ``line_ends[i]`` is the byte count through line ``i``.
+
+        The sequence is kept by reference (e.g. the memory-mapped index of a
+        :class:`~services.gcode_file.GCodeProgram`), not copied. A resumed
+        print passes the number of lines already done as *start_line*.
+        """
+        total_lines = len(line_ends)
+        start_line = max(0, min(int(start_line), total_lines))
+        record = PrintProgress(
+            job_id=job_id,
+            total_lines=total_lines,
+            total_bytes=int(line_ends[-1]) if total_lines else 0,
+            current_line=start_line,
+            bytes_sent=int(line_ends[start_line - 1]) if start_line else 0,
+            _sample_line=start_line,
+        )
+        with self._lock:
+            self._records[job_id] = record
+            self._line_offsets[job_id] = line_ends
+            self._dirty.discard(job_id)
+            self._persisted_at[job_id] = time.monotonic()
+            snapshot = record.to_dict()
+        self._ensure_flusher()
+        with self._flush_lock:
+            self._emit(self._flush, job_id, snapshot)
+        self._emit(self._publish, job_id, snapshot)
+        return snapshot
+
+    def update(self, job_id: int, current_line: int) -> None:
+        """Record that lines up to *current_line* (1-based) were acknowledged."""
+        now = time.monotonic()
+        publish_snapshot = None
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is None:
+                return
+            current_line = max(0, min(int(current_line), record.total_lines))
+            record.current_line = current_line
+            record.bytes_sent = int(self._line_offsets[job_id][current_line - 1]) if current_line else 0
+            record.updated_at = datetime.utcnow()
+            elapsed = now - record._sample_clock
+            if elapsed >= self.rate_window:
+                rate = (current_line - record._sample_line) / elapsed
+                if record.lines_per_second is None:
+                    record.lines_per_second = rate
+                else:
+                    record.lines_per_second += self.rate_smoothing * (rate - record.lines_per_second)
+                record._sample_clock = now
+                record._sample_line = current_line
+            self._dirty.add(job_id)
+            if self._publish is not None and now - self._published_at.get(job_id, 0.0) >= self.publish_interval:
+                self._published_at[job_id] = now
+                publish_snapshot = record.to_dict()
+        if publish_snapshot is not None:
+            self._emit(self._publish, job_id, publish_snapshot)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Return the live progress of *job_id*, or ``None`` if it is not printing."""
+        with self._lock:
+            record = self._records.get(job_id)
+            return record.to_dict() if record is not None else None
+
+    def finish(self, job_id: int) -> bool:
+        """Stop tracking *job_id* and clear its persisted progress."""
+        with self._lock:
+            tracked = self._records.pop(job_id, None) is not None
+            self._line_offsets.pop(job_id, None)
+            self._dirty.discard(job_id)
+            self._published_at.pop(job_id, None)
+            self._persisted_at.pop(job_id, None)
+        with self._flush_lock:
+            self._emit(self._flush, job_id, None)
+        if tracked:
+            self._emit(self._publish, job_id, None)
+        return tracked
+
+    def flush(self) -> None:
+        """Persist every record changed since the last flush or due a heartbeat."""
+        with self._flush_lock:
+            with self._lock:
+                stale_before = time.monotonic() - self.heartbeat_interval
+                pending = self._dirty | {
+                    job_id for job_id, persisted in self._persisted_at.items() if persisted <= stale_before
+                }
+                self._dirty.clear()
+            for job_id in pending:
+                with self._lock:
+                    record = self._records.get(job_id)
+                    snapshot = record.to_dict() if record is not None else None
+                    if record is not None:
+                        self._persisted_at[job_id] = time.monotonic()
+                if snapshot is not None:
+                    self._emit(self._flush, job_id, snapshot)
+
+    def _emit(self, callback: Optional[FlushCallback], job_id: int, snapshot: Optional[Dict[str, Any]]) -> None:
+        if callback is None:
+            return
+        try:
+            callback(job_id, snapshot)
+        except Exception:  # noqa: BLE001
+            logging.getLogger("services.progress").warning("Progress callback failed for job %s", job_id, exc_info=True)
+
+    def _ensure_flusher(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="progress-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import atexit
+import hashlib
+import itertools
+import json
 import logging
+import queue as stdlib_queue
+import threading
 import uuid
-from dataclasses import dataclass
-from datetime import datetime
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta
 from enum import Enum
 from pathlib import Path
 import re
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 from flask import current_app
 from werkzeug.datastructures import FileStorage
@@ -17,17 +24,29 @@ from werkzeug.datastructures import FileStorage
 from config import Config
 from models import Job
 from services.database import session_scope
+from services import events
 from services.gemini_client import GeminiClient, GeminiClientError
 from services import gcode as gcode_service
 from services import image_processing, vectorizer
 from services.style_presets import DEFAULT_STYLE_KEY, get_style
 from services.plotter import PlotterController, PlotterError
+from services.plotter_service import get_plotter_service
+from services.print_time import machine_profile_from_config
+from services.progress import ProgressStore
+from services.checkpoint import CheckpointTracker, resume_preamble
+from services.gcode_compiled import CompiledProgram, open_program, program_exists, render_gcode
+from services.gcode_file import GCodeProgram, remove_program
+from services.gcode_wire import WireStats, optimize_lines
 
 
 class QueueError(RuntimeError):
     """Raised when queue operations fail."""
 
 
+class QueueFullError(QueueError):
+    """Raised when the generation intake queue has no free slot."""
+
+
 class JobStatus(str, Enum):
     SUBMITTED = "submitted"
     GENERATING = "generating"
@@ -116,6 +135,13 @@ def _is_z_inverted(config: Union[Config, Dict[str, Any]]) -> bool:
     return bool(value)
 
 
+def _config_flag(config: Union[Config, Dict[str, Any]], name: str, default: bool) -> bool:
+    value = _config_value(config, name, default)
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
 def _vectorize_and_store(
     asset_key: str,
     image_path: Path,
@@ -125,6 +151,8 @@ def _vectorize_and_store(
     """Run vectorization and persist SVG/JSON artifacts."""
 
     threshold = int(_config_value(config, "VECTORIZE_THRESHOLD", 240))
+    mode = str(_config_value(config, "VECTORIZE_MODE", vectorizer.VECTORIZE_MODE_CONTOUR)).strip().lower()
+    with_widths = _config_flag(config, "VECTORIZE_STROKE_WIDTHS", False)
     simplify = float(_config_value(config, "VECTORIZE_SIMPLIFY_PX", 2.0))
     min_points = int(_config_value(config, "VECTORIZE_MIN_POINTS", 24))
     downsample_step = int(_config_value(config, "VECTORIZE_DOWNSAMPLE_STEP", 1))
@@ -138,6 +166,8 @@ def _vectorize_and_store(
         simplify_tolerance=simplify,
         min_path_points=min_points,
         downsample_step=downsample_step,
+        mode=mode,
+        with_widths=with_widths,
     )
     vector_data = vectorizer.crop_and_scale_vector_data(
         vector_data,
@@ -155,6 +185,8 @@ def _vectorize_and_store(
         "vector_svg_path": str(vector_svg),
         "vector_width": vector_data.width,
         "vector_height": vector_data.height,
+        "vectorize_mode": mode,
+        "vector_path_count": vector_data.path_count,
     }
 
 
@@ -166,50 +198,76 @@ def _touch_job(session, job_id: int) -> Job:
     return job
 
 
-def _init_print_progress(job_id: int, total_lines: int) -> None:
-    total_lines = max(0, int(total_lines))
+def _publish_status(job_id: int, status: str, error_message: Optional[str] = None) -> None:
+    """Announce a status change on the event bus (call after the change is committed)."""
+    events.publish(
+        "job",
+        {"id": job_id, "status": status, "updated_at": datetime.utcnow().isoformat()},
+        {"error_message": error_message} if error_message else None,
+    )
+
+
+def _publish_progress(job_id: int, progress: Optional[Dict[str, Any]]) -> None:
+    events.publish("progress", {"id": job_id, "print_progress": progress})
+
+
+# Modal-state trackers of the prints currently streaming, with their G-code path.
+_checkpoint_trackers: Dict[int, Tuple[CheckpointTracker, str]] = {}
+
+
+def _checkpoint_for(job_id: int, line: int) -> Optional[Dict[str, Any]]:
+    entry = _checkpoint_trackers.get(job_id)
+    if entry is None:
+        return None
+    tracker, gcode_path = entry
+    return {**tracker.checkpoint(line), "gcode_path": gcode_path}
+
+
+def _write_print_progress(job_id: int, progress: Optional[Dict[str, Any]]) -> None:
+    """Persist (or with ``None`` remove) ``print_progress`` in the job metadata.
+
+    While a print streams, every write also records ``print_checkpoint``: the
+    last acknowledged line with the modal state needed to resume after it.
+    """
+    checkpoint = _checkpoint_for(job_id, progress["current_line"]) if progress is not None else None
     with session_scope() as session:
         obj = _touch_job(session, job_id)
-        metadata = obj.metadata_json or {}
-        metadata["print_progress"] = {
-            "total_lines": total_lines,
-            "current_line": 0,
-            "updated_at": datetime.utcnow().isoformat(),
-        }
+        metadata = dict(obj.metadata_json or {})
+        if progress is None:
+            if "print_progress" not in metadata:
+                return
+            metadata.pop("print_progress")
+        else:
+            metadata["print_progress"] = progress
+            if checkpoint is not None:
+                metadata["print_checkpoint"] = checkpoint
         obj.metadata_json = metadata
 
 
-def _update_print_progress(
-    job_id: int,
-    *,
-    current_line: int,
-    total_lines: Optional[int] = None,
-) -> None:
+def _update_job_metadata(job_id: int, **changes: Any) -> None:
+    """Set metadata keys on a job; a value of ``None`` removes the key."""
     with session_scope() as session:
         obj = _touch_job(session, job_id)
-        metadata = obj.metadata_json or {}
-        progress = metadata.get("print_progress") or {}
-        if total_lines is not None:
-            progress["total_lines"] = max(0, int(total_lines))
-        existing_total = progress.get("total_lines") or total_lines or 0
-        safe_current = max(0, min(int(current_line), int(existing_total) if existing_total else int(current_line)))
-        progress.update(
-            {
-                "current_line": safe_current,
-                "updated_at": datetime.utcnow().isoformat(),
-            }
-        )
-        metadata["print_progress"] = progress
+        metadata = dict(obj.metadata_json or {})
+        for key, value in changes.items():
+            if value is None:
+                metadata.pop(key, None)
+            else:
+                metadata[key] = value
         obj.metadata_json = metadata
 
 
-def _clear_print_progress(job_id: int) -> None:
-    with session_scope() as session:
-        obj = _touch_job(session, job_id)
-        metadata = obj.metadata_json or {}
-        if "print_progress" in metadata:
-            metadata.pop("print_progress", None)
-            obj.metadata_json = metadata
+# Progress is updated per acknowledged line in memory and written behind to the DB.
+_progress_store = ProgressStore(_write_print_progress, publish=_publish_progress)
+
+
+def get_print_progress(job_id: int) -> Optional[Dict[str, Any]]:
+    """Return live progress for a printing job, falling back to the last persisted value."""
+    live = _progress_store.get(job_id)
+    if live is not None:
+        return live
+    metadata = get_job(job_id, admin=True).get("metadata") or {}
+    return metadata.get("print_progress")
 
 
 def _job_to_public_dict(job: Job) -> Dict[str, Any]:
@@ -217,21 +275,24 @@ def _job_to_public_dict(job: Job) -> Dict[str, Any]:
 
 
 def _job_to_admin_dict(job: Job) -> Dict[str, Any]:
-    return job.to_dict(admin=True)
+    data = job.to_dict(admin=True)
+    live = _progress_store.get(job.id)
+    if live is not None:
+        data["metadata"] = {**(data["metadata"] or {}), "print_progress": live}
+    return data
 
 
-def create_job_from_upload(
+def _create_submitted_job(
     upload: FileStorage,
     *,
     prompt: Optional[str],
     requester: Optional[str],
-    email: Optional[str] = None,
-    style_key: str = DEFAULT_STYLE_KEY,
-    style_prompt: Optional[str] = None,
-    config: Config,
-    gemini_client: GeminiClient,
-) -> Dict[str, Any]:
-    """Create a new job from an uploaded image and trigger generation."""
+    email: Optional[str],
+    style_key: str,
+    style_prompt: Optional[str],
+    cfg: QueueConfig,
+) -> int:
+    """Store the upload and insert a SUBMITTED job; return its ID."""
     if upload is None or upload.filename == "":
         raise QueueError("No image provided.")
 
@@ -241,7 +302,6 @@ def create_job_from_upload(
     style = get_style(style_key)
     resolved_style_prompt = style_prompt or style["prompt"]
 
-    cfg = _get_queue_config(config)
     metadata = {
         "style_key": style_key,
         "style_label": style["label"],
@@ -269,6 +329,17 @@ def create_job_from_upload(
         job.asset_key = asset_key
         job.original_path = str(original_path)
 
+    _publish_status(job_id, JobStatus.SUBMITTED.value)
+    return job_id
+
+
+def _run_generation(
+    job_id: int,
+    gemini_client: GeminiClient,
+    cfg: QueueConfig,
+    config: Union[Config, Dict[str, Any]],
+) -> None:
+    """Generate the caricature for *job_id*, marking the job failed on error."""
     try:
         _generate_caricature(job_id, gemini_client, cfg, config)
     except GeminiClientError as exc:
@@ -279,7 +350,67 @@ def create_job_from_upload(
         _logger().exception("Job generation failed for job %s: %s", job_id, exc)
         mark_job_failed(job_id, str(exc))
         raise
+    schedule_precompile(job_id, config)
 
+
+def create_job_from_upload(
+    upload: FileStorage,
+    *,
+    prompt: Optional[str],
+    requester: Optional[str],
+    email: Optional[str] = None,
+    style_key: str = DEFAULT_STYLE_KEY,
+    style_prompt: Optional[str] = None,
+    config: Config,
+    gemini_client: GeminiClient,
+) -> Dict[str, Any]:
+    """Create a new job from an uploaded image and generate it before returning."""
+    cfg = _get_queue_config(config)
+    job_id = _create_submitted_job(
+        upload,
+        prompt=prompt,
+        requester=requester,
+        email=email,
+        style_key=style_key,
+        style_prompt=style_prompt,
+        cfg=cfg,
+    )
+    _run_generation(job_id, gemini_client, cfg, config)
+    return get_job(job_id, admin=False)
+
+
+def submit_job_from_upload(
+    upload: FileStorage,
+    *,
+    prompt: Optional[str],
+    requester: Optional[str],
+    email: Optional[str] = None,
+    style_key: str = DEFAULT_STYLE_KEY,
+    style_prompt: Optional[str] = None,
+    config: Config,
+    gemini_client: GeminiClient,
+) -> Dict[str, Any]:
+    """Create a new job and hand its generation to the background worker pool.
+
+    Returns the SUBMITTED job immediately; poll :func:`get_job` for progress.
+    Raises :class:`QueueFullError` (and marks the job failed) when the intake
+    queue is full.
+    """
+    cfg = _get_queue_config(config)
+    job_id = _create_submitted_job(
+        upload,
+        prompt=prompt,
+        requester=requester,
+        email=email,
+        style_key=style_key,
+        style_prompt=style_prompt,
+        cfg=cfg,
+    )
+    try:
+        get_generation_pool(config).submit(lambda: _run_generation(job_id, gemini_client, cfg, config))
+    except QueueFullError as exc:
+        mark_job_failed(job_id, str(exc))
+        raise
     return get_job(job_id, admin=False)
 
 
@@ -330,6 +461,8 @@ def create_job_from_manual_upload(
         job.generated_path = str(generated_path)
         job.metadata_json = metadata
 
+    _publish_status(job_id, JobStatus.GENERATED.value)
+    schedule_precompile(job_id, config)
     return get_job(job_id, admin=True)
 
 
@@ -373,6 +506,7 @@ def _generate_caricature(
         job.status = JobStatus.GENERATED.value
         job.error_message = None
         job.metadata_json = {**(job.metadata_json or {}), **vector_meta}
+    _publish_status(job_id, JobStatus.GENERATED.value)
 
 
 def get_job(job_id: int, *, admin: bool = False) -> Dict[str, Any]:
@@ -381,7 +515,7 @@ def get_job(job_id: int, *, admin: bool = False) -> Dict[str, Any]:
         job = session.get(Job, job_id)
         if job is None:
             raise QueueError(f"Job {job_id} not found.")
-        return job.to_dict(admin=admin)
+        return _job_to_admin_dict(job) if admin else _job_to_public_dict(job)
 
 
 def list_jobs(*, admin: bool = False, limit: int = 20) -> List[Dict[str, Any]]:
@@ -407,15 +541,24 @@ def set_job_status(job_id: int, status: JobStatus) -> Dict[str, Any]:
             job.started_at = datetime.utcnow()
         elif status == JobStatus.COMPLETED:
             job.completed_at = datetime.utcnow()
-        return job.to_dict(admin=True)
+        result = job.to_dict(admin=True)
+    _publish_status(job_id, status.value)
+    return result
 
 
-def confirm_job(job_id: int) -> Dict[str, Any]:
-    """Mark a job as confirmed by a user."""
+def confirm_job(job_id: int, config: Optional[Union[Config, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Mark a job as confirmed by a user.
+
+    With *config*, the job's G-code is (re)compiled in the background so it
+    is ready when the print starts.
+    """
     job = get_job(job_id, admin=True)
     if job["status"] != JobStatus.GENERATED.value:
         raise QueueError("Job cannot be confirmed in its current state.")
-    return set_job_status(job_id, JobStatus.CONFIRMED)
+    result = set_job_status(job_id, JobStatus.CONFIRMED)
+    if config is not None:
+        schedule_precompile(job_id, config)
+    return result
 
 
 def approve_job(job_id: int) -> Dict[str, Any]:
@@ -426,22 +569,8 @@ def approve_job(job_id: int) -> Dict[str, Any]:
     return set_job_status(job_id, JobStatus.APPROVED)
 
 
-def queue_for_printing(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
-    """Move job to queued state for plotting."""
-    job = get_job(job_id, admin=True)
-    allowed_statuses = {
-        JobStatus.APPROVED.value,
-        JobStatus.CONFIRMED.value,
-        JobStatus.GENERATED.value,
-    }
-    if job["status"] not in allowed_statuses:
-        raise QueueError("Job must be generated or confirmed before queuing.")
-    if job["status"] == JobStatus.GENERATED.value:
-        job = set_job_status(job_id, JobStatus.CONFIRMED)
-
-    cfg = _get_queue_config(config)
-
-    metadata: Dict[str, Any] = {}
+def _load_job_vector_data(job_id: int, cfg: QueueConfig) -> Tuple[vectorizer.VectorData, Path, str]:
+    """Load a job's vector data; return it with its file and the job's asset key."""
     with session_scope() as session:
         obj = _touch_job(session, job_id)
         if not obj.generated_path:
@@ -449,10 +578,8 @@ def queue_for_printing(job_id: int, config: Union[Config, Dict[str, Any]]) -> Di
         generated_path = Path(obj.generated_path)
         if not generated_path.exists():
             raise QueueError("Generated image file missing.")
-        gcode_path = Path(obj.gcode_path) if obj.gcode_path else cfg.gcode_dir / f"{obj.asset_key}.gcode"
         metadata = obj.metadata_json or {}
 
-        vector_data: vectorizer.VectorData | None = None
         vector_data_path = metadata.get("vector_data_path")
         candidate_paths = []
         if vector_data_path:
@@ -469,74 +596,212 @@ def queue_for_printing(job_id: int, config: Union[Config, Dict[str, Any]]) -> Di
                     svg_path_for_meta = legacy_svg_candidate
                 else:
                     svg_path_for_meta = svg_candidate
-                metadata = {
+                obj.metadata_json = {
                     **metadata,
                     "vector_data_path": str(candidate),
                     "vector_svg_path": str(svg_path_for_meta),
                 }
-                obj.metadata_json = metadata
-                break
+                return vector_data, candidate, obj.asset_key
 
-        if not vector_data:
-            raise QueueError(
-                "Vector data missing for job; regenerate the caricature before queuing."
-            )
+    raise QueueError("Vector data missing for job; regenerate the caricature before queuing.")
 
-    try:
-        target_size_mm = 100.0  # physical drawing size
-        configured_resolution = int(_config_value(config, "VECTOR_RESOLUTION", 1600))
-        effective_resolution = max(
-            configured_resolution,
-            max(vector_data.width, vector_data.height) if vector_data else 0,
-        )
-        pixel_size_mm = target_size_mm / max(effective_resolution, 1)
-        default_settings = gcode_service.GCodeSettings()
-        feed_rate = int(_config_value(config, "PLOTTER_FEED_RATE", default_settings.feed_rate))
-
-        settings = gcode_service.GCodeSettings(
-            pixel_size_mm=pixel_size_mm,
-            feed_rate=feed_rate,
-            travel_height=5.0,
-            draw_height=0.0,
-            invert_z=_is_z_inverted(config),
-            min_move_mm=0.1,
-            pen_dwell_seconds=0.05,
-        )
 
+def _gcode_settings(
+    vector_data: vectorizer.VectorData,
+    config: Union[Config, Dict[str, Any]],
+) -> gcode_service.GCodeSettings:
+    target_size_mm = 100.0  # physical drawing size
+    configured_resolution = int(_config_value(config, "VECTOR_RESOLUTION", 1600))
+    effective_resolution = max(configured_resolution, vector_data.width, vector_data.height)
+    pixel_size_mm = target_size_mm / max(effective_resolution, 1)
+    default_settings = gcode_service.GCodeSettings()
+    feed_rate = int(_config_value(config, "PLOTTER_FEED_RATE", default_settings.feed_rate))
+    compiled = _config_flag(config, "GCODE_COMPILED", False)
+    wire_decimals = default_settings.wire_decimals
+    if compiled:
+        # the wire form is baked into compiled programs, so it is part of the settings key
+        wire_decimals = int(_config_value(config, "WIRE_DECIMALS", 3)) if _config_flag(config, "WIRE_OPTIMIZE", True) else None
+
+    return gcode_service.GCodeSettings(
+        pixel_size_mm=pixel_size_mm,
+        feed_rate=feed_rate,
+        travel_height=5.0,
+        draw_height=0.0,
+        invert_z=_is_z_inverted(config),
+        min_move_mm=0.1,
+        pen_dwell_seconds=0.05,
+        machine=machine_profile_from_config(config),
+        join_tolerance_mm=float(_config_value(config, "PLOTTER_JOIN_TOLERANCE_MM", 0.2)),
+        optimize_order=_config_flag(config, "PLOTTER_OPTIMIZE_PATH_ORDER", True),
+        order_time_budget=float(_config_value(config, "PLOTTER_PATH_ORDER_BUDGET_S", 2.0)),
+        compiled=compiled,
+        wire_decimals=wire_decimals,
+    )
+
+
+def _settings_key(settings: gcode_service.GCodeSettings, vector_path: Path) -> str:
+    """Hash the G-code settings and the vector file they are applied to."""
+    stat = vector_path.stat()
+    payload = {
+        "settings": asdict(settings),
+        "vectors": [str(vector_path), stat.st_mtime_ns, stat.st_size],
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha1(encoded).hexdigest()[:12]
+
+
+# Striped by job id, so a slow compile rarely holds up another job's print
+# (consecutive jobs never share a lock) and the lock table stays bounded.
+_COMPILE_LOCK_STRIPES = 16
+_compile_locks: List[threading.Lock] = [threading.Lock() for _ in range(_COMPILE_LOCK_STRIPES)]
+
+
+def _compile_lock_for(job_id: int) -> threading.Lock:
+    return _compile_locks[job_id % _COMPILE_LOCK_STRIPES]
+
+
+def _compile_job_gcode(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Return the job's G-code artifact for the current settings, compiling it if needed.
+
+    Artifacts are written to ``{asset_key}-{settings_key}.gcode`` and recorded
+    under ``precompiled_gcode`` in the job metadata; a stored artifact is
+    reused only while its settings key still matches.
+    """
+    cfg = _get_queue_config(config)
+    with _compile_lock_for(job_id):
+        vector_data, vector_path, asset_key = _load_job_vector_data(job_id, cfg)
+        settings = _gcode_settings(vector_data, config)
+        settings_key = _settings_key(settings, vector_path)
+
+        existing = get_job(job_id, admin=True)
+        previous = (existing.get("metadata") or {}).get("precompiled_gcode") or {}
+        if previous.get("settings_key") == settings_key and program_exists(Path(previous.get("gcode_path", ""))):
+            return previous
+
+        gcode_path = cfg.gcode_dir / f"{asset_key}-{settings_key}.gcode"
         gcode_stats = gcode_service.vector_data_to_gcode(vector_data, gcode_path, settings=settings)
+        artifact = {
+            "settings_key": settings_key,
+            "gcode_path": str(gcode_path),
+            "compiled_at": datetime.utcnow().isoformat(),
+            "estimated_print_seconds": round(gcode_stats.estimated_seconds, 2),
+            "gcode_stats": {
+                "total_draw_mm": round(gcode_stats.total_draw_mm, 2),
+                "total_travel_mm": round(gcode_stats.total_travel_mm, 2),
+                "travel_before_mm": round(gcode_stats.unordered_travel_mm, 2),
+                "travel_after_mm": round(gcode_stats.total_travel_mm, 2),
+                "estimated_seconds_before": round(gcode_stats.unordered_estimated_seconds, 2),
+                "estimated_seconds_after": round(gcode_stats.estimated_seconds, 2),
+                "pen_lifts_removed": gcode_stats.pen_lifts_removed,
+                "path_count": gcode_stats.path_count,
+                "line_count": gcode_stats.line_count,
+                "longest_path_seconds": round(max(gcode_stats.path_seconds, default=0.0), 2),
+            },
+        }
+
+        with session_scope() as session:
+            obj = _touch_job(session, job_id)
+            obj.metadata_json = {**(obj.metadata_json or {}), "precompiled_gcode": artifact}
+            current_gcode_path = obj.gcode_path
+
+        stale_path = previous.get("gcode_path")
+        if stale_path and stale_path not in (str(gcode_path), current_gcode_path):
+            remove_program(Path(stale_path))
+    return artifact
+
+
+def precompile_gcode(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Compile a generated job's G-code ahead of printing and return the artifact."""
+    job = get_job(job_id, admin=True)
+    if job["status"] not in {
+        JobStatus.GENERATED.value,
+        JobStatus.CONFIRMED.value,
+        JobStatus.APPROVED.value,
+    }:
+        raise QueueError("Only generated, confirmed or approved jobs are precompiled.")
+    return _compile_job_gcode(job_id, config)
+
+
+def _precompile_quietly(job_id: int, config: Union[Config, Dict[str, Any]]) -> None:
+    try:
+        artifact = precompile_gcode(job_id, config)
+    except Exception as exc:  # noqa: BLE001
+        _logger().warning("G-code precompilation skipped for job %s: %s", job_id, exc)
+    else:
+        _logger().info("Precompiled G-code for job %s (%s)", job_id, artifact["settings_key"])
+
+
+_precompile_lock = threading.Lock()
+_precompile_executor: Optional[ThreadPoolExecutor] = None
+
+
+def schedule_precompile(job_id: int, config: Union[Config, Dict[str, Any]]) -> Optional["Future[None]"]:
+    """Compile the job's G-code on a background thread unless ``GCODE_PRECOMPILE`` is off."""
+    global _precompile_executor
+
+    if not _config_flag(config, "GCODE_PRECOMPILE", True):
+        return None
+    with _precompile_lock:
+        if _precompile_executor is None:
+            _precompile_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gcode-precompile")
+        return _precompile_executor.submit(_precompile_quietly, job_id, config)
+
+
+def shutdown_precompile_executor(*, wait: bool = False) -> None:
+    """Stop the background precompiler, dropping work that has not started."""
+    global _precompile_executor
+
+    with _precompile_lock:
+        executor, _precompile_executor = _precompile_executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+atexit.register(shutdown_precompile_executor)
+
+
+def queue_for_printing(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Move job to queued state for plotting, reusing precompiled G-code when current."""
+    job = get_job(job_id, admin=True)
+    allowed_statuses = {
+        JobStatus.APPROVED.value,
+        JobStatus.CONFIRMED.value,
+        JobStatus.GENERATED.value,
+    }
+    if job["status"] not in allowed_statuses:
+        raise QueueError("Job must be generated or confirmed before queuing.")
+    if job["status"] == JobStatus.GENERATED.value:
+        job = set_job_status(job_id, JobStatus.CONFIRMED)
+
+    try:
+        artifact = _compile_job_gcode(job_id, config)
     except gcode_service.GCodeError as exc:
         _logger().exception("Failed to convert image to G-code for job %s: %s", job_id, exc)
         mark_job_failed(job_id, str(exc))
         raise
 
-    metadata = {
-        **(metadata or {}),
-        "estimated_print_seconds": round(gcode_stats.estimated_seconds, 2),
-        "gcode_stats": {
-            "total_draw_mm": round(gcode_stats.total_draw_mm, 2),
-            "total_travel_mm": round(gcode_stats.total_travel_mm, 2),
-            "path_count": gcode_stats.path_count,
-            "line_count": gcode_stats.line_count,
-        },
-    }
-
     with session_scope() as session:
         obj = _touch_job(session, job_id)
-        obj.gcode_path = str(gcode_path)
+        obj.gcode_path = artifact["gcode_path"]
         obj.status = JobStatus.QUEUED.value
         obj.error_message = None
-        obj.metadata_json = metadata
+        obj.metadata_json = {
+            **(obj.metadata_json or {}),
+            "estimated_print_seconds": artifact["estimated_print_seconds"],
+            "gcode_stats": artifact["gcode_stats"],
+        }
+    _publish_status(job_id, JobStatus.QUEUED.value)
 
     return get_job(job_id, admin=True)
 
 
-def start_print_job(
+def _prepare_print_job(
     job_id: int,
     config: Union[Config, Dict[str, Any]],
     *,
-    allow_reprint: bool = False,
+    allow_reprint: bool,
 ) -> Dict[str, Any]:
-    """Send the job's G-code to the plotter."""
+    """Validate *job_id* for printing and bring it to QUEUED with G-code on disk."""
     job = get_job(job_id, admin=True)
     status = job["status"]
     allowed_statuses = {
@@ -569,10 +834,68 @@ def start_print_job(
                     raise QueueError("G-code not available for this job.")
                 obj.status = JobStatus.QUEUED.value
                 obj.error_message = None
+                if obj.metadata_json and "resume_from_line" in obj.metadata_json:
+                    obj.metadata_json = {k: v for k, v in obj.metadata_json.items() if k != "resume_from_line"}
+            _publish_status(job_id, JobStatus.QUEUED.value)
             job = get_job(job_id, admin=True)
         else:
             job = queue_for_printing(job_id, config)
 
+    if not job.get("gcode_path"):
+        raise QueueError("G-code not available for this job.")
+    return job
+
+
+def _claim_print_job(job_id: int) -> bool:
+    """Atomically move a QUEUED job to PRINTING; return False if it was not queued."""
+    now = datetime.utcnow()
+    with session_scope() as session:
+        claimed = (
+            session.query(Job)
+            .filter(Job.id == job_id, Job.status == JobStatus.QUEUED.value)
+            .update(
+                {Job.status: JobStatus.PRINTING.value, Job.started_at: now, Job.updated_at: now},
+                synchronize_session=False,
+            )
+        )
+    if claimed:
+        _publish_status(job_id, JobStatus.PRINTING.value)
+    return bool(claimed)
+
+
+def _print_claimed_job(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Stream a job already claimed with :func:`_claim_print_job` to the plotter."""
+    try:
+        _send_job_gcode(job_id, config)
+    except (QueueError, PlotterError) as exc:
+        if get_job(job_id)["status"] != JobStatus.CANCELLED.value:
+            if isinstance(exc, PlotterError):
+                _logger().exception("Plotter error while printing job %s: %s", job_id, exc)
+            mark_job_failed(job_id, str(exc))
+        raise
+
+    if get_job(job_id)["status"] == JobStatus.CANCELLED.value:
+        return get_job(job_id, admin=True)
+    _update_job_metadata(job_id, print_checkpoint=None)
+    return set_job_status(job_id, JobStatus.COMPLETED)
+
+
+def wire_program(
+    lines: Iterable[str],
+    config: Union[Config, Dict[str, Any]],
+) -> Tuple[Iterable[str], Optional[WireStats]]:
+    """Return *lines* as they should go over the serial link, plus the byte savings.
+
+    With ``WIRE_OPTIMIZE`` enabled each line is compacted on the fly (see
+    :mod:`services.gcode_wire`); the file on disk is left untouched.
+    """
+    if not _config_flag(config, "WIRE_OPTIMIZE", True):
+        return lines, None
+    return optimize_lines(lines, decimals=int(_config_value(config, "WIRE_DECIMALS", 3)))
+
+
+def _send_job_gcode(job_id: int, config: Union[Config, Dict[str, Any]]) -> None:
+    job = get_job(job_id, admin=True)
     gcode_path = job.get("gcode_path")
     if not gcode_path:
         raise QueueError("G-code not available for this job.")
@@ -580,81 +903,205 @@ def start_print_job(
 
     if _is_dry_run(config):
         _logger().info("Dry-run enabled; writing G-code to text file for job %s", job_id)
-        set_job_status(job_id, JobStatus.PRINTING)
         dry_run_path = gcode_file.with_suffix(".dryrun.txt")
-        dry_run_path.write_text(gcode_file.read_text(encoding="utf-8"), encoding="utf-8")
+        dry_run_path.write_text(render_gcode(gcode_file).read_text(encoding="utf-8"), encoding="utf-8")
+        return
+
+    if not program_exists(gcode_file):
+        raise QueueError("G-code file missing on disk.")
+    # Lines are read from the memory-mapped file as they are streamed, so a
+    # print holds one line in memory regardless of the program size.
+    with open_program(gcode_file) as gcode_lines:
+        _stream_job_program(job_id, job, gcode_lines, config)
+
+
+def _stream_job_program(
+    job_id: int,
+    job: Dict[str, Any],
+    gcode_lines: Union[GCodeProgram, CompiledProgram],
+    config: Union[Config, Dict[str, Any]],
+) -> None:
+    total_lines = len(gcode_lines)
+    if total_lines == 0:
+        raise QueueError("G-code file is empty.")
+
+    preamble: List[str] = []
+    start_line = 0
+    resume_from = (job.get("metadata") or {}).get("resume_from_line")
+    if resume_from:
+        _update_job_metadata(job_id, resume_from_line=None)
+        backoff = machine_profile_from_config(config).planner_blocks + 1
+        preamble, start_line, _ = resume_preamble(gcode_lines, int(resume_from), backoff=backoff)
+        _logger().info("Resuming job %s from line %s of %s", job_id, start_line, total_lines)
+    preamble_length = len(preamble)
+
+    program: Iterable[Union[str, bytes]]
+    if isinstance(gcode_lines, CompiledProgram):
+        # already in wire form; the preamble re-establishes the modal state it assumes
+        wire_preamble, _ = wire_program(preamble, config)
+        program = itertools.chain(wire_preamble, gcode_lines.iter_wire(start_line))
+        wire_stats: Optional[WireStats] = gcode_lines.wire_stats
     else:
-        # Access the config object correctly depending on whether it's a dict or object
-        if isinstance(config, dict):
-             timeout_value = float(config.get("SERIAL_TIMEOUT", 2.0))
-             port = config.get("SERIAL_PORT")
-             baudrate = int(config.get("SERIAL_BAUDRATE", 115200))
-             line_delay = float(config.get("PLOTTER_LINE_DELAY", 0.0))
-        else:
-             timeout_value = float(getattr(config, "SERIAL_TIMEOUT", 2.0))
-             port = getattr(config, "SERIAL_PORT")
-             baudrate = int(getattr(config, "SERIAL_BAUDRATE", 115200))
-             line_delay = float(getattr(config, "PLOTTER_LINE_DELAY", 0.0))
-
-        controller = PlotterController(
-            port=port,
-            baudrate=baudrate,
-            timeout=timeout_value,
-            line_delay=line_delay,
-        )
+        program, wire_stats = wire_program(itertools.chain(preamble, gcode_lines.iter_lines(start_line)), config)
+
+    def _report(program_idx: int) -> None:
+        _progress_store.update(job_id, start_line + max(0, program_idx - preamble_length))
+
+    def _print(controller: PlotterController) -> None:
+        _plotter_state.job_id = job_id
         _plotter_state.controller = controller
         _plotter_state.should_rehome_on_cancel = False
-
         progress_initialized = False
 
         try:
-            if not gcode_file.exists():
-                raise QueueError("G-code file missing on disk.")
-            with gcode_file.open("r", encoding="utf-8") as fp:
-                gcode_lines = fp.readlines()
-            total_lines = len(gcode_lines)
-            if total_lines == 0:
-                raise QueueError("G-code file is empty.")
-
-            _init_print_progress(job_id, total_lines)
+            _checkpoint_trackers[job_id] = (CheckpointTracker(gcode_lines), str(gcode_lines.path))
+            _progress_store.begin(job_id, gcode_lines.line_ends, start_line=start_line)
             progress_initialized = True
-            min_step = max(1, total_lines // 100)
-            last_reported = 0
-
-            def _progress_callback(line_idx: int) -> None:
-                nonlocal last_reported
-                if line_idx == total_lines or (line_idx - last_reported) >= min_step:
-                    _update_print_progress(
-                        job_id,
-                        current_line=line_idx,
-                        total_lines=total_lines,
-                    )
-                    last_reported = line_idx
-
-            controller.connect()
-            set_job_status(job_id, JobStatus.PRINTING)
-            controller.send_gcode_lines(
-                gcode_lines,
-                progress_callback=_progress_callback,
-            )
-        except PlotterError as exc:
-            _logger().exception("Plotter error while printing job %s: %s", job_id, exc)
-            mark_job_failed(job_id, str(exc))
-            raise
+            controller.send_gcode_lines(program, progress_callback=_report)
         finally:
+            cancel_latency = getattr(controller, "last_cancel_latency", None)
+            if cancel_latency is not None:
+                _update_job_metadata(job_id, cancel_latency_ms=round(cancel_latency * 1000, 1))
+            stream_stats = getattr(controller, "last_stream_stats", None)
+            if stream_stats is not None and stream_stats.lines:
+                _logger().info(
+                    "Job %s streamed %s lines at %.1f lines/s (%.1f syscalls/s)",
+                    job_id,
+                    stream_stats.lines,
+                    stream_stats.lines_per_second,
+                    stream_stats.syscalls_per_second,
+                )
+                _update_job_metadata(job_id, stream_stats=stream_stats.to_dict())
             try:
                 if _plotter_state.should_rehome_on_cancel:
                     controller.rehome()
             except PlotterError as rehome_exc:
                 _logger().warning("Failed to rehome after cancellation for job %s: %s", job_id, rehome_exc)
-            finally:
-                controller.disconnect()
             _plotter_state.controller = None
+            _plotter_state.job_id = None
             _plotter_state.should_rehome_on_cancel = False
             if progress_initialized:
-                _clear_print_progress(job_id)
+                last = _progress_store.get(job_id)
+                _progress_store.finish(job_id)
+                if last is not None:
+                    _update_job_metadata(job_id, print_checkpoint=_checkpoint_for(job_id, last["current_line"]))
+            _checkpoint_trackers.pop(job_id, None)
+            if wire_stats is not None and wire_stats.lines:
+                _logger().info(
+                    "Job %s sent %s of %s G-code bytes (%.1f%% saved)",
+                    job_id,
+                    wire_stats.wire_bytes,
+                    wire_stats.source_bytes,
+                    wire_stats.saved_percent,
+                )
+                _update_job_metadata(job_id, wire_stats=wire_stats.to_dict())
+
+    # The plotter service keeps the port open between jobs; PlotterController
+    # is resolved at call time so tests can substitute a fake controller.
+    service = get_plotter_service(config, controller_factory=PlotterController)
+    service.run(_print)
 
-    return set_job_status(job_id, JobStatus.COMPLETED)
+
+def start_print_job(
+    job_id: int,
+    config: Union[Config, Dict[str, Any]],
+    *,
+    allow_reprint: bool = False,
+) -> Dict[str, Any]:
+    """Send the job's G-code to the plotter and wait for the print to finish."""
+    _prepare_print_job(job_id, config, allow_reprint=allow_reprint)
+    if not _claim_print_job(job_id):
+        raise QueueError("Job is already printing.")
+    return _print_claimed_job(job_id, config)
+
+
+def resume_print_job(job_id: int, config: Union[Config, Dict[str, Any]]) -> Dict[str, Any]:
+    """Queue an interrupted print to continue from its last checkpoint.
+
+    The dispatcher lifts the pen, travels to the checkpoint, restores feed and
+    pen state and streams the rest of the same G-code file. The machine must
+    be homed in the same coordinate frame as the original print.
+    """
+    job = get_job(job_id, admin=True)
+    checkpoint = (job.get("metadata") or {}).get("print_checkpoint")
+    if not checkpoint:
+        raise QueueError("No checkpoint recorded for this job; reprint it instead.")
+    status = job["status"]
+    interrupted = status == JobStatus.PRINTING.value and _progress_store.get(job_id) is None
+    if status not in (JobStatus.FAILED.value, JobStatus.CANCELLED.value) and not interrupted:
+        raise QueueError("Only failed, cancelled or interrupted prints can be resumed.")
+    gcode_path = job.get("gcode_path")
+    if checkpoint.get("gcode_path") != gcode_path or not gcode_path or not program_exists(Path(gcode_path)):
+        raise QueueError("G-code changed since the checkpoint; reprint the job instead.")
+
+    with session_scope() as session:
+        obj = _touch_job(session, job_id)
+        obj.status = JobStatus.QUEUED.value
+        obj.error_message = None
+        obj.metadata_json = {**(obj.metadata_json or {}), "resume_from_line": int(checkpoint["line"])}
+    _publish_status(job_id, JobStatus.QUEUED.value)
+    get_print_dispatcher(config).notify()
+    return get_job(job_id, admin=True)
+
+
+def recover_interrupted_prints(lease_seconds: float = 60.0) -> List[int]:
+    """Mark PRINTING jobs whose print has stopped (e.g. after a restart) as failed.
+
+    A streaming print rewrites its progress at least every
+    ``_progress_store.heartbeat_interval`` seconds, bumping ``updated_at``.
+    Only jobs not streaming in this process and silent for *lease_seconds*
+    are recovered, so a print running in another process (a second worker
+    or a reloading dev server) is left alone. Printing itself still assumes
+    a single process owns the plotter.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=lease_seconds)
+    with session_scope() as session:
+        stale = [
+            job.id
+            for job in session.query(Job).filter(
+                Job.status == JobStatus.PRINTING.value, Job.updated_at < cutoff
+            )
+        ]
+    interrupted = [job_id for job_id in stale if _progress_store.get(job_id) is None]
+    for job_id in interrupted:
+        mark_job_failed(job_id, "Print interrupted before completion; resume it from the last checkpoint.")
+    return interrupted
+
+
+# Generation runs on this process's in-memory GenerationPool; work started earlier is gone.
+_process_started_at = datetime.utcnow()
+
+
+def recover_interrupted_generations() -> List[int]:
+    """Mark SUBMITTED/GENERATING jobs orphaned by a restart as failed.
+
+    Only jobs last updated before this process started are touched, so
+    generations still running here are left alone. They are failed rather
+    than resubmitted to avoid repeating paid Gemini calls unattended.
+    """
+    pending = [JobStatus.SUBMITTED.value, JobStatus.GENERATING.value]
+    with session_scope() as session:
+        stale = [
+            job.id
+            for job in session.query(Job).filter(
+                Job.status.in_(pending), Job.updated_at < _process_started_at
+            )
+        ]
+    for job_id in stale:
+        mark_job_failed(job_id, "Caricature generation was interrupted by a server restart; submit the photo again.")
+    return stale
+
+
+def enqueue_print_job(
+    job_id: int,
+    config: Union[Config, Dict[str, Any]],
+    *,
+    allow_reprint: bool = False,
+) -> Dict[str, Any]:
+    """Queue the job for the background print dispatcher and return immediately."""
+    job = _prepare_print_job(job_id, config, allow_reprint=allow_reprint)
+    get_print_dispatcher(config).notify()
+    return job
 
 
 def cancel_job(job_id: int) -> Dict[str, Any]:
@@ -663,21 +1110,30 @@ def cancel_job(job_id: int) -> Dict[str, Any]:
     if job["status"] in (JobStatus.COMPLETED.value, JobStatus.CANCELLED.value):
         return job
     set_job_status(job_id, JobStatus.CANCELLED)
-    _signal_plotter_cancel()
-    _clear_print_progress(job_id)
+    if not _signal_plotter_cancel(job_id):
+        # a streaming print finishes its own progress after writing its final checkpoint
+        _progress_store.finish(job_id)
     return get_job(job_id, admin=True)
 
 
-def _signal_plotter_cancel() -> None:
-    """Trigger cancellation on any active plotter controller."""
+def _signal_plotter_cancel(job_id: int) -> bool:
+    """Trigger cancellation on the active plotter controller if it is printing *job_id*.
+
+    Returns whether *job_id* is the job being streamed.
+    """
+    if _plotter_state.job_id != job_id:
+        return False  # queued behind the current print (or not printing at all)
     controller = getattr(_plotter_state, "controller", None)
     if controller:
         _plotter_state.should_rehome_on_cancel = True
         controller.request_cancel()
+    return True
 
 
 class _PlotterState:
     controller: Optional[PlotterController] = None
+    # the job the controller is streaming
+    job_id: Optional[int] = None
     should_rehome_on_cancel: bool = False
 
 
@@ -690,6 +1146,7 @@ def mark_job_failed(job_id: int, message: str) -> None:
         job = _touch_job(session, job_id)
         job.status = JobStatus.FAILED.value
         job.error_message = message[:512]
+    _publish_status(job_id, JobStatus.FAILED.value, message[:512])
 
 
 def get_generated_image_path(job_id: int) -> Path:
@@ -705,3 +1162,277 @@ def get_generated_image_path(job_id: int) -> Path:
             raise QueueError("Generated image missing from disk.")
         return path
 
+
+
+class GenerationPool:
+    """Run caricature generation on a fixed set of background threads.
+
+    Work waits in a bounded intake queue; :meth:`submit` raises
+    :class:`QueueFullError` rather than blocking the request thread when it is
+    full. Failures are logged; the work itself records them on the job.
+    """
+
+    def __init__(self, workers: int, queue_size: int, *, name: str = "generation"):
+        # Unbounded so shutdown sentinels never block; submit() enforces the limit.
+        self._tasks: "stdlib_queue.Queue[Optional[Callable[[], None]]]" = stdlib_queue.Queue()
+        self._capacity = max(1, queue_size)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"{name}-{index}", daemon=True) for index in range(max(1, workers))
+        ]
+        self._started = False
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    @property
+    def workers(self) -> int:
+        return len(self._threads)
+
+    @property
+    def pending(self) -> int:
+        """Return the number of submissions waiting for a free worker."""
+        return self._tasks.qsize()
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._started and not self._stopped:
+                self._started = True
+                for thread in self._threads:
+                    thread.start()
+
+    def submit(self, fn: Callable[[], None]) -> None:
+        """Queue *fn* for a worker thread."""
+        self.start()
+        with self._lock:
+            if self._stopped:
+                raise QueueError("Generation pool has been shut down.")
+            if self._tasks.qsize() >= self._capacity:
+                raise QueueFullError("Too many jobs are waiting for generation; please try again shortly.")
+            self._tasks.put(fn)
+
+    def join(self) -> None:
+        """Block until every submitted task has finished."""
+        self._tasks.join()
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop the workers once the queued work has drained."""
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            started = self._started
+        if not started:
+            return
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    def _run(self) -> None:
+        while True:
+            fn = self._tasks.get()
+            try:
+                if fn is None:
+                    return
+                fn()
+            except Exception:  # noqa: BLE001
+                logging.getLogger("services.queue").debug("Background generation task failed", exc_info=True)
+            finally:
+                self._tasks.task_done()
+
+
+_pool_lock = threading.Lock()
+_generation_pool: Optional[GenerationPool] = None
+_generation_pool_key: Optional[Tuple[int, int]] = None
+
+
+def get_generation_pool(config: Union[Config, Dict[str, Any]]) -> GenerationPool:
+    """Return the process-wide generation pool sized by *config*.
+
+    The pool is replaced (after its queued work drains) when
+    ``GENERATION_WORKERS`` or ``GENERATION_QUEUE_SIZE`` change.
+    """
+    global _generation_pool, _generation_pool_key
+
+    key = (
+        int(_config_value(config, "GENERATION_WORKERS", 2)),
+        int(_config_value(config, "GENERATION_QUEUE_SIZE", 16)),
+    )
+    with _pool_lock:
+        if _generation_pool is not None and _generation_pool_key == key:
+            return _generation_pool
+        previous = _generation_pool
+        _generation_pool = GenerationPool(*key)
+        _generation_pool_key = key
+    if previous is not None:
+        previous.shutdown(wait=False)
+    return _generation_pool
+
+
+def shutdown_generation_pool(*, wait: bool = False) -> None:
+    """Stop the shared generation pool, if any."""
+    global _generation_pool, _generation_pool_key
+
+    with _pool_lock:
+        pool, _generation_pool, _generation_pool_key = _generation_pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+atexit.register(shutdown_generation_pool)
+
+
+def _next_print_job(*, auto_advance: bool) -> Optional[int]:
+    """Return the oldest QUEUED job, or with *auto_advance* the oldest APPROVED one."""
+    with session_scope() as session:
+        # not updated_at: every metadata write (precompile, progress) bumps it
+        job = (
+            session.query(Job)
+            .filter(Job.status == JobStatus.QUEUED.value)
+            .order_by(Job.id)
+            .first()
+        )
+        if job is None and auto_advance:
+            job = (
+                session.query(Job)
+                .filter(Job.status == JobStatus.APPROVED.value)
+                .order_by(Job.approved_at, Job.id)
+                .first()
+            )
+        return job.id if job is not None else None
+
+
+class PrintDispatcher:
+    """Print queued jobs one after another on a background thread.
+
+    The thread takes the oldest QUEUED job, claims it and streams it through
+    the shared :class:`PlotterService`, then moves on to the next. With
+    ``PRINT_AUTO_ADVANCE`` enabled, APPROVED jobs are converted to G-code and
+    printed as well once nothing is queued. :meth:`notify` wakes the thread
+    early; otherwise the database is polled every ``poll_interval`` seconds.
+    Each poll also fails prints whose lease (``PRINT_LEASE_SECONDS``) expired
+    (see :func:`recover_interrupted_prints`); on startup it first fails
+    generations interrupted by the restart (see
+    :func:`recover_interrupted_generations`).
+
+    Only one process should run a dispatcher: the plotter has a single
+    serial port, and the dispatcher does not coordinate with other processes.
+    """
+
+    def __init__(self, config: Union[Config, Dict[str, Any]], *, poll_interval: float = 5.0):
+        self.config = config
+        self.poll_interval = poll_interval
+        self.current_job_id: Optional[int] = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="print-dispatcher", daemon=True)
+        self._started = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if not self._started and not self._stop.is_set():
+                self._started = True
+                self._thread.start()
+
+    def notify(self) -> None:
+        """Wake the dispatcher to look for queued work."""
+        self.start()
+        self._wake.set()
+
+    def run_pending(self) -> int:
+        """Print every job that is ready, in order; return how many were attempted."""
+        attempted = 0
+        while not self._stop.is_set():
+            auto_advance = _config_flag(self.config, "PRINT_AUTO_ADVANCE", False)
+            job_id = _next_print_job(auto_advance=auto_advance)
+            if job_id is None:
+                break
+            attempted += 1
+            self._dispatch(job_id)
+        return attempted
+
+    def shutdown(self, *, wait: bool = True) -> None:
+        """Stop after the current print finishes."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            started = self._started
+        if started and wait and threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def _dispatch(self, job_id: int) -> None:
+        self.current_job_id = job_id
+        try:
+            if get_job(job_id)["status"] == JobStatus.APPROVED.value:
+                queue_for_printing(job_id, self.config)
+            if _claim_print_job(job_id):
+                _print_claimed_job(job_id, self.config)
+        except (QueueError, PlotterError, gcode_service.GCodeError) as exc:
+            _logger().warning("Print dispatcher could not print job %s: %s", job_id, exc)
+            if get_job(job_id)["status"] in {JobStatus.QUEUED.value, JobStatus.APPROVED.value}:
+                mark_job_failed(job_id, str(exc))
+        except Exception as exc:  # noqa: BLE001
+            _logger().exception("Unexpected error while printing job %s: %s", job_id, exc)
+            mark_job_failed(job_id, str(exc))
+        finally:
+            self.current_job_id = None
+
+    def recover(self) -> List[int]:
+        """Fail prints whose lease expired; return their job ids."""
+        lease = float(_config_value(self.config, "PRINT_LEASE_SECONDS", 60.0))
+        recovered = recover_interrupted_prints(lease)
+        if recovered:
+            _logger().warning("Marked interrupted prints as failed: %s", recovered)
+        return recovered
+
+    def recover_generations(self) -> List[int]:
+        """Fail generations orphaned by a restart; return their job ids."""
+        recovered = recover_interrupted_generations()
+        if recovered:
+            _logger().warning("Marked interrupted generations as failed: %s", recovered)
+        return recovered
+
+    def _run(self) -> None:
+        try:
+            self.recover_generations()
+        except Exception:  # noqa: BLE001
+            _logger().exception("Generation recovery failed")
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.recover()
+                self.run_pending()
+            except Exception:  # noqa: BLE001
+                _logger().exception("Print dispatcher loop failed")
+            self._wake.wait(self.poll_interval)
+
+
+_dispatcher_lock = threading.Lock()
+_print_dispatcher: Optional[PrintDispatcher] = None
+
+
+def get_print_dispatcher(config: Union[Config, Dict[str, Any]]) -> PrintDispatcher:
+    """Return the process-wide print dispatcher, pointing it at *config*."""
+    global _print_dispatcher
+
+    with _dispatcher_lock:
+        if _print_dispatcher is None:
+            _print_dispatcher = PrintDispatcher(config)
+        else:
+            _print_dispatcher.config = config
+        return _print_dispatcher
+
+
+def shutdown_print_dispatcher(*, wait: bool = False) -> None:
+    """Stop the shared print dispatcher, if any."""
+    global _print_dispatcher
+
+    with _dispatcher_lock:
+        dispatcher, _print_dispatcher = _print_dispatcher, None
+    if dispatcher is not None:
+        dispatcher.shutdown(wait=wait)
+
+
+atexit.register(shutdown_print_dispatcher)
@@ -0,0 +1 @@
+"""pyserial URL protocol handlers (``serial_for_url``) provided by the app."""
@@ -0,0 +1,117 @@
+"""pyserial handler for ``grblsim://`` URLs backed by :mod:`services.grbl_sim`.
+
+URL format::
+
+    grblsim://[?option=value[&option=value...]]
+
+Options: ``speed`` (time scale, default 1), ``rx`` (RX buffer bytes, default
+128), ``planner`` (planner blocks, default 15), ``accel`` (mm/s^2, default
+500), ``max_rate`` (mm/min, default 5000), ``latency`` (seconds before a
+response reaches the host, default 0), ``numbered`` (``1`` to check
+Marlin-style line numbers and checksums), ``corrupt`` (corrupt every Nth
+received line) and ``drop_ok`` (lose every Nth ``ok``).
+"""
+
+from __future__ import annotations
+
+import urllib.parse
+
+from serial.serialutil import PortNotOpenError, SerialBase, SerialException, to_bytes
+
+from services.grbl_sim import GrblSimSettings, GrblSimulator
+
+def _flag(value: str) -> bool:
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+_OPTIONS = {
+    "speed": ("time_scale", float),
+    "rx": ("rx_buffer_size", int),
+    "planner": ("planner_blocks", int),
+    "accel": ("acceleration", float),
+    "max_rate": ("max_rate", float),
+    "latency": ("response_latency", float),
+    "numbered": ("line_numbers", _flag),
+    "corrupt": ("corrupt_every", int),
+    "drop_ok": ("drop_ok_every", int),
+}
+
+
+def settings_from_url(url: str) -> GrblSimSettings:
+    """Parse emulator settings from a ``grblsim://`` URL."""
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme != "grblsim":
+        raise SerialException(f"expected a grblsim:// URL, got {url!r}")
+    settings = GrblSimSettings()
+    for option, values in urllib.parse.parse_qs(parts.query, True).items():
+        if option not in _OPTIONS:
+            raise SerialException(f"unknown grblsim option: {option!r}")
+        attribute, cast = _OPTIONS[option]
+        try:
+            setattr(settings, attribute, cast(values[0]))
+        except ValueError as exc:
+            raise SerialException(f"invalid value for grblsim option {option!r}: {values[0]!r}") from exc
+    return settings
+
+
+class Serial(SerialBase):
+    """Serial port implementation that talks to an in-process GRBL emulator."""
+
+    def __init__(self, *args, **kwargs):
+        self.simulator: GrblSimulator | None = None
+        super().__init__(*args, **kwargs)
+
+    def open(self):
+        if self.is_open:
+            raise SerialException("Port is already open.")
+        if self._port is None:
+            raise SerialException("Port must be configured before it can be used.")
+        settings = settings_from_url(self.port)
+        settings.baudrate = self._baudrate
+        self.simulator = GrblSimulator(settings)
+        self.simulator.start()
+        self.is_open = True
+
+    def close(self):
+        if self.simulator is not None:
+            self.simulator.stop()
+        self.is_open = False
+
+    def _reconfigure_port(self):
+        if self.simulator is not None:
+            self.simulator.settings.baudrate = self._baudrate
+
+    @property
+    def in_waiting(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self.simulator.out_waiting
+
+    def read(self, size=1):
+        if not self.is_open:
+            raise PortNotOpenError()
+        return self.simulator.read(size, self._timeout)
+
+    def write(self, data):
+        if not self.is_open:
+            raise PortNotOpenError()
+        data = to_bytes(data)
+        self.simulator.receive(data)
+        return len(data)
+
+    def flush(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    def reset_input_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+        self.simulator.clear_output()
+
+    def reset_output_buffer(self):
+        if not self.is_open:
+            raise PortNotOpenError()
+
+    def cancel_read(self):
+        if self.simulator is not None:
+            self.simulator.cancel_read()
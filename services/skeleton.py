@@ -0,0 +1,167 @@
+"""Skeletonization of binary stroke masks and tracing of the resulting pixel graph."""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+from scipy import ndimage
+
+
+def _thinning_lut(step: int) -> np.ndarray:
+    """Return the Zhang-Suen removal table for *step*, indexed by neighbourhood code.
+
+    Bit ``i`` of the code is neighbour ``P(i + 2)`` in Zhang-Suen notation, i.e.
+    ``NEIGHBOR_OFFSETS[i]`` (clockwise from north).
+    """
+    table = np.zeros(256, dtype=bool)
+    for code in range(256):
+        n = [(code >> i) & 1 for i in range(8)]
+        transitions = sum(n[i] == 0 and n[(i + 1) % 8] == 1 for i in range(8))
+        if not (2 <= sum(n) <= 6 and transitions == 1):
+            continue
+        if step == 0:
+            if n[0] * n[2] * n[4] or n[2] * n[4] * n[6]:
+                continue
+        elif n[0] * n[2] * n[6] or n[0] * n[4] * n[6]:
+            continue
+        table[code] = True
+    return table
+
+
+def zhang_suen_thinning(mask: np.ndarray, iterations: int | None = 20) -> np.ndarray:
+    """Perform Zhang-Suen thinning to produce a 1px-wide skeleton.
+
+    Each sub-step packs the eight neighbour planes of every interior pixel into
+    an 8-bit code with array shifts and looks the removal decision up in a
+    precomputed table. Border pixels are never removed.
+    """
+    binary = (np.asarray(mask).astype(np.uint8) != 0).astype(np.uint8)
+    rows, cols = binary.shape
+    if rows < 3 or cols < 3:
+        return binary.astype(bool)
+
+    interior = binary[1:-1, 1:-1]
+    code = np.empty(interior.shape, dtype=np.uint8)
+    plane = np.empty(interior.shape, dtype=np.uint8)
+
+    changed = True
+    iter_count = 0
+    while changed and (iterations is None or iter_count < iterations):
+        changed = False
+        iter_count += 1
+        for lut in _THINNING_LUTS:
+            code.fill(0)
+            for bit, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+                np.left_shift(binary[1 + dy : rows - 1 + dy, 1 + dx : cols - 1 + dx], bit, out=plane)
+                code |= plane
+            remove = lut[code]
+            remove &= interior.astype(bool)
+            if remove.any():
+                changed = True
+                interior[remove] = 0
+
+    return binary.astype(bool)
+
+
+NEIGHBOR_OFFSETS = [
+    (-1, 0),
+    (-1, 1),
+    (0, 1),
+    (1, 1),
+    (1, 0),
+    (1, -1),
+    (0, -1),
+    (-1, -1),
+]
+
+_THINNING_LUTS = (_thinning_lut(0), _thinning_lut(1))
+
+
+def skeleton_graph(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index the pixels of a skeleton and their neighbours.
+
+    Returns ``(coords, adjacency)`` where ``coords`` holds the ``(row, col)`` of
+    every set pixel and ``adjacency[i, k]`` is the index of the pixel at
+    ``NEIGHBOR_OFFSETS[k]`` from pixel ``i``, or ``-1``. Diagonal links are
+    dropped when the two pixels already touch through a shared 4-neighbour, so
+    staircase corners do not show up as junctions.
+    """
+    coords = np.argwhere(mask)
+    padded = np.pad(mask.astype(bool), 1)
+    index = np.full(padded.shape, -1, dtype=np.int64)
+    ys = coords[:, 0] + 1
+    xs = coords[:, 1] + 1
+    index[ys, xs] = np.arange(len(coords))
+
+    adjacency = np.full((len(coords), 8), -1, dtype=np.int64)
+    for k, (dy, dx) in enumerate(NEIGHBOR_OFFSETS):
+        linked = padded[ys + dy, xs + dx]
+        if dy and dx:
+            linked &= ~padded[ys + dy, xs] & ~padded[ys, xs + dx]
+        adjacency[:, k] = np.where(linked, index[ys + dy, xs + dx], -1)
+    return coords, adjacency
+
+
+def extract_paths(mask: np.ndarray, point_skip: int) -> List[List[Tuple[int, int]]]:
+    """Extract continuous paths from a skeleton mask.
+
+    Pixels with other than two neighbours (endpoints and junctions) are graph
+    nodes; every run of two-neighbour pixels between nodes becomes one path, so
+    polylines split at branch points. Closed loops without any node are traced
+    last. Each pixel is visited a constant number of times.
+    """
+    coords, adjacency = skeleton_graph(mask)
+    points = [(int(y), int(x)) for y, x in coords.tolist()]
+    neighbors = [[j for j in row if j >= 0] for row in adjacency.tolist()]
+    degree = [len(n) for n in neighbors]
+    visited = bytearray(len(points))
+    linked_nodes = set()
+
+    def _walk(start: int, first: int) -> List[int]:
+        chain = [start, first]
+        prev, current = start, first
+        while degree[current] == 2 and current != start:
+            visited[current] = 1
+            a, b = neighbors[current]
+            prev, current = current, (b if a == prev else a)
+            chain.append(current)
+        return chain
+
+    chains: List[List[int]] = []
+    for node in range(len(points)):
+        if degree[node] == 2:
+            continue
+        for neighbor in neighbors[node]:
+            if degree[neighbor] == 2:
+                if visited[neighbor]:
+                    continue
+            else:
+                link = (min(node, neighbor), max(node, neighbor))
+                if link in linked_nodes:
+                    continue
+                linked_nodes.add(link)
+            chains.append(_walk(node, neighbor))
+
+    for pixel in range(len(points)):
+        if degree[pixel] == 2 and not visited[pixel]:
+            visited[pixel] = 1
+            chains.append(_walk(pixel, neighbors[pixel][0]))
+
+    paths: List[List[Tuple[int, int]]] = []
+    for chain in chains:
+        path = [points[i] for i in chain]
+        if point_skip > 1:
+            path = path[::point_skip]
+        if len(path) >= 2:
+            paths.append(path)
+    return paths
+
+
+def stroke_width_map(mask: np.ndarray) -> np.ndarray:
+    """Approximate stroke width at every pixel: twice the distance to the background.
+
+    Sampled at skeleton pixels this gives the width of the stroke along its
+    medial axis.
+    """
+    return 2.0 * ndimage.distance_transform_edt(mask)
@@ -0,0 +1,13 @@
+"""G-code stream modes understood by :class:`services.plotter.PlotterController`.
+
+Kept free of imports so ``config`` and ``services.print_time`` can share
+the default without a circular import through ``services.plotter``.
+"""
+
+STREAM_MODE_PING_PONG = "ping-pong"
+STREAM_MODE_CHAR_COUNT = "char-count"
+STREAM_MODE_NUMBERED = "numbered"
+STREAM_MODES = (STREAM_MODE_PING_PONG, STREAM_MODE_CHAR_COUNT, STREAM_MODE_NUMBERED)
+
+# Used when PLOTTER_STREAM_MODE is not configured.
+DEFAULT_STREAM_MODE = STREAM_MODE_CHAR_COUNT
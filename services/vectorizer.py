@@ -3,53 +3,105 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import numpy as np
 from PIL import Image
 from skimage import measure
 
+from services import geometry
+from services.skeleton import extract_paths, stroke_width_map, zhang_suen_thinning
+
 Point = Tuple[float, float]
 
+VECTORIZE_MODE_CONTOUR = "contour"
+VECTORIZE_MODE_CENTERLINE = "centerline"
+VECTORIZE_MODES = (VECTORIZE_MODE_CONTOUR, VECTORIZE_MODE_CENTERLINE)
 
-@dataclass
-class VectorData:
-    """Container for traced vector paths."""
 
-    width: int
-    height: int
-    paths: List[List[Point]]
+class PathView(Sequence[np.ndarray]):
+    """Read-only sequence of per-path ``(k, 2)`` views into a :class:`VectorData`."""
 
+    __slots__ = ("_points", "_offsets")
 
-def _rdp(points: Sequence[Point], epsilon: float) -> List[Point]:
-    """Ramer-Douglas-Peucker simplification."""
-    if len(points) < 3 or epsilon <= 0:
-        return list(points)
+    def __init__(self, points: np.ndarray, offsets: np.ndarray):
+        self._points = points
+        self._offsets = offsets
 
-    start, end = np.array(points[0]), np.array(points[-1])
-    line = end - start
-    if np.allclose(line, 0):
-        distances = np.linalg.norm(np.array(points) - start, axis=1)
-    else:
-        line_norm = np.linalg.norm(line)
-        distances = np.abs(np.cross(line, np.array(points) - start)) / line_norm
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
 
-    idx = int(np.argmax(distances))
-    max_distance = distances[idx]
-    if max_distance <= epsilon:
-        return [points[0], points[-1]]
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        count = len(self)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("path index out of range")
+        return self._points[self._offsets[index] : self._offsets[index + 1]]
 
-    first_half = _rdp(points[: idx + 1], epsilon)
-    second_half = _rdp(points[idx:], epsilon)
-    return first_half[:-1] + second_half
+    def __iter__(self) -> Iterator[np.ndarray]:
+        points = self._points
+        bounds = self._offsets.tolist()
+        for start, stop in zip(bounds, bounds[1:]):
+            yield points[start:stop]
 
 
-def _downsample(points: Sequence[Point], step: int) -> List[Point]:
-    if step <= 1:
-        return list(points)
-    return list(points)[:: step]
+class VectorData:
+    """Traced vector paths stored column-wise.
+
+    All vertices live in one contiguous ``(N, 2)`` float array, ``points``;
+    ``offsets`` holds ``path_count + 1`` indices so path ``i`` is
+    ``points[offsets[i]:offsets[i + 1]]``. ``paths`` exposes the same data as
+    a sequence of zero-copy per-path arrays for code that walks paths one by
+    one. Either ``paths`` or ``points`` and ``offsets`` may be passed in.
+    ``widths`` optionally holds a stroke width per point (centerline mode).
+    """
+
+    __slots__ = ("width", "height", "points", "offsets", "widths")
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        paths: Optional[Iterable[Sequence[Point]]] = None,
+        *,
+        points: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        widths: Optional[np.ndarray] = None,
+    ):
+        self.width = width
+        self.height = height
+        self.widths = None if widths is None else np.asarray(widths, dtype=float).reshape(-1)
+        if points is not None or offsets is not None:
+            if paths is not None:
+                raise TypeError("Pass either paths or points/offsets, not both.")
+            self.points = geometry.as_points(points if points is not None else [])
+            self.offsets = np.asarray(offsets if offsets is not None else [0, len(self.points)], dtype=np.int64)
+        else:
+            arrays = [geometry.as_points(path) for path in (paths or [])]
+            lengths = [len(array) for array in arrays]
+            self.points = np.concatenate(arrays) if arrays else np.empty((0, 2), dtype=float)
+            self.offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=self.offsets[1:])
+        if self.widths is not None and len(self.widths) != len(self.points):
+            raise ValueError("widths must have one entry per point.")
+
+    @property
+    def paths(self) -> PathView:
+        return PathView(self.points, self.offsets)
+
+    @property
+    def path_count(self) -> int:
+        return len(self.offsets) - 1
+
+    def __repr__(self) -> str:
+        return (
+            f"VectorData(width={self.width}, height={self.height}, "
+            f"paths={self.path_count}, points={len(self.points)})"
+        )
 
 
 def vectorize_image(
@@ -59,24 +111,44 @@ def vectorize_image(
     simplify_tolerance: float = 2.0,
     min_path_points: int = 24,
     downsample_step: int = 1,
+    mode: str = VECTORIZE_MODE_CONTOUR,
+    with_widths: bool = False,
 ) -> VectorData:
-    """Convert a black/white PNG into vector paths using contour tracing."""
+    """Convert a black/white PNG into vector paths.
+
+    ``contour`` mode traces the outline of every stroke, so a thick line
+    becomes two paths, one per edge. ``centerline`` mode thins the stroke mask
+    to a skeleton and traces one polyline along each stroke's medial axis;
+    with ``with_widths`` the stroke width at every kept point is recorded.
+    """
+    if mode not in VECTORIZE_MODES:
+        raise ValueError(f"Unknown vectorize mode {mode!r}; expected one of {', '.join(VECTORIZE_MODES)}.")
 
     image = Image.open(image_path).convert("L")
     width, height = image.size
     arr = np.array(image)
     mask = arr < threshold  # True for strokes
 
+    if mode == VECTORIZE_MODE_CENTERLINE:
+        return _vectorize_centerline(
+            mask,
+            simplify_tolerance=simplify_tolerance,
+            min_path_points=min_path_points,
+            downsample_step=downsample_step,
+            with_widths=with_widths,
+        )
+
     # skimage coordinates are (row, col); convert to (x, y) later
     contours = measure.find_contours(mask.astype(float), 0.5)
-    paths: List[List[Point]] = []
+    paths: List[np.ndarray] = []
 
     for contour in contours:
         # contour is N x 2 array of [row, col]
         if contour.shape[0] < min_path_points:
             continue
-        simplified = _rdp([(c[1], c[0]) for c in contour], simplify_tolerance)
-        simplified = _downsample(simplified, downsample_step)
+        simplified = geometry.simplify_rdp(contour[:, ::-1], simplify_tolerance)
+        if downsample_step > 1:
+            simplified = simplified[::downsample_step]
         if len(simplified) < min_path_points // 2:
             continue
         paths.append(simplified)
@@ -84,6 +156,43 @@ def vectorize_image(
     return VectorData(width=width, height=height, paths=paths)
 
 
+def _vectorize_centerline(
+    mask: np.ndarray,
+    *,
+    simplify_tolerance: float,
+    min_path_points: int,
+    downsample_step: int,
+    with_widths: bool,
+) -> VectorData:
+    height, width = mask.shape
+    # pad so strokes touching the border thin like any other (border pixels are never removed)
+    skeleton = zhang_suen_thinning(np.pad(mask, 1), iterations=None)[1:-1, 1:-1]
+    width_map = stroke_width_map(mask) if with_widths else None
+
+    # a skeleton is about half as long as the outline of the same stroke
+    min_length = max(2, min_path_points // 2)
+    paths: List[np.ndarray] = []
+    widths: List[np.ndarray] = []
+    for pixels in extract_paths(skeleton, point_skip=1):
+        if len(pixels) < min_length:
+            continue
+        rows_cols = np.asarray(pixels, dtype=np.int64)
+        xy = rows_cols[:, ::-1].astype(float)
+        kept = np.flatnonzero(geometry.rdp_keep_mask(xy, simplify_tolerance))
+        if downsample_step > 1:
+            kept = kept[::downsample_step]
+        if len(kept) < 2:
+            continue
+        paths.append(xy[kept])
+        if width_map is not None:
+            widths.append(width_map[rows_cols[kept, 0], rows_cols[kept, 1]])
+
+    point_widths = None
+    if width_map is not None:
+        point_widths = np.concatenate(widths) if widths else np.empty(0)
+    return VectorData(width=width, height=height, paths=paths, widths=point_widths)
+
+
 def crop_and_scale_vector_data(
     data: VectorData,
     *,
@@ -92,23 +201,11 @@ def crop_and_scale_vector_data(
 ) -> VectorData:
     """Trim extra whitespace and scale vectors to fill the target dimension."""
 
-    if not data.paths:
-        return data
-
-    all_x: List[float] = []
-    all_y: List[float] = []
-    for path in data.paths:
-        for x, y in path:
-            all_x.append(float(x))
-            all_y.append(float(y))
-
-    if not all_x or not all_y:
+    if data.path_count == 0 or len(data.points) == 0:
         return data
 
-    min_x = min(all_x)
-    max_x = max(all_x)
-    min_y = min(all_y)
-    max_y = max(all_y)
+    min_x, min_y = data.points.min(axis=0).tolist()
+    max_x, max_y = data.points.max(axis=0).tolist()
 
     content_width = max_x - min_x
     content_height = max_y - min_y
@@ -134,24 +231,32 @@ def crop_and_scale_vector_data(
     if target and max_extent > 0:
         scale = target / max_extent
 
-    scaled_paths: List[List[Point]] = []
-    for path in data.paths:
-        scaled_paths.append(
-            [((x - crop_min_x) * scale, (y - crop_min_y) * scale) for x, y in path]
-        )
+    scaled_points = (data.points - (crop_min_x, crop_min_y)) * scale
+    scaled_widths = None if data.widths is None else data.widths * scale
 
     scaled_width = max(1, int(round(new_width * scale)))
     scaled_height = max(1, int(round(new_height * scale)))
 
-    return VectorData(width=scaled_width, height=scaled_height, paths=scaled_paths)
+    return VectorData(
+        width=scaled_width,
+        height=scaled_height,
+        points=scaled_points,
+        offsets=data.offsets,
+        widths=scaled_widths,
+    )
 
 
 def save_vector_data(data: VectorData, output_path: Path) -> Path:
+    points = data.points.tolist()
+    bounds = data.offsets.tolist()
     payload = {
         "width": data.width,
         "height": data.height,
-        "paths": [[[float(x), float(y)] for x, y in path] for path in data.paths],
+        "paths": [points[start:stop] for start, stop in zip(bounds, bounds[1:])],
     }
+    if data.widths is not None:
+        widths = data.widths.tolist()
+        payload["widths"] = [widths[start:stop] for start, stop in zip(bounds, bounds[1:])]
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(json.dumps(payload), encoding="utf-8")
     return output_path
@@ -159,14 +264,17 @@ def save_vector_data(data: VectorData, output_path: Path) -> Path:
 
 def load_vector_data(path: Path) -> VectorData:
     payload = json.loads(path.read_text(encoding="utf-8"))
-    paths = [
-        [(float(x), float(y)) for x, y in path_points]
-        for path_points in payload.get("paths", [])
-    ]
+    raw_paths = payload.get("paths", [])
+    offsets = np.zeros(len(raw_paths) + 1, dtype=np.int64)
+    np.cumsum([len(points) for points in raw_paths], out=offsets[1:])
+    flat = [point for points in raw_paths for point in points]
+    raw_widths = payload.get("widths")
     return VectorData(
         width=int(payload.get("width", 0)),
         height=int(payload.get("height", 0)),
-        paths=paths,
+        points=np.array(flat, dtype=float).reshape(-1, 2),
+        offsets=offsets,
+        widths=None if raw_widths is None else [w for path_widths in raw_widths for w in path_widths],
     )
 
 
@@ -181,13 +289,10 @@ def save_svg(data: VectorData, output_path: Path, *, stroke_px: float = 3.0) ->
     for path in data.paths:
         if len(path) < 2:
             continue
-        d = " ".join(
-            ["M {:.2f} {:.2f}".format(*path[0])]
-            + ["L {:.2f} {:.2f}".format(x, y) for x, y in path[1:]]
-        )
+        (x0, y0), *rest = path.tolist()
+        d = " ".join(["M {:.2f} {:.2f}".format(x0, y0)] + ["L {:.2f} {:.2f}".format(x, y) for x, y in rest])
         svg_lines.append(f'<path d="{d}" />')
 
     svg_lines.append("</svg>")
     output_path.write_text("\n".join(svg_lines), encoding="utf-8")
     return output_path
-
@@ -46,6 +46,8 @@
       const canStart = ["generated", "approved", "confirmed", "queued"].includes(status);
       const canReprint = status !== "printing" && status !== "queued";
       const canCancel = !["completed", "cancelled"].includes(status);
+      const checkpoint = job.metadata?.print_checkpoint;
+      const canResume = Boolean(checkpoint) && ["failed", "cancelled"].includes(status);
 
       if (!activePrintJob && status === "printing") {
         activePrintJob = job;
@@ -63,6 +65,7 @@
           <div style="display: flex; gap: 0.5rem; flex-wrap: wrap;">
             <button data-action="start" data-id="${job.id}" ${!canStart ? "disabled" : ""}>Start</button>
             <button class="secondary" data-action="reprint" data-id="${job.id}" ${!canReprint ? "disabled" : ""}>Reprint</button>
+            ${canResume ? `<button class="secondary" data-action="resume" data-id="${job.id}" title="Continue from line ${checkpoint.line} of ${checkpoint.total_lines}">Resume</button>` : ""}
             <button class="danger" data-action="cancel" data-id="${job.id}" ${!canCancel ? "disabled" : ""}>Cancel</button>
           </div>
         </td>
@@ -119,6 +122,7 @@
     }
     const totalLines = overlayJobData.totalLines || 0;
     const currentLine = overlayJobData.currentLine || 0;
+    const etaSeconds = overlayJobData.etaSeconds;
 
     let progress = 0;
     if (totalLines > 0) {
@@ -129,7 +133,8 @@
       overlayBarEl.style.width = `${(progress * 100).toFixed(1)}%`;
     }
     if (overlayPercentEl) {
-      overlayPercentEl.textContent = `${Math.round(progress * 100)}%`;
+      const eta = Number.isFinite(etaSeconds) ? ` · ${Math.max(1, Math.ceil(etaSeconds / 60))} min left` : "";
+      overlayPercentEl.textContent = `${Math.round(progress * 100)}%${eta}`;
     }
   }
 
@@ -162,6 +167,7 @@
       id: job.id,
       totalLines,
       currentLine,
+      etaSeconds: progressMeta.eta_seconds ?? null,
     };
 
     overlayEl.removeAttribute("hidden");
@@ -194,8 +200,44 @@
     });
   }
 
-  // Poll queue frequently for near-live updates
-  setInterval(fetchQueue, POLL_INTERVAL_MS);
+  // Live updates arrive as Server-Sent Events; poll only while the stream is down
+  let eventsConnected = false;
+  let refreshTimer = null;
+
+  function scheduleRefresh() {
+    if (refreshTimer) return;
+    refreshTimer = setTimeout(() => {
+      refreshTimer = null;
+      fetchQueue();
+    }, 250);
+  }
+
+  function connectEvents() {
+    if (!("EventSource" in window)) return;
+    const source = new EventSource("/api/admin/events");
+    source.addEventListener("open", () => {
+      eventsConnected = true;
+      scheduleRefresh();
+    });
+    source.addEventListener("error", () => {
+      eventsConnected = false;
+    });
+    source.addEventListener("job", scheduleRefresh);
+    source.addEventListener("reset", scheduleRefresh);
+    source.addEventListener("progress", (event) => {
+      const update = JSON.parse(event.data);
+      if (!overlayJobData || overlayJobData.id !== update.id || !update.print_progress) return;
+      overlayJobData.totalLines = Number.parseInt(update.print_progress.total_lines, 10) || overlayJobData.totalLines;
+      overlayJobData.currentLine = Number.parseInt(update.print_progress.current_line, 10) || 0;
+      overlayJobData.etaSeconds = update.print_progress.eta_seconds ?? null;
+      updateOverlayDisplay();
+    });
+  }
+
+  setInterval(() => {
+    if (!eventsConnected) fetchQueue();
+  }, POLL_INTERVAL_MS);
+  connectEvents();
   fetchQueue();
 
   const uploadForm = document.getElementById("manual-upload-form");
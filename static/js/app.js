@@ -139,26 +139,56 @@
     }
   }
 
+  function openJobEvents(jobId) {
+    // Server-Sent Events wake the status check as soon as the job changes
+    if (!("EventSource" in window)) return null;
+    const source = new EventSource(`/api/events?job_id=${jobId}`);
+    const waiters = new Set();
+    const wake = () => {
+      waiters.forEach((resolve) => resolve());
+      waiters.clear();
+    };
+    source.addEventListener("job", wake);
+    source.addEventListener("reset", wake);
+    return {
+      get connected() {
+        return source.readyState === EventSource.OPEN;
+      },
+      next(timeoutMs) {
+        return new Promise((resolve) => {
+          const timer = setTimeout(resolve, timeoutMs);
+          waiters.add(() => {
+            clearTimeout(timer);
+            resolve();
+          });
+        });
+      },
+      close() {
+        source.close();
+        wake();
+      },
+    };
+  }
+
   async function loadPreview(jobId) {
+    const jobEvents = openJobEvents(jobId);
     try {
-      // Poll for status until generated
-      let attempts = 0;
-      const maxAttempts = 30; // 30 * 2s = 60s timeout
-      
-      const checkStatus = async () => {
-        if (attempts >= maxAttempts) throw new Error("Generation timed out");
-        
+      // Generation runs in the background; check the status on every event,
+      // falling back to polling every 2s while the event stream is down
+      const deadline = Date.now() + 180000; // 3 min covers queueing and a Gemini retry
+
+      while (Date.now() < deadline) {
         const response = await fetch(`/api/jobs/${jobId}`);
         if (!response.ok) throw new Error("Failed to check status");
         const job = await response.json();
-        
+
         if (job.status === "generated") {
             // Load image
             const imgResponse = await fetch(`/api/jobs/${jobId}/preview`);
             if (!imgResponse.ok) throw new Error("Failed to load preview");
             const blob = await imgResponse.blob();
             generatedPreview.src = URL.createObjectURL(blob);
-            
+
             previewSection.hidden = false;
             layoutGrid?.classList.add("has-preview");
             captureBtn.disabled = true;
@@ -169,18 +199,22 @@
         } else if (job.status === "failed") {
             throw new Error("Generation failed: " + (job.error_message || "Unknown error"));
         }
-        
-        attempts++;
-        setTimeout(checkStatus, 2000);
-      };
-      
-      checkStatus();
-      
+
+        submitBtn.textContent = job.status === "submitted" ? "Waiting in line..." : "Generating...";
+        if (jobEvents?.connected) {
+          await jobEvents.next(15000);
+        } else {
+          await new Promise((resolve) => setTimeout(resolve, 2000));
+        }
+      }
+      throw new Error("Generation timed out");
     } catch (err) {
       console.error(err);
       alert("Could not load preview: " + err.message);
       submitBtn.disabled = false;
       submitBtn.textContent = "Generate";
+    } finally {
+      jobEvents?.close();
     }
   }
 
@@ -0,0 +1,45 @@
+from services.checkpoint import CheckpointTracker, modal_state, resume_preamble
+
+PROGRAM = [
+    "G21\n",
+    "G90\n",
+    "G0 X10.00 Y10.00 ; move to start\n",
+    "F3000 ; set feed rate\n",
+    "M3 S90 ; pen down\n",
+    "G4 P0.05 ; dwell\n",
+    "G1 X20.00 Y10.00\n",
+    "G1 X20.00 Y20.00\n",
+    "G1 X10.00 Y20.00\n",
+    "M5 ; pen up\n",
+    "G0 X0.00 Y0.00 ; return to origin\n",
+]
+
+
+def test_modal_state_tracks_position_feed_and_pen():
+    state = modal_state(PROGRAM[:8])
+
+    assert (state.x, state.y) == (20.0, 20.0)
+    assert state.feed == 3000
+    assert state.motion_mode == 1
+    assert state.pen_down
+    assert state.pen_command == "M3 S90"
+    assert state.pen_dwell == "G4 P0.05"
+    assert not modal_state(PROGRAM[:10]).pen_down
+
+
+def test_resume_preamble_restores_state_before_continuing():
+    preamble, start, state = resume_preamble(PROGRAM, acknowledged=9, backoff=1)
+
+    assert start == 8
+    assert [line.split(";")[0].strip() for line in preamble] == ["G90", "M5", "G4 P0.50", "G0 X20.00 Y20.00", "G1 F3000", "M3 S90", "G4 P0.05"]
+    assert state.pen_down
+
+
+def test_tracker_checkpoints_advance_incrementally():
+    tracker = CheckpointTracker(PROGRAM)
+
+    first = tracker.checkpoint(7)
+    second = tracker.checkpoint(10)
+    assert (first["line"], first["state"]["x"], first["state"]["pen_down"]) == (7, 20.0, True)
+    assert (second["line"], second["state"]["y"], second["state"]["pen_down"]) == (10, 20.0, False)
+    assert tracker.checkpoint(3)["line"] == 10
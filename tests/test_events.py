@@ -0,0 +1,67 @@
+import json
+
+from services import events, queue
+
+
+def _messages(chunks):
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            parsed.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def test_bus_resumes_after_last_id_and_reports_gaps():
+    bus = events.EventBus(capacity=3)
+    start = bus.last_id
+    published = [bus.publish("job", {"id": n}) for n in range(5)]
+
+    newer, gap = bus.since(published[2].id)
+    assert [event.data["id"] for event in newer] == [3, 4]
+    assert not gap
+
+    oldest, gap = bus.since(start)
+    assert gap
+    assert [event.data["id"] for event in oldest] == [2, 3, 4]
+    assert bus.since(None) == ([], False)
+
+
+def test_sse_stream_filters_and_hides_admin_fields():
+    bus = events.EventBus()
+    resume_from = bus.last_id
+    bus.publish("job", {"id": 1, "status": "failed"}, {"error_message": "boom"})
+    bus.publish("job", {"id": 2, "status": "generated"})
+
+    stream = events.sse_stream(bus, last_id=resume_from, max_duration=0.2, keepalive=0.05,
+                               accept=lambda event: event.data["id"] == 1)
+    public = _messages(stream)
+    assert [(kind, data) for _, kind, data in public] == [("job", {"id": 1, "status": "failed"})]
+
+    admin = _messages(events.sse_stream(bus, last_id=resume_from, admin=True, max_duration=0.2, keepalive=0.05))
+    assert admin[0][2]["error_message"] == "boom"
+    assert [event_id for event_id, _, _ in admin] == [resume_from + 1, resume_from + 2]
+
+
+def test_queue_status_changes_are_published(test_storage, sample_upload):
+    class StubGemini:
+        def generate_caricature(self, image_bytes, prompt=None):
+            return image_bytes
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    bus = events.get_event_bus()
+    before = bus.last_id
+    job = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )
+    queue.mark_job_failed(job["id"], "printer on fire")
+
+    published, _ = bus.since(before)
+    mine = [event for event in published if event.data.get("id") == job["id"]]
+    assert [event.data["status"] for event in mine] == ["submitted", "generating", "generated", "failed"]
+    assert mine[-1].admin_data == {"error_message": "printer on fire"}
@@ -0,0 +1,39 @@
+from services.gcode_compiled import CompiledProgram, open_program, render_gcode, write_compiled
+from services.gcode_wire import optimize_lines
+
+SOURCE = [
+    "G0 X10.00 Y-10.25 ; move to start",
+    "F5000 ; set feed rate",
+    "M3 S90 ; pen down",
+    "G4 P0.05 ; dwell",
+    "G1 X20.00 Y-10.25",
+    "G1 X20.00 Y20.10",
+    "M5 ; pen up",
+    "G4 P0.05 ; dwell",
+    "G0 X0.00 Y0.00 ; return to origin",
+    "G4 P2.0 ; long dwell for home completion",
+    "M5 ; pen up",
+]
+
+
+def test_compiled_program_renders_text_and_streams_wire_bytes(tmp_path):
+    gcode_path = tmp_path / "job.gcode"
+    compiled = write_compiled(gcode_path, SOURCE)
+    assert not gcode_path.exists()
+
+    with open_program(gcode_path) as program:
+        assert isinstance(program, CompiledProgram)
+        assert len(program) == len(SOURCE)
+        assert [line.rstrip("\n") for line in program] == SOURCE
+        assert list(program[4:6]) == ["G1 X20.00 Y-10.25\n", "G1 X20.00 Y20.10\n"]
+
+        expected, stats = optimize_lines(SOURCE)
+        expected = [(line + "\n").encode() if line else b"" for line in expected]
+        assert list(program.iter_wire()) == expected
+        assert list(program.iter_wire(5)) == expected[5:]
+        assert program.total_bytes == stats.wire_bytes == int(program.line_ends[-1])
+        assert program.wire_stats.saved_bytes == stats.saved_bytes
+
+    render_gcode(gcode_path)
+    assert gcode_path.read_text(encoding="utf-8") == "\n".join(SOURCE)
+    assert compiled.exists()
@@ -0,0 +1,37 @@
+import os
+
+from services.gcode_file import GCodeProgram, index_path, load_line_index, write_line_index, write_program
+
+
+def test_program_reads_lines_through_the_index(tmp_path):
+    path = write_program(tmp_path / "job.gcode", ["G21", "G90", "G0 X1.00 Y2.00", "M5"])
+
+    assert index_path(path).exists()
+    with GCodeProgram(path) as program:
+        source = path.read_text(encoding="utf-8").splitlines(keepends=True)
+        assert len(program) == 4
+        assert list(program) == source
+        assert program[2] == "G0 X1.00 Y2.00\n"
+        assert program[-1] == "M5"
+        assert list(program[1:3]) == source[1:3]
+        assert list(program.iter_lines(3)) == ["M5"]
+        assert program.total_bytes == path.stat().st_size
+        assert list(program.line_ends) == [4, 8, 23, 25]
+
+
+def test_stale_or_missing_index_is_rebuilt(tmp_path):
+    path = tmp_path / "manual.gcode"
+    path.write_text("G21\n\nG1 X1\n", encoding="utf-8")
+    assert load_line_index(path) is None
+
+    with GCodeProgram(path) as program:
+        assert list(program) == ["G21\n", "\n", "G1 X1\n"]
+
+    path.write_text("G21\nM5\n", encoding="utf-8")
+    os.utime(index_path(path), ns=(0, 0))
+    assert load_line_index(path) is None
+    with GCodeProgram(path) as program:
+        assert list(program) == ["G21\n", "M5\n"]
+
+    write_line_index(path)
+    assert list(load_line_index(path)) == [0, 4, 7]
@@ -0,0 +1,41 @@
+from services.gcode_wire import WireOptimizer, format_number, optimize_lines
+
+SOURCE = [
+    "G21 ; millimetres",
+    "G90",
+    "G0 X10.00 Y10.00 ; move to start",
+    "F5000 ; set feed rate",
+    "M3 S90 ; pen down",
+    "G4 P0.05 ; dwell",
+    "G1 X20.00 Y10.00",
+    "G1 X20.00 Y20.00",
+    "M5 ; pen up",
+    "G0 X10.00 Y10.00 ; move to start",
+    "F5000 ; set feed rate",
+    "G1 X10.50 Y10.00",
+]
+
+
+def test_optimizer_elides_comments_modal_words_and_unchanged_axes():
+    lines, stats = optimize_lines(SOURCE)
+
+    assert list(lines) == [
+        "G21", "G90", "G0X10Y10", "F5000", "M3S90", "G4P0.05",
+        "G1X20", "Y20", "M5", "G0X10Y10", "", "G1X10.5",
+    ]
+    assert stats.lines == len(SOURCE)
+    assert stats.lines_dropped == 1
+    assert stats.source_bytes == sum(len(line) + 1 for line in SOURCE)
+    assert stats.saved_percent > 40
+
+
+def test_unknown_state_is_never_elided():
+    optimizer = WireOptimizer()
+    # distance mode and position are unknown until a G90 and a move were seen
+    assert optimizer.optimize("G1 X1.000 Y2.000 F300") == "G1X1Y2F300"
+    assert optimizer.optimize("G1 X1.000 Y2.000") == "X1Y2"
+    assert optimizer.optimize("$H") == "$H"
+    assert optimizer.optimize("X1") == "X1"
+    assert optimizer.optimize("G90 G2 X1 Y2 I5 J0") == "G90G2X1Y2I5J0"
+    assert optimizer.optimize("G2 X1 Y2 I5 J0") == "X1Y2I5J0", "arcs keep their end point"
+    assert format_number(-0.0004) == "0"
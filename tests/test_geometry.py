@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from benchmarks import legacy
+from services import geometry
+
+
+def _random_walk(rng, n, step=0.3):
+    return np.cumsum(rng.normal(scale=step, size=(n, 2)), axis=0)
+
+
+@pytest.mark.parametrize("epsilon", [0.05, 0.5, 2.0])
+def test_simplify_rdp_matches_recursive_versions(epsilon):
+    rng = np.random.default_rng(7)
+    for _ in range(10):
+        points = _random_walk(rng, 300)
+        result = geometry.simplify_rdp(points, epsilon)
+
+        expected = legacy.simplify_path_rdp(geometry.to_tuples(points), epsilon)
+        assert np.allclose(result, expected)
+        assert np.allclose(result, legacy.vectorizer_rdp(geometry.to_tuples(points), epsilon))
+
+
+def test_simplify_rdp_handles_closed_contours():
+    angles = np.linspace(0, 2 * np.pi, 200)
+    ring = np.column_stack([np.cos(angles), np.sin(angles)]) * 50
+    ring[-1] = ring[0]
+
+    result = geometry.simplify_rdp(ring, 1.0)
+
+    assert np.allclose(result, legacy.vectorizer_rdp(geometry.to_tuples(ring), 1.0))
+    assert 4 < len(result) < 40
+
+
+def test_chaikin_and_length_match_loops():
+    rng = np.random.default_rng(3)
+    points = _random_walk(rng, 50)
+    tuples = geometry.to_tuples(points)
+
+    assert np.allclose(geometry.smooth_chaikin(points, 2), legacy.smooth_path_chaikin(tuples, 2))
+    assert geometry.path_length(points) == pytest.approx(legacy.path_length(tuples))
+
+
+@pytest.mark.parametrize("min_dist", [0.1, 0.4, 1.5])
+def test_filter_min_move_matches_loop(min_dist):
+    rng = np.random.default_rng(11)
+    for _ in range(10):
+        points = _random_walk(rng, 400, step=0.25)
+        expected = legacy.filter_min_move(geometry.to_tuples(points), min_dist)
+        assert np.array_equal(geometry.filter_min_move(points, min_dist), np.array(expected))
+
+
+def test_point_line_distance():
+    distances = geometry.point_line_distance([(0, 1), (5, -2), (3, 0)], (0, 0), (10, 0))
+
+    assert np.allclose(distances, [1, 2, 0])
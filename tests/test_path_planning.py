@@ -0,0 +1,64 @@
+import numpy as np
+
+from services.path_planning import apply_path_order, join_paths, plan_path_order, travel_jumps
+
+
+def _scattered_segments(count, seed=5):
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(0, 200, size=(count, 2))
+    ends = starts + rng.normal(scale=5.0, size=(count, 2))
+    return [np.array([s, e]) for s, e in zip(starts, ends)]
+
+
+def test_plan_reduces_travel_and_keeps_every_path():
+    paths = _scattered_segments(300)
+
+    plan = plan_path_order(
+        np.array([p[0] for p in paths]), np.array([p[-1] for p in paths]), time_budget=2.0
+    )
+    ordered = apply_path_order(paths, plan)
+
+    assert sorted(plan.order) == list(range(len(paths)))
+    assert plan.travel < plan.initial_travel * 0.5
+    assert np.isclose(travel_jumps(ordered).sum(), plan.travel)
+    assert np.isclose(travel_jumps(paths).sum(), plan.initial_travel)
+
+
+def test_plan_reverses_paths_when_cheaper():
+    # a line drawn away from the origin should be entered at its near end
+    paths = [np.array([[100.0, 0.0], [10.0, 0.0]])]
+    paths.append(np.array([[120.0, 0.0], [200.0, 0.0]]))
+
+    plan = plan_path_order(np.array([p[0] for p in paths]), np.array([p[-1] for p in paths]), time_budget=0.5)
+    ordered = apply_path_order(paths, plan)
+
+    assert ordered[0][0].tolist() == [10.0, 0.0]
+    assert plan.travel < plan.initial_travel
+
+
+def test_join_paths_chains_touching_endpoints():
+    paths = [
+        np.array([[0.0, 0.0], [10.0, 0.0]]),
+        np.array([[20.0, 0.0], [10.05, 0.0]]),  # reversed, within tolerance
+        np.array([[50.0, 50.0], [60.0, 60.0]]),
+        np.array([[-10.0, 0.0], [0.0, 0.0]]),  # joins at the head of the first chain
+    ]
+
+    merged, joins = join_paths(paths, tolerance=0.1)
+
+    assert joins == 2
+    assert len(merged) == 2
+    chain = merged[0]
+    assert chain[0].tolist() == [-10.0, 0.0]
+    assert chain[-1].tolist() == [20.0, 0.0]
+    # the shared exact point is not duplicated
+    assert len(chain) == 5
+
+
+def test_join_paths_disabled_without_tolerance():
+    paths = [np.array([[0.0, 0.0], [1.0, 0.0]]), np.array([[1.0, 0.0], [2.0, 0.0]])]
+
+    merged, joins = join_paths(paths, tolerance=0.0)
+
+    assert joins == 0
+    assert len(merged) == 2
@@ -0,0 +1,363 @@
+import os
+import threading
+import time
+
+from services import plotter
+from services.plotter import PlotterController, PlotterError, SerialReader
+
+import pytest
+
+
+class FakeGrblSerial:
+    """Minimal serial stand-in that acknowledges lines once they are 'executed'."""
+
+    def __init__(self, rx_buffer_size=128, reply="ok"):
+        self.is_open = True
+        self.rx_buffer_size = rx_buffer_size
+        self.reply = reply
+        self.written = []
+        self.writes = 0
+        self.pending = []
+        self.max_buffered = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+
+    @property
+    def in_waiting(self):
+        return 0
+
+    def write(self, data):
+        with self._lock:
+            self.writes += 1
+            # one write may carry several lines; each one is acknowledged on its own
+            for line in bytes(data).splitlines(keepends=True):
+                self.written.append(line)
+                self.pending.append(len(line))
+            self.max_buffered = max(self.max_buffered, sum(self.pending))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        # block like a real port until a buffered line has been "executed"
+        deadline = time.monotonic() + 0.5
+        while time.monotonic() < deadline and not self._cancelled.is_set():
+            with self._lock:
+                has_pending = bool(self.pending)
+            if has_pending:
+                time.sleep(0.002)
+                with self._lock:
+                    self.pending.pop(0)
+                return f"{self.reply}\r\n".encode()
+            time.sleep(0.001)
+        return b""
+
+    def cancel_read(self):
+        self._cancelled.set()
+
+    def close(self):
+        self.is_open = False
+
+
+def _controller(fake, mode):
+    controller = PlotterController("fake", 115200, timeout=0.5, stream_mode=mode)
+    controller._serial = fake
+    controller._reader = SerialReader(fake)
+    controller._reader.start()
+    return controller
+
+
+def test_char_count_keeps_buffer_full_but_bounded():
+    fake = FakeGrblSerial()
+    controller = _controller(fake, plotter.STREAM_MODE_CHAR_COUNT)
+    lines = [f"G1 X{i}.00 Y{i}.00" for i in range(200)]
+    progress = []
+
+    controller.send_gcode_lines(lines, progress_callback=progress.append)
+    controller.disconnect()
+
+    assert len(fake.written) == 200
+    assert progress == list(range(1, 201))
+    assert fake.max_buffered <= plotter.GRBL_RX_BUFFER_SIZE
+    # several lines must have been in flight at once
+    assert fake.max_buffered > len(fake.written[0])
+    # lines that fit in the free buffer space share one write
+    assert fake.writes < 200
+    stats = controller.last_stream_stats
+    assert stats.lines == 200 and stats.writes == fake.writes and stats.flushes == 0
+    assert stats.lines_per_second > 0
+
+
+def test_char_count_reports_controller_errors():
+    fake = FakeGrblSerial(reply="error:20")
+    controller = _controller(fake, plotter.STREAM_MODE_CHAR_COUNT)
+
+    with pytest.raises(PlotterError, match="line 1"):
+        controller.send_gcode_lines(["G1 X1 Y1", "G1 X2 Y2"])
+    controller.disconnect()
+
+
+def test_char_count_status_chatter_does_not_postpone_ack_timeout():
+    class ChattyGrblSerial(FakeGrblSerial):
+        """Reports status forever but never acknowledges a line."""
+
+        def read(self, size=1):
+            time.sleep(0.05)
+            return b"<Idle|MPos:0.000,0.000,0.000|FS:0,0>\r\n"
+
+    controller = _controller(ChattyGrblSerial(), plotter.STREAM_MODE_CHAR_COUNT)
+    errors = []
+
+    def _stream():
+        try:
+            controller.send_gcode_lines(["G1 X1"])
+        except PlotterError as exc:
+            errors.append(exc)
+
+    worker = threading.Thread(target=_stream, daemon=True)
+    worker.start()
+    worker.join(3.0)
+    try:
+        assert not worker.is_alive()
+        assert errors and "No response within" in str(errors[0])
+    finally:
+        controller.request_cancel()
+        controller.disconnect()
+
+
+def test_ping_pong_cancel_interrupts_ack_wait():
+    class SilentSerial(FakeGrblSerial):
+        def read(self, size=1):
+            self._cancelled.wait(0.05)
+            return b""
+
+    fake = SilentSerial()
+    controller = _controller(fake, plotter.STREAM_MODE_PING_PONG)
+    controller.timeout = 5.0
+    threading.Timer(0.1, controller.request_cancel).start()
+
+    started = time.monotonic()
+    with pytest.raises(PlotterError, match="cancelled"):
+        controller.send_gcode_lines(["G1 X1 Y1"])
+    assert time.monotonic() - started < 2.0
+    controller.disconnect()
+
+
+def test_unknown_stream_mode_rejected():
+    with pytest.raises(ValueError):
+        PlotterController("fake", 115200, stream_mode="bogus")
+
+
+def test_plotter_service_keeps_connection_between_commands():
+    from services.plotter_service import PlotterService
+
+    class CountingController:
+        def __init__(self):
+            self.connects = 0
+            self.is_open = False
+
+        def connect(self):
+            if not self.is_open:
+                self.connects += 1
+                self.is_open = True
+
+        def disconnect(self):
+            self.is_open = False
+
+        def request_cancel(self):
+            pass
+
+    controller = CountingController()
+    service = PlotterService(lambda: controller)
+    try:
+        assert service.run(lambda c: "first") == "first"
+        assert service.run(lambda c: "second") == "second"
+        assert controller.connects == 1
+
+        def _fail(c):
+            raise PlotterError("link dropped")
+
+        with pytest.raises(PlotterError):
+            service.run(_fail)
+        service.run(lambda c: None)
+        assert controller.connects == 2
+    finally:
+        service.shutdown()
+    assert controller.is_open is False
+
+
+@pytest.mark.skipif(not hasattr(os, "openpty"), reason="needs a pseudo-terminal")
+def test_serial_port_is_opened_exclusively():
+    import serial
+
+    master, slave = os.openpty()
+    try:
+        port = plotter._open_serial(os.ttyname(slave), 115200, timeout=0.1)
+        try:
+            with pytest.raises(serial.SerialException):
+                plotter._open_serial(os.ttyname(slave), 115200, timeout=0.1)
+        finally:
+            port.close()
+        plotter._open_serial(os.ttyname(slave), 115200, timeout=0.1).close()
+    finally:
+        os.close(master)
+        os.close(slave)
+
+
+def test_plotter_service_releases_port_before_replacement():
+    from services.plotter_service import get_plotter_service, shutdown_plotter_service
+
+    log = []
+
+    class RecordingController:
+        def __init__(self, port, **kwargs):
+            self.port = port
+            self.is_open = False
+
+        def connect(self):
+            if not self.is_open:
+                self.is_open = True
+                log.append(("open", self.port))
+
+        def disconnect(self):
+            if self.is_open:
+                self.is_open = False
+                log.append(("close", self.port))
+
+        def request_cancel(self):
+            pass
+
+    release = threading.Event()
+    try:
+        old = get_plotter_service({"SERIAL_PORT": "A"}, controller_factory=RecordingController)
+        old.submit(lambda c: release.wait(2))
+
+        def _use_new_port():
+            get_plotter_service({"SERIAL_PORT": "B"}, controller_factory=RecordingController).run(lambda c: None)
+
+        replacing = threading.Thread(target=_use_new_port)
+        replacing.start()
+        time.sleep(0.1)
+        # a second caller must not reach port B while A is still printing
+        waiting = threading.Thread(target=_use_new_port)
+        waiting.start()
+        waiting.join(0.3)
+        release.set()
+        replacing.join(2)
+        waiting.join(2)
+    finally:
+        release.set()
+        shutdown_plotter_service()
+    assert log == [("open", "A"), ("close", "A"), ("open", "B"), ("close", "B")]
+
+
+def test_char_count_against_grbl_emulator():
+    controller = PlotterController(
+        "grblsim://?speed=200",
+        115200,
+        timeout=5.0,
+        startup_delay=0.0,
+        stream_mode=plotter.STREAM_MODE_CHAR_COUNT,
+    )
+    lines = ["F5000", "M3 S90"] + [f"G1 X{i * 0.5:.2f} Y{(i % 7) * 0.5:.2f}" for i in range(150)] + ["M5"]
+    controller.connect()
+    try:
+        controller.send_gcode_lines(lines)
+        stats = controller._serial.simulator.stats
+    finally:
+        controller.disconnect()
+
+    assert stats.rx_overflows == 0
+    assert stats.errors == 0
+    assert stats.oks == len(lines)
+    # the RX buffer held several lines at once, unlike ping-pong streaming
+    assert stats.max_rx_bytes > len(lines[-2]) + 1
+
+
+def test_realtime_cancel_holds_then_resets_emulator():
+    controller = PlotterController(
+        "grblsim://?speed=10",
+        115200,
+        timeout=5.0,
+        startup_delay=0.0,
+        stream_mode=plotter.STREAM_MODE_CHAR_COUNT,
+    )
+    lines = ["F3000", "M3 S90"] + [f"G1 X{(i % 2) * 20:.2f} Y{i * 0.1:.2f}" for i in range(400)]
+    controller.connect()
+    try:
+        threading.Timer(0.3, controller.request_cancel).start()
+        with pytest.raises(PlotterError, match="cancelled"):
+            controller.send_gcode_lines(lines)
+        simulator = controller._serial.simulator
+
+        assert controller.last_cancel_latency is not None and controller.last_cancel_latency < 0.2
+        assert simulator.stats.hold_latency_seconds is not None
+        assert simulator.stats.lines_received < len(lines)
+        assert simulator.is_idle()
+        # the reset happened after the hold stopped motion, so GRBL kept its position
+        controller.rehome()
+    finally:
+        controller.disconnect()
+
+
+def test_adaptive_ack_timeout_allows_dwells_but_catches_stalls():
+    controller = PlotterController(
+        "grblsim://?speed=1",
+        115200,
+        timeout=0.3,
+        startup_delay=0.0,
+        stream_mode=plotter.STREAM_MODE_CHAR_COUNT,
+        ack_timeout_min=0.3,
+    )
+    controller.connect()
+    try:
+        # a fixed 0.3 s deadline would expire during the dwell
+        controller.send_gcode_lines(["F3000", "M3 S90", "G4 P0.6", "M5"])
+    finally:
+        controller.disconnect()
+
+    class SilentSerial(FakeGrblSerial):
+        def read(self, size=1):
+            time.sleep(0.005)
+            return b""
+
+    controller = _controller(SilentSerial(), plotter.STREAM_MODE_CHAR_COUNT)
+    controller.timeout = 30.0
+    controller.ack_timeout_min = 0.2
+    started = time.monotonic()
+    with pytest.raises(PlotterError, match="No response within 0.2 s"):
+        controller.send_gcode_lines(["G1 X1.00 Y1.00"])
+    controller.disconnect()
+    assert time.monotonic() - started < 5.0
+
+
+def test_numbered_line_uses_marlin_checksum():
+    assert plotter.numbered_line(0, "M110 N0") == b"N0 M110 N0*125\n"
+
+
+def test_numbered_stream_recovers_without_running_lines_twice():
+    controller = PlotterController(
+        "grblsim://?speed=20&numbered=1&corrupt=7&drop_ok=5",
+        115200,
+        timeout=0.3,
+        startup_delay=0.0,
+        stream_mode=plotter.STREAM_MODE_NUMBERED,
+    )
+    # relative moves: a line executed twice would leave the carriage past X30
+    lines = ["G91 ; relative", "F3000"] + ["G1 X1.00"] * 30
+    progress = []
+    controller.connect()
+    try:
+        controller.send_gcode_lines(lines, progress_callback=progress.append)
+        simulator = controller._serial.simulator
+        deadline = time.monotonic() + 5.0
+        while not simulator.is_idle() and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert progress == list(range(1, len(lines) + 1))
+        assert simulator.stats.resends > 0
+        assert controller.last_resends > 0
+        assert simulator._position == pytest.approx((30.0, 0.0))
+    finally:
+        controller.disconnect()
@@ -0,0 +1,84 @@
+import pytest
+
+from services.print_time import AckTimeModel, MachineProfile, machine_profile_from_config, simulate_gcode
+
+
+def test_straight_feed_move_includes_acceleration():
+    profile = MachineProfile(acceleration=100.0)
+    estimate = simulate_gcode(["G1 X100 F600"], profile)
+
+    # 10 mm/s cruise plus 0.1 s accel and decel ramps (each costs half their duration)
+    assert estimate.total_seconds == pytest.approx(10.1, rel=1e-6)
+
+
+def test_rapids_run_at_max_rate():
+    profile = MachineProfile(max_rate=6000.0, acceleration=1e6)
+    estimate = simulate_gcode(["F60", "G0 X100"], profile)
+
+    assert estimate.total_seconds == pytest.approx(1.0, rel=1e-3)
+
+
+def test_sharp_corners_are_slower_than_collinear_segments():
+    profile = MachineProfile(acceleration=200.0)
+    collinear = ["G1 X10 F3000"] + [f"G1 X{10 * i}" for i in range(2, 11)]
+    zigzag = ["G1 X10 F3000"] + [f"G1 X{10 * i} Y{10 * (i % 2)}" for i in range(2, 11)]
+
+    straight = simulate_gcode(collinear, profile).total_seconds
+    cornered = simulate_gcode(zigzag, profile).total_seconds
+
+    assert cornered > straight * 1.5
+
+
+def test_reports_per_path_times_and_line_delay():
+    lines = [
+        "G0 X0 Y0",
+        "M3 S90",
+        "G1 X10 F600",
+        "M5",
+        "G0 X20",
+        "M3 S90",
+        "G1 X40 F600",
+        "G4 P0.5",
+        "M5",
+    ]
+    estimate = simulate_gcode(lines, MachineProfile(acceleration=1e6))
+
+    assert len(estimate.path_seconds) == 2
+    assert estimate.path_seconds[0] == pytest.approx(1.0, rel=1e-3)
+    assert estimate.path_seconds[1] == pytest.approx(2.5, rel=1e-3)
+    assert estimate.dwell_seconds == pytest.approx(0.5)
+
+    delayed = simulate_gcode(lines, MachineProfile(acceleration=1e6, line_delay=1.0))
+    assert delayed.total_seconds > estimate.total_seconds
+    assert delayed.stream_wait_seconds > 0
+
+
+def test_profile_ignores_line_delay_for_char_count():
+    config = {"PLOTTER_STREAM_MODE": "char-count", "PLOTTER_LINE_DELAY": 0.1, "PLOTTER_ACCELERATION": 250}
+    profile = machine_profile_from_config(config)
+
+    assert profile.line_delay == 0.0
+    assert profile.acceleration == 250.0
+
+
+def test_unset_stream_mode_matches_the_controller_settings_default():
+    from services.plotter_service import controller_settings
+
+    config = {"PLOTTER_LINE_DELAY": 0.1}
+
+    assert controller_settings(config)["stream_mode"] == "char-count"
+    assert machine_profile_from_config(config).line_delay == 0.0
+
+
+def test_ack_time_model_waits_for_planner_space_and_dwells():
+    profile = MachineProfile(acceleration=1e6, planner_blocks=2)
+    model = AckTimeModel(profile)
+
+    # a move is acked once it is queued; only when the planner is full does an ack wait for a block
+    assert model.expected_ack_seconds("G1 X10 F600 ; first") == pytest.approx(0.0)
+    assert model.expected_ack_seconds("G1 X20") == pytest.approx(0.0)
+    assert model.expected_ack_seconds("G1 X30") == pytest.approx(1.0, rel=1e-3)
+    # pen commands and dwells drain the queue (two 1 s moves) before answering
+    assert model.expected_ack_seconds("M5") == pytest.approx(2.0, rel=1e-3)
+    assert model.expected_ack_seconds("G4 P1.5") == pytest.approx(1.5)
+    assert model.expected_ack_seconds("$H") == 0.0
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+
+from services.progress import ProgressStore
+
+
+def test_updates_stay_in_memory_until_flushed():
+    writes = []
+    store = ProgressStore(lambda job_id, progress: writes.append((job_id, progress)), flush_interval=60)
+
+    store.begin(7, [10, 10, 15, 20])
+    assert writes[-1][1]["current_line"] == 0
+    assert writes[-1][1]["total_bytes"] == 20
+
+    for line in range(1, 4):
+        store.update(7, line)
+    assert len(writes) == 1
+    live = store.get(7)
+    assert (live["current_line"], live["bytes_sent"]) == (3, 15)
+
+    store.flush()
+    assert writes[-1][1]["current_line"] == 3
+    store.flush()
+    assert len(writes) == 2, "unchanged records are not rewritten"
+
+    assert store.finish(7)
+    assert writes[-1] == (7, None)
+    assert store.get(7) is None
+    store.update(7, 4)
+    store.flush()
+    assert writes[-1] == (7, None)
+
+
+def test_rate_and_eta_follow_acknowledged_lines():
+    published = []
+    store = ProgressStore(lambda *_: None, publish=lambda job_id, p: published.append(p), rate_window=0.01)
+
+    store.begin(1, range(4, 404, 4))
+    time.sleep(0.02)
+    store.update(1, 20)
+    progress = store.get(1)
+
+    assert progress["lines_per_second"] > 0
+    assert progress["eta_seconds"] == pytest.approx(80 / progress["lines_per_second"], rel=0.02, abs=0.1)
+    assert published[0]["current_line"] == 0
+    assert published[-1]["current_line"] == 20
+
+
+def test_idle_prints_are_rewritten_as_a_heartbeat():
+    writes = []
+    store = ProgressStore(lambda job_id, progress: writes.append(job_id), flush_interval=60, heartbeat_interval=0.01)
+
+    store.begin(3, [5, 10])
+    store.flush()
+    assert writes == [3]
+    time.sleep(0.02)
+    store.flush()
+    assert writes == [3, 3]
+    store.finish(3)
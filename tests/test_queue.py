@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from pathlib import Path
 
 import pytest
@@ -209,3 +210,438 @@ def test_sanitizes_control_characters_in_email(test_storage, sample_upload):
     )
     stored_email = queue.get_job(job["id"], admin=True)["email"]
     assert stored_email == "alert('hi')"
+
+
+def test_submit_job_generates_in_background(test_storage, sample_upload):
+    import threading
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GENERATION_WORKERS": 1,
+        "GENERATION_QUEUE_SIZE": 1,
+    }
+    started = threading.Event()
+    release = threading.Event()
+
+    class SlowGemini(StubGemini):
+        def generate_caricature(self, image_bytes: bytes, prompt=None) -> bytes:
+            started.set()
+            assert release.wait(10)
+            return image_bytes
+
+    try:
+        first = queue.submit_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=SlowGemini()
+        )
+        # the worker may already have picked the job up by the time it is read back
+        assert first["status"] in {queue.JobStatus.SUBMITTED.value, queue.JobStatus.GENERATING.value}
+        assert started.wait(10)
+        assert queue.get_job(first["id"])["status"] == queue.JobStatus.GENERATING.value
+
+        second = queue.submit_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=SlowGemini()
+        )
+        with pytest.raises(queue.QueueFullError):
+            queue.submit_job_from_upload(
+                sample_upload(), prompt=None, requester="tester", config=config, gemini_client=SlowGemini()
+            )
+
+        release.set()
+        queue.get_generation_pool(config).join()
+    finally:
+        release.set()
+        queue.shutdown_generation_pool(wait=True)
+
+    assert queue.get_job(first["id"])["status"] == queue.JobStatus.GENERATED.value
+    assert queue.get_job(second["id"])["status"] == queue.JobStatus.GENERATED.value
+    rejected = queue.list_jobs(admin=True, limit=1)[0]
+    assert rejected["status"] == queue.JobStatus.FAILED.value
+
+
+def test_print_dispatcher_prints_queued_then_approved_jobs(test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "PLOTTER_DRY_RUN": True,
+        "PRINT_AUTO_ADVANCE": False,
+    }
+    jobs = [
+        queue.create_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+        )
+        for _ in range(2)
+    ]
+    approved, queued = (job["id"] for job in jobs)
+    queue.approve_job(approved)
+    queue.queue_for_printing(queued, config)
+
+    dispatcher = queue.PrintDispatcher(config)
+    dispatcher.run_pending()
+
+    assert queue.get_job(queued)["status"] == queue.JobStatus.COMPLETED.value
+    assert queue.get_job(approved)["status"] == queue.JobStatus.APPROVED.value
+
+    config["PRINT_AUTO_ADVANCE"] = True
+    dispatcher.run_pending()
+
+    assert queue.get_job(approved)["status"] == queue.JobStatus.COMPLETED.value
+    assert Path(queue.get_job(approved, admin=True)["gcode_path"]).with_suffix(".dryrun.txt").exists()
+
+
+def test_precompiled_gcode_is_reused_until_settings_change(test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    job = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )
+
+    first = queue.precompile_gcode(job["id"], config)
+    again = queue.precompile_gcode(job["id"], config)
+    assert again == first
+    assert Path(first["gcode_path"]).name.endswith(f"-{first['settings_key']}.gcode")
+
+    slower = {**config, "PLOTTER_FEED_RATE": 1200}
+    recompiled = queue.precompile_gcode(job["id"], slower)
+    assert recompiled["settings_key"] != first["settings_key"]
+    assert not Path(first["gcode_path"]).exists()
+
+    queued = queue.queue_for_printing(job["id"], slower)
+    assert queued["gcode_path"] == recompiled["gcode_path"]
+    assert queued["metadata"]["precompiled_gcode"]["compiled_at"] == recompiled["compiled_at"]
+    assert queued["metadata"]["gcode_stats"] == recompiled["gcode_stats"]
+
+
+def test_failed_print_resumes_from_checkpoint(monkeypatch, test_storage, sample_upload):
+    from services.plotter import PlotterError
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "SERIAL_PORT": "loop://resume",
+        "GCODE_PRECOMPILE": False,
+        "WIRE_OPTIMIZE": False,  # compare the streamed lines with the file verbatim
+    }
+    streams = []
+
+    class FlakyPlotter:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def rehome(self):
+            pass
+
+        def send_gcode_lines(self, lines, *, progress_callback=None):
+            sent = []
+            streams.append(sent)
+            for idx, line in enumerate(lines, start=1):
+                if len(streams) == 1 and idx == 60:
+                    raise PlotterError("Serial link lost")
+                sent.append(line)
+                progress_callback(idx)
+
+    monkeypatch.setattr(queue, "PlotterController", FlakyPlotter)
+    job = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )
+    with pytest.raises(PlotterError):
+        queue.start_print_job(job["id"], config)
+
+    failed = queue.get_job(job["id"], admin=True)
+    assert failed["status"] == queue.JobStatus.FAILED.value
+    checkpoint = failed["metadata"]["print_checkpoint"]
+    assert checkpoint["line"] == 59
+    assert checkpoint["gcode_path"] == failed["gcode_path"]
+
+    queue.resume_print_job(job["id"], config)
+    # resume wakes the shared dispatcher; let it finish, then drain anything it left queued
+    queue.shutdown_print_dispatcher(wait=True)
+    queue.PrintDispatcher(config).run_pending()
+
+    done = queue.get_job(job["id"], admin=True)
+    assert done["status"] == queue.JobStatus.COMPLETED.value
+    assert "print_checkpoint" not in done["metadata"]
+    source = Path(done["gcode_path"]).read_text(encoding="utf-8").splitlines(keepends=True)
+    backoff = 16  # default planner_blocks + 1
+    resumed = streams[-1]  # jobs queued by earlier tests may print first
+    assert resumed[-(len(source) - (59 - backoff)):] == source[59 - backoff:]
+    assert resumed[1].startswith("M5")
+
+
+def test_compiled_program_streams_encoded_lines(monkeypatch, test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "SERIAL_PORT": "loop://compiled",
+        "GCODE_PRECOMPILE": False,
+        "GCODE_COMPILED": True,
+    }
+    sent = []
+
+    class RecordingPlotter:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def rehome(self):
+            pass
+
+        def send_gcode_lines(self, lines, *, progress_callback=None):
+            for idx, line in enumerate(lines, start=1):
+                sent.append(line)
+                progress_callback(idx)
+
+    monkeypatch.setattr(queue, "PlotterController", RecordingPlotter)
+    job = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )
+    done = queue.start_print_job(job["id"], config)
+
+    assert done["status"] == queue.JobStatus.COMPLETED.value
+    gcode_path = Path(queue.get_job(job["id"], admin=True)["gcode_path"])
+    assert gcode_path.with_suffix(".gcbin").exists() and not gcode_path.exists()
+    assert sent and all(isinstance(line, bytes) for line in sent)
+    assert b"; " not in b"".join(sent)
+    assert queue.get_job(job["id"], admin=True)["metadata"]["wire_stats"]["saved_bytes"] > 0
+
+
+def test_cancelling_a_queued_job_leaves_the_running_print_alone(monkeypatch, test_storage, sample_upload):
+    import threading
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "SERIAL_PORT": "loop://cancel-queued",
+        "GCODE_PRECOMPILE": False,
+    }
+    streaming = threading.Event()
+    release = threading.Event()
+
+    class BlockingPlotter:
+        cancel_requests = 0
+
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def rehome(self):
+            pass
+
+        def request_cancel(self):
+            BlockingPlotter.cancel_requests += 1
+
+        def send_gcode_lines(self, lines, *, progress_callback=None):
+            for idx, _ in enumerate(lines, start=1):
+                progress_callback(idx)
+                if idx == 10:
+                    streaming.set()
+                    release.wait(5.0)
+
+    monkeypatch.setattr(queue, "PlotterController", BlockingPlotter)
+    printing, waiting = (
+        queue.create_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+        )["id"]
+        for _ in range(2)
+    )
+    queue.queue_for_printing(waiting, config)
+    results = {}
+    worker = threading.Thread(target=lambda: results.update(queue.start_print_job(printing, config)))
+    worker.start()
+    try:
+        assert streaming.wait(5.0)
+        assert queue.cancel_job(waiting)["status"] == queue.JobStatus.CANCELLED.value
+    finally:
+        release.set()
+        worker.join(5.0)
+
+    assert BlockingPlotter.cancel_requests == 0
+    assert results["status"] == queue.JobStatus.COMPLETED.value
+    assert queue.get_job(waiting)["status"] == queue.JobStatus.CANCELLED.value
+
+
+def test_next_print_job_ignores_metadata_updates(test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    first, second = (
+        queue.create_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+        )["id"]
+        for _ in range(2)
+    )
+    for leftover in queue.list_jobs(admin=True, limit=100):
+        if leftover["status"] == queue.JobStatus.QUEUED.value:
+            queue.cancel_job(leftover["id"])
+    queue.queue_for_printing(first, config)
+    queue.queue_for_printing(second, config)
+    # a later metadata write must not send the first job to the back of the queue
+    queue._update_job_metadata(first, note="touched")
+
+    assert queue._next_print_job(auto_advance=False) == first
+    for job_id in (first, second):
+        queue.cancel_job(job_id)
+
+
+def test_recovery_leaves_prints_with_a_live_lease(test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    job_id = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )["id"]
+    queue.queue_for_printing(job_id, config)
+    # claimed by another process: PRINTING here, but not streaming in this one
+    assert queue._claim_print_job(job_id)
+
+    assert job_id not in queue.recover_interrupted_prints(lease_seconds=60.0)
+    assert queue.get_job(job_id)["status"] == queue.JobStatus.PRINTING.value
+    assert job_id in queue.recover_interrupted_prints(lease_seconds=0.0)
+    assert queue.get_job(job_id)["status"] == queue.JobStatus.FAILED.value
+
+
+def test_recovery_fails_generations_orphaned_by_a_restart(monkeypatch, test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    job_id = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )["id"]
+    queue.set_job_status(job_id, queue.JobStatus.GENERATING)
+
+    # started in this process: still generating
+    assert job_id not in queue.recover_interrupted_generations()
+    assert queue.get_job(job_id)["status"] == queue.JobStatus.GENERATING.value
+
+    monkeypatch.setattr(queue, "_process_started_at", datetime.utcnow() + timedelta(seconds=1))
+    assert job_id in queue.recover_interrupted_generations()
+    job = queue.get_job(job_id, admin=True)
+    assert job["status"] == queue.JobStatus.FAILED.value
+    assert "restart" in job["error_message"]
+
+
+def test_cancelled_print_keeps_a_current_checkpoint(monkeypatch, test_storage, sample_upload):
+    from services.plotter import PlotterError
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "SERIAL_PORT": "loop://cancel-checkpoint",
+        "GCODE_PRECOMPILE": False,
+    }
+    job_id = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )["id"]
+
+    class CancellingPlotter:
+        def __init__(self, *args, **kwargs):
+            self.cancelled = False
+
+        def connect(self):
+            pass
+
+        def disconnect(self):
+            pass
+
+        def rehome(self):
+            pass
+
+        def request_cancel(self):
+            self.cancelled = True
+
+        def send_gcode_lines(self, lines, *, progress_callback=None):
+            for idx, _ in enumerate(lines, start=1):
+                if self.cancelled:
+                    raise PlotterError("Transmission cancelled by user.")
+                progress_callback(idx)
+                if idx == 42:
+                    # cancelled from the admin API while the print streams
+                    queue.cancel_job(job_id)
+
+    monkeypatch.setattr(queue, "PlotterController", CancellingPlotter)
+    with pytest.raises(PlotterError):
+        queue.start_print_job(job_id, config)
+
+    cancelled = queue.get_job(job_id, admin=True)
+    assert cancelled["status"] == queue.JobStatus.CANCELLED.value
+    assert cancelled["metadata"]["print_checkpoint"]["line"] == 42
+    assert "print_progress" not in cancelled["metadata"]
+
+
+def test_confirming_a_job_schedules_precompile(monkeypatch, test_storage, sample_upload):
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    job_id = queue.create_job_from_upload(
+        sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+    )["id"]
+    scheduled = []
+    monkeypatch.setattr(queue, "schedule_precompile", lambda job, cfg: scheduled.append(job))
+
+    queue.confirm_job(job_id, config)
+
+    assert scheduled == [job_id]
+
+
+def test_compiling_one_job_does_not_block_another(test_storage, sample_upload):
+    import threading
+
+    config = {
+        "UPLOAD_DIR": test_storage["UPLOAD_DIR"],
+        "GENERATED_DIR": test_storage["GENERATED_DIR"],
+        "GCODE_DIR": test_storage["GCODE_DIR"],
+        "GCODE_PRECOMPILE": False,
+    }
+    busy, other = (
+        queue.create_job_from_upload(
+            sample_upload(), prompt=None, requester="tester", config=config, gemini_client=StubGemini()
+        )["id"]
+        for _ in range(2)
+    )
+    assert queue._compile_lock_for(busy) is not queue._compile_lock_for(other)
+    results = {}
+    # hold the first job's compile lock as a slow compile would
+    with queue._compile_lock_for(busy):
+        worker = threading.Thread(target=lambda: results.update(queue.precompile_gcode(other, config)))
+        worker.start()
+        worker.join(10.0)
+        assert not worker.is_alive()
+    assert Path(results["gcode_path"]).exists()
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from benchmarks.bench_thinning import synthetic_mask
+from benchmarks.legacy import zhang_suen_thinning as legacy_thinning
+from services.skeleton import extract_paths, zhang_suen_thinning
+
+
+@pytest.mark.parametrize("iterations", [1, 3, 20])
+def test_thinning_matches_legacy_on_drawing(iterations):
+    mask = synthetic_mask(96)
+
+    expected = legacy_thinning(mask, iterations=iterations)
+    result = zhang_suen_thinning(mask, iterations=iterations)
+
+    assert result.dtype == bool
+    assert np.array_equal(result, expected)
+
+
+def test_thinning_matches_legacy_on_noise():
+    rng = np.random.default_rng(1234)
+    for _ in range(5):
+        mask = rng.random((40, 57)) < 0.55
+        assert np.array_equal(zhang_suen_thinning(mask), legacy_thinning(mask))
+
+
+def test_extract_paths_splits_at_junctions():
+    mask = np.zeros((12, 12), dtype=bool)
+    mask[2, 1:10] = True  # horizontal bar
+    mask[3:10, 5] = True  # stem hanging from its middle
+
+    paths = extract_paths(mask, point_skip=1)
+
+    assert len(paths) == 3
+    assert all((2, 5) in (path[0], path[-1]) for path in paths)
+    covered = {point for path in paths for point in path}
+    assert covered == {tuple(p) for p in np.argwhere(mask)}
+
+
+def test_extract_paths_traces_closed_loops_and_staircases():
+    mask = np.zeros((10, 10), dtype=bool)
+    mask[2, 2:7] = True
+    mask[6, 2:7] = True
+    mask[2:7, 2] = True
+    mask[2:7, 6] = True
+    # a staircase diagonal with 4-connected corners
+    stairs = np.zeros((8, 8), dtype=bool)
+    for i in range(6):
+        stairs[i + 1, i + 1] = True
+        stairs[i + 1, i + 2] = True
+
+    loops = extract_paths(mask, point_skip=1)
+    diagonal = extract_paths(stairs, point_skip=1)
+
+    assert len(loops) == 1
+    assert loops[0][0] == loops[0][-1]
+    assert len(loops[0]) == int(mask.sum()) + 1
+    assert len(diagonal) == 1
+    assert len(diagonal[0]) == int(stairs.sum())
@@ -0,0 +1,68 @@
+import numpy as np
+
+from services.vectorizer import VectorData, crop_and_scale_vector_data, load_vector_data, save_vector_data
+
+
+def _sample():
+    return VectorData(
+        width=200,
+        height=100,
+        paths=[[(50.0, 20.0), (60.0, 30.0), (70.0, 25.0)], [(80.0, 40.0), (120.0, 60.0)], []],
+    )
+
+
+def test_paths_are_zero_copy_views():
+    data = _sample()
+
+    assert data.path_count == 3
+    assert data.points.shape == (5, 2)
+    assert data.offsets.tolist() == [0, 3, 5, 5]
+    assert [len(path) for path in data.paths] == [3, 2, 0]
+    assert np.shares_memory(data.paths[1], data.points)
+    assert data.paths[-2].tolist() == [[80.0, 40.0], [120.0, 60.0]]
+
+
+def test_crop_and_scale_transforms_all_points():
+    data = _sample()
+
+    scaled = crop_and_scale_vector_data(data, padding_ratio=0.0, target_dimension=140)
+
+    # content spans x 50..120, y 20..60 -> scale 2
+    assert (scaled.width, scaled.height) == (140, 80)
+    assert scaled.paths[0][0].tolist() == [0.0, 0.0]
+    assert scaled.paths[1][1].tolist() == [140.0, 80.0]
+    assert scaled.offsets is data.offsets
+
+
+def test_save_and_load_round_trip(tmp_path):
+    data = _sample()
+    target = tmp_path / "vectors.json"
+
+    save_vector_data(data, target)
+    loaded = load_vector_data(target)
+
+    assert (loaded.width, loaded.height) == (200, 100)
+    assert np.array_equal(loaded.points, data.points)
+    assert np.array_equal(loaded.offsets, data.offsets)
+
+
+def test_centerline_mode_traces_thick_strokes_once(tmp_path):
+    from PIL import Image, ImageDraw
+
+    from services.geometry import path_length
+    from services.vectorizer import vectorize_image
+
+    image = Image.new("L", (200, 120), 255)
+    ImageDraw.Draw(image).line((20, 60, 180, 60), fill=0, width=7)
+    image_path = tmp_path / "stroke.png"
+    image.save(image_path)
+
+    contour = vectorize_image(image_path, threshold=200, min_path_points=4)
+    centerline = vectorize_image(image_path, threshold=200, mode="centerline", with_widths=True)
+
+    contour_length = sum(path_length(path) for path in contour.paths)
+    assert centerline.path_count == 1
+    assert abs(path_length(centerline.paths[0]) - 160) < 10
+    assert contour_length > 1.8 * path_length(centerline.paths[0])
+    assert centerline.widths is not None and len(centerline.widths) == len(centerline.points)
+    assert np.all(np.abs(centerline.widths - 7) < 3)